@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Event, Section, Seat, Attendee
+from .models import (
+    Event, Section, Seat, Attendee, SeatHold, SeatMapAsset, ImageProcessingJob, ArchivedEvent, ArchivedAttendee,
+    OccupancySnapshot,
+)
 
 class SectionInline(admin.TabularInline):
     model = Section
@@ -12,7 +15,7 @@ class SeatInline(admin.TabularInline):
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ['name', 'venue', 'date', 'time', 'is_active', 'created_at', 'updated_at']
+    list_display = ['name', 'venue', 'date', 'time', 'is_active', 'total_seats', 'occupied_seats', 'created_at', 'updated_at']
     list_filter = ['date', 'venue', 'is_active']
     search_fields = ['name', 'venue', 'description']
     ordering = ['-date', '-time']
@@ -21,7 +24,7 @@ class EventAdmin(admin.ModelAdmin):
 
 @admin.register(Section)
 class SectionAdmin(admin.ModelAdmin):
-    list_display = ['name', 'event', 'color', 'capacity']
+    list_display = ['name', 'event', 'color', 'capacity', 'total_seats', 'occupied_seats']
     list_filter = ['event', 'color']
     search_fields = ['name', 'event__name']
     ordering = ['event', 'name']
@@ -36,8 +39,65 @@ class SeatAdmin(admin.ModelAdmin):
 
 @admin.register(Attendee)
 class AttendeeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'phone', 'seat', 'ticket_number', 'created_at']
-    list_filter = ['seat__section__event', 'created_at']
+    list_display = ['name', 'email', 'phone', 'seat', 'ticket_number', 'checked_in_at', 'created_at']
+    list_filter = ['seat__section__event', 'checked_in_at', 'created_at']
     search_fields = ['name', 'email', 'ticket_number', 'phone']
     ordering = ['name']
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ['seat', 'token', 'holder', 'expires_at', 'created_at']
+    list_filter = ['seat__section__event', 'expires_at']
+    search_fields = ['token', 'holder']
+    readonly_fields = ['created_at']
+
+@admin.register(SeatMapAsset)
+class SeatMapAssetAdmin(admin.ModelAdmin):
+    list_display = ['event', 'width', 'height', 'source', 'processed_at']
+    search_fields = ['event__name', 'source']
+    readonly_fields = ['processed_at']
+
+@admin.register(ImageProcessingJob)
+class ImageProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ['event', 'image_name', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['event__name', 'image_name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+class ArchiveReadOnlyAdmin(admin.ModelAdmin):
+    """Archived rows are only written by the archive_events command"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(ArchiveReadOnlyAdmin):
+    list_display = ['name', 'venue', 'date', 'time', 'is_active', 'total_seats', 'occupied_seats', 'archived_at']
+    list_filter = ['date', 'venue']
+    search_fields = ['name', 'venue']
+    ordering = ['-date', '-time']
+
+@admin.register(ArchivedAttendee)
+class ArchivedAttendeeAdmin(ArchiveReadOnlyAdmin):
+    list_display = ['name', 'email', 'ticket_number', 'seat', 'checked_in_at']
+    search_fields = ['name', 'email', 'ticket_number']
+    list_select_related = ['seat__section__event']
+
+@admin.register(OccupancySnapshot)
+class OccupancySnapshotAdmin(admin.ModelAdmin):
+    """Snapshots are only written by the record_occupancy command"""
+    list_display = ['event_id', 'section_id', 'resolution', 'taken_at', 'bookable_seats', 'occupied_seats', 'checked_in']
+    list_filter = ['resolution']
+    search_fields = ['event_id']
+    ordering = ['-taken_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
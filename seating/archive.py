@@ -0,0 +1,179 @@
+"""
+Archival of past events.
+
+``archive_events`` moves events with their sections, seats and attendees
+into the ``Archived*`` tables with one ``INSERT ... SELECT`` per table, and
+deletes them from the live tables in the same transaction, so the live
+tables and their indexes only hold current events. Holds, seat map assets
+and processing jobs of archived events are dropped.
+
+Archived rows keep their ids, which SQLite never hands out again
+(AUTOINCREMENT), so the read-only APIs look an id up in the live tables
+first and fall back to the archive (``find_event``, ``find_seat``, and the
+per-event layout, spatial, best-available, autocomplete and export
+builders). Event listings that reach past events merge a page of live and
+a page of archived events, and the archived events and attendees move to
+search indexes of their own. Only the live occupancy feed and the write
+APIs (holds, check-in) are limited to live events.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import caching, search
+from .models import (
+    ArchivedAttendee, ArchivedEvent, ArchivedSeat, ArchivedSection, Attendee, Event, ImageProcessingJob,
+    SeatHold, SeatMapAsset, Seat, Section,
+)
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def get_archive_after_days():
+    """Days after its date an event stays in the live tables"""
+    return getattr(settings, 'SEATING_ARCHIVE_AFTER_DAYS', 1)
+
+
+def archivable_event_ids(before=None):
+    """Events dated before ``before`` (default: today minus the grace days), oldest first"""
+    if before is None:
+        before = date.today() - timedelta(days=get_archive_after_days())
+    return list(Event.objects.filter(date__lt=before).order_by('date', 'id').values_list('id', flat=True))
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _scopes(event_ids):
+    """WHERE conditions selecting the events' rows of each table, as (sql, params)"""
+    events = ', '.join(['%s'] * len(event_ids))
+    sections = f'SELECT id FROM {_table(Section)} WHERE event_id IN ({events})'
+    seats = f'SELECT id FROM {_table(Seat)} WHERE section_id IN ({sections})'
+    return {
+        Event: (f'id IN ({events})', event_ids),
+        Section: (f'event_id IN ({events})', event_ids),
+        Seat: (f'section_id IN ({sections})', event_ids),
+        Attendee: (f'seat_id IN ({seats})', event_ids),
+        SeatHold: (f'seat_id IN ({seats})', event_ids),
+        SeatMapAsset: (f'event_id IN ({events})', event_ids),
+        ImageProcessingJob: (f'event_id IN ({events})', event_ids),
+    }
+
+
+# Live model -> archive model, parents first
+ARCHIVES = (
+    (Event, ArchivedEvent),
+    (Section, ArchivedSection),
+    (Seat, ArchivedSeat),
+    (Attendee, ArchivedAttendee),
+)
+# Live tables emptied after copying, children first
+DELETE_ORDER = (SeatHold, Attendee, Seat, Section, ImageProcessingJob, SeatMapAsset, Event)
+
+
+def _copy(cursor, live, archived, scope, archived_at):
+    live_columns = {field.column for field in live._meta.concrete_fields}
+    columns, values, params = [], [], []
+    for field in archived._meta.concrete_fields:
+        columns.append(connection.ops.quote_name(field.column))
+        if field.column in live_columns:
+            values.append(connection.ops.quote_name(field.column))
+        else:
+            # Only archived_at has no live counterpart
+            values.append('%s')
+            params.append(archived_at)
+    condition, condition_params = scope
+    cursor.execute(
+        f"INSERT INTO {_table(archived)} ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM {_table(live)} WHERE {condition}",
+        params + condition_params
+    )
+    return cursor.rowcount
+
+
+def archive_events(event_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Move events and everything under them to the archive; returns row counts per archive table"""
+    event_ids = list(event_ids)
+    moved = {archived._meta.model_name: 0 for _, archived in ARCHIVES}
+    for start in range(0, len(event_ids), batch_size):
+        batch = event_ids[start:start + batch_size]
+        scopes = _scopes(batch)
+        archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for live, archived in ARCHIVES:
+                    moved[archived._meta.model_name] += _copy(cursor, live, archived, scopes[live], archived_at)
+                for model in DELETE_ORDER:
+                    condition, params = scopes[model]
+                    cursor.execute(f'DELETE FROM {_table(model)} WHERE {condition}', params)
+            search.remove_events(batch)
+            search.rebuild_archive_event_index(batch)
+            search.rebuild_archive_index(batch)
+            for event_id in batch:
+                # Attendees are gone, so this only drops the event's index rows
+                search.rebuild_index(event_id=event_id)
+                caching.bump_event_version(event_id)
+    return moved
+
+
+def _live_and_archived_seats():
+    return [
+        model.objects.select_related('section__event', 'attendee').filter(section__event__is_active=True)
+        for model in (Seat, ArchivedSeat)
+    ]
+
+
+def find_event(event_id):
+    """An active event by id, live or archived, or None"""
+    for model in (Event, ArchivedEvent):
+        event = model.objects.filter(is_active=True, id=event_id).first()
+        if event is not None:
+            return event
+    return None
+
+
+async def afind_event(event_id):
+    for model in (Event, ArchivedEvent):
+        event = await model.objects.filter(is_active=True, id=event_id).afirst()
+        if event is not None:
+            return event
+    return None
+
+
+def find_seat(seat_id):
+    """A seat of an active event by id, live or archived, with section__event and attendee selected"""
+    for seats in _live_and_archived_seats():
+        seat = seats.filter(id=seat_id).first()
+        if seat is not None:
+            return seat
+    return None
+
+
+async def afind_seat(seat_id):
+    for seats in _live_and_archived_seats():
+        seat = await seats.filter(id=seat_id).afirst()
+        if seat is not None:
+            return seat
+    return None
+
+
+def find_seats(seat_ids):
+    """Seats of active events by id, live or archived, as ``in_bulk`` does"""
+    live, archived = _live_and_archived_seats()
+    seats = live.in_bulk(seat_ids)
+    missing = [seat_id for seat_id in seat_ids if seat_id not in seats]
+    if missing:
+        seats.update(archived.in_bulk(missing))
+    return seats
+
+
+def find_row(section_id, row, limit):
+    """Seats of one row left to right, from the archive if the section is no longer live"""
+    for seats in _live_and_archived_seats():
+        found = list(seats.filter(section_id=section_id, row=row).order_by('x_coordinate', 'id')[:limit])
+        if found:
+            return found
+    return []
@@ -0,0 +1,224 @@
+"""
+Async versions of the read-only JSON APIs, served when running under ASGI.
+
+They use the async ORM so a request waiting on the database does not hold a
+worker thread, and build their responses with the same helpers as the sync
+views in seating.views, so both paths return identical JSON.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import require_http_methods
+from datetime import date
+import logging
+
+from .models import Event, Attendee, ArchivedAttendee
+from . import archive, pagination, search
+from .caching import cache_per_event
+from .routers import replica_reads
+from .views import (
+    _attendee_search_result, _attendee_substring_query, _event_detail, _event_search_response,
+    _event_search_result, _event_statistics, _search_events_queries, _seat_info,
+)
+
+logger = logging.getLogger(__name__)
+
+# The trigram index is queried through a raw cursor
+can_search = sync_to_async(search.can_search)
+search_attendee_ids = sync_to_async(search.search_attendee_ids)
+
+
+async def _search_attendees(query, event_id, limit):
+    """Matching attendees of live events, then of archived ones until ``limit`` are found"""
+    attendees = []
+    for archived in (False, True):
+        # An event is either live or archived, so its live matches are all of them
+        if len(attendees) >= limit or (archived and event_id is not None and attendees):
+            break
+        remaining = limit - len(attendees)
+        if await can_search(query, archived):
+            # Ranked lookup through the trigram index, then one query for details
+            attendee_ids = await search_attendee_ids(query, event_id=event_id, limit=remaining, archived=archived)
+            attendees_by_id = await (ArchivedAttendee if archived else Attendee).objects.select_related(
+                'seat__section__event'
+            ).ain_bulk(attendee_ids)
+            attendees += [attendees_by_id[pk] for pk in attendee_ids if pk in attendees_by_id]
+        else:
+            attendees += [
+                attendee async for attendee in _attendee_substring_query(query, event_id, archived)[:remaining]
+            ]
+    return attendees
+
+
+@require_http_methods(["GET"])
+@replica_reads
+async def search_events(request):
+    """AJAX endpoint for searching events"""
+    try:
+        query = request.GET.get('q', '').strip()
+        date_filter = request.GET.get('date_filter', 'upcoming')  # Default to upcoming
+        limit = min(int(request.GET.get('limit', 12)), 50)  # Max 50 results
+        cursor = request.GET.get('cursor') or None
+
+        today = date.today()
+        events_queries = _search_events_queries(query, date_filter, today)
+        pages = [
+            [event async for event in pagination.page_queryset(events_query, cursor, limit)]
+            for events_query in events_queries
+        ]
+        events, next_cursor = pagination.split_page(pagination.merge_pages(pages, limit), limit)
+
+        response = _event_search_response(
+            [_event_search_result(event, today) for event in events], next_cursor, query, date_filter
+        )
+        if request.GET.get('with_total'):
+            counts = [await pagination.total_queryset(events_query).acount() for events_query in events_queries]
+            response.update(pagination.describe_total(sum(counts)))
+
+        return JsonResponse(response)
+
+    except ValueError as e:
+        logger.warning(f"Invalid parameter in search_events: {str(e)}")
+        return JsonResponse({
+            'results': [],
+            'count': 0,
+            'query': query if 'query' in locals() else '',
+            'date_filter': date_filter if 'date_filter' in locals() else 'upcoming',
+            'success': False,
+            'error': 'Invalid search parameters'
+        }, status=400)
+
+    except Exception as e:
+        logger.error(f"Error in search_events: {str(e)}")
+        return JsonResponse({
+            'results': [],
+            'count': 0,
+            'query': query if 'query' in locals() else '',
+            'date_filter': date_filter if 'date_filter' in locals() else 'upcoming',
+            'success': False,
+            'error': 'An error occurred while searching events'
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+@replica_reads
+async def search_attendee(request):
+    """AJAX endpoint for searching attendees"""
+    try:
+        query = request.GET.get('q', '').strip()
+        event_id = request.GET.get('event_id')
+        limit = min(int(request.GET.get('limit', 10)), 50)
+
+        logger.info(f"Search query: {query}, event_id: {event_id}")
+
+        if not query or len(query) < 2:
+            return JsonResponse({
+                'results': [],
+                'message': 'Please enter at least 2 characters',
+                'count': 0,
+                'success': True
+            })
+
+        if event_id:
+            try:
+                event_id = int(event_id)
+            except (ValueError, TypeError):
+                return JsonResponse({
+                    'results': [],
+                    'message': 'Invalid event ID',
+                    'count': 0,
+                    'success': False
+                }, status=400)
+        else:
+            event_id = None
+
+        attendees = await _search_attendees(query, event_id, limit)
+
+        results = [_attendee_search_result(attendee) for attendee in attendees]
+
+        return JsonResponse({
+            'results': results,
+            'count': len(results),
+            'query': query,
+            'success': True
+        })
+
+    except Exception as e:
+        logger.error(f"Error in search_attendee: {str(e)}")
+        return JsonResponse({
+            'results': [],
+            'count': 0,
+            'query': query if 'query' in locals() else '',
+            'success': False,
+            'error': 'An error occurred while searching attendees'
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+@replica_reads
+async def get_seat_info(request, seat_id):
+    """Get detailed information about a specific seat"""
+    try:
+        seat = await archive.afind_seat(seat_id)
+        if seat is None:
+            raise Http404('Seat not found')
+        return JsonResponse(_seat_info(seat))
+
+    except Exception as e:
+        logger.error(f"Error in get_seat_info: {str(e)}")
+        return JsonResponse({
+            'error': 'Seat not found or unavailable',
+            'success': False
+        }, status=404)
+
+
+@require_http_methods(["GET"])
+@replica_reads
+@cache_per_event
+async def event_statistics(request, event_id):
+    """Get detailed statistics for an event"""
+    try:
+        event = await archive.afind_event(event_id)
+        if event is None:
+            raise Http404('Event not found')
+        sections = [section async for section in event.sections.all()]
+
+        return JsonResponse(_event_statistics(event, sections))
+
+    except Exception as e:
+        logger.error(f"Error in event_statistics: {str(e)}")
+        return JsonResponse({
+            'error': 'Event not found or unavailable',
+            'success': False
+        }, status=404)
+
+
+class EventDetailAPI(View):
+    """Class-based view for event details API"""
+
+    @method_decorator(replica_reads)
+    @method_decorator(cache_per_event)
+    async def get(self, request, event_id):
+        try:
+            event = await archive.afind_event(event_id)
+            if event is None:
+                raise Event.DoesNotExist
+            return JsonResponse(_event_detail(event))
+
+        except Event.DoesNotExist:
+            return JsonResponse({
+                'error': 'Event not found',
+                'success': False
+            }, status=404)
+        except (ValueError, TypeError):
+            return JsonResponse({
+                'error': 'Invalid event ID',
+                'success': False
+            }, status=400)
+        except Exception as e:
+            logger.error(f"Error in EventDetailAPI: {str(e)}")
+            return JsonResponse({
+                'error': 'An error occurred',
+                'success': False
+            }, status=500)
@@ -0,0 +1,142 @@
+"""
+In-memory prefix autocomplete for attendees of a single event.
+
+Each event gets a sorted array of normalized name and ticket tokens paired
+with attendee ids, so prefix lookups are a binary search plus a short scan
+that stops as soon as the best matches are known. Indexes are built on first
+use and rebuilt lazily once the event's cache version (see seating.caching)
+moves on.
+"""
+import bisect
+import re
+import unicodedata
+
+from .caching import EventMemo
+from .models import ArchivedAttendee, Attendee
+
+# Upper bound on index entries scanned for a single prefix
+MAX_SCAN = 5000
+
+_TOKEN_SPLIT = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Casefold and strip accents so 'José' matches 'jose'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold()
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_SPLIT.split(normalize(text)) if token]
+
+
+class PrefixIndex:
+    """Sorted token array over one event's attendees"""
+
+    def __init__(self, entries):
+        self.results = {}
+        self.tokens = {}
+        pairs = []
+        for attendee_id, result in entries:
+            self.results[attendee_id] = result
+            tokens = set(tokenize(result['name'])) | set(tokenize(result['ticket_number']))
+            tokens.add(normalize(result['ticket_number']))
+            self.tokens[attendee_id] = tokens
+            pairs.extend((token, attendee_id) for token in tokens)
+        pairs.sort()
+        self.keys = [token for token, _ in pairs]
+        self.ids = [attendee_id for _, attendee_id in pairs]
+
+    def _prefix_range(self, prefix):
+        start = bisect.bisect_left(self.keys, prefix)
+        return start, bisect.bisect_left(self.keys, prefix + '\uffff', lo=start)
+
+    def search(self, query, limit=10):
+        """
+        Return ``(results, truncated)``: matches ranked by the token they
+        matched (exact words first), then by name. The index is sorted the
+        same way, so the scan stops once ``limit`` matches are certain; if it
+        hits MAX_SCAN first, ``truncated`` says the ranking may be incomplete.
+        """
+        words = tokenize(query)
+        if not words:
+            return [], False
+
+        # Drive the lookup from the most selective word, verify the rest per attendee
+        ranges = sorted(
+            ((self._prefix_range(word), word) for word in words),
+            key=lambda item: item[0][1] - item[0][0]
+        )
+        (start, end), _ = ranges[0]
+        others = [word for _, word in ranges[1:]]
+
+        matches = []
+        seen = set()
+        truncated = False
+        for position in range(start, end):
+            token = self.keys[position]
+            # Later tokens sort after every match found so far
+            if len(matches) >= limit and token != matches[-1][0]:
+                break
+            if position - start >= MAX_SCAN:
+                truncated = True
+                break
+            attendee_id = self.ids[position]
+            if attendee_id in seen:
+                continue
+            seen.add(attendee_id)
+            tokens = self.tokens[attendee_id]
+            if all(any(token.startswith(word) for token in tokens) for word in others):
+                result = self.results[attendee_id]
+                matches.append((token, result['name'], result))
+
+        matches.sort(key=lambda match: match[:2])
+        return [result for _, _, result in matches[:limit]], truncated
+
+    def __len__(self):
+        return len(self.results)
+
+
+def _index_entries(model, event_id):
+    rows = model.objects.filter(
+        seat__section__event_id=event_id,
+        seat__section__event__is_active=True
+    ).values_list(
+        'id', 'name', 'ticket_number',
+        'seat__row', 'seat__seat_number', 'seat__x_coordinate', 'seat__y_coordinate',
+        'seat__section__name', 'seat__section__event__name', 'seat__section__event__date'
+    ).iterator(chunk_size=2000)
+
+    entries = []
+    for (attendee_id, name, ticket_number, row, seat_number, x, y,
+         section_name, event_name, event_date) in rows:
+        entries.append((attendee_id, {
+            'id': attendee_id,
+            'name': name,
+            'ticket_number': ticket_number,
+            'seat_info': f"Row {row}, Seat {seat_number}",
+            'row': row,
+            'seat': seat_number,
+            'section': section_name,
+            'event': event_name,
+            'event_id': event_id,
+            'event_date': event_date.strftime('%Y-%m-%d'),
+            'seat_coordinates': {
+                'x': x,
+                'y': y
+            }
+        }))
+    return entries
+
+
+def build_index(event_id):
+    # From the archive once the event has no live attendees
+    return PrefixIndex(_index_entries(Attendee, event_id) or _index_entries(ArchivedAttendee, event_id))
+
+
+_indexes = EventMemo(build_index)
+
+
+def autocomplete(event_id, query, limit=10):
+    return _indexes.get(event_id).search(query, limit=limit)
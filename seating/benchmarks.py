@@ -0,0 +1,260 @@
+"""
+Endpoint benchmark scenarios and budgets.
+
+Every named route in seating.urls has a scenario describing how to call it
+against seeded data. ``run_benchmarks`` requests each scenario repeatedly,
+recording latency percentiles and the number of SQL queries, and compares
+them with the per-endpoint budgets below. It is used by the
+``benchmark_endpoints`` command (several data scales, latency checks) and by
+the query-budget tests in seating/tests.py.
+"""
+import json
+import secrets
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from . import reservations, snapshots, urls
+from .models import Attendee, Event, Seat
+
+# Maximum SQL queries per request with a cold cache
+QUERY_BUDGETS = {
+    'index': 4,  # A page and a bounded count of live events, then the same for archived ones
+    'seat_map': 1,
+    'search_events': 2,  # Pages of live and archived events (the scenario lists all dates)
+    'search_attendee': 2,
+    'search_attendee_legacy': 2,
+    'autocomplete_attendee': 0,
+    'event_detail_api': 1,
+    'event_statistics': 2,
+    'live_occupancy': 3,
+    'occupancy_history': 2,
+    'event_map_data': 1,
+    'event_layout': 3,
+    'seats_in_viewport': 1,
+    'nearest_seat': 1,
+    'best_available_seats': 3,
+    'export_attendees': 4,  # Session and staff user lookups, then the event and the manifest
+    'check_in': 2,
+    'check_in_batch': 4,  # BEGIN, lookup, conditional UPDATE, COMMIT
+    'hold_seats': 5,
+    # Per seat: the attendee INSERT in a savepoint, its search index row and counters
+    'confirm_hold': 13,
+    'release_hold': 3,  # The delete runs in its own transaction: BEGIN, DELETE, COMMIT
+    'seat_info': 1,
+    'seat_info_legacy': 1,
+    'seats_info': 1,
+}
+
+# Routes requested as a logged-in staff user
+STAFF_SCENARIOS = {'export_attendees'}
+
+# Routes benchmarked with a JSON POST instead of a GET
+POST_SCENARIOS = {'check_in', 'check_in_batch', 'hold_seats', 'confirm_hold', 'release_hold'}
+
+# Statuses other than 200 that a scenario answers with
+EXPECTED_STATUSES = {
+    'hold_seats': (201,),
+}
+
+# p95 latency ceilings in milliseconds, per endpoint, with a default
+LATENCY_BUDGETS_MS = {
+    'event_layout': 2000,
+    'seats_in_viewport': 1500,
+    'nearest_seat': 1500,
+    'best_available_seats': 1500,
+    'export_attendees': 3000,
+    'autocomplete_attendee': 1500,
+}
+DEFAULT_LATENCY_BUDGET_MS = 250
+
+
+def build_context():
+    """Pick the records scenarios run against from the seeded data"""
+    # Occupancy history reads snapshots only, so record the current occupancy first
+    snapshots.SnapshotRecorder().record()
+    event = Event.objects.filter(is_active=True).order_by('-total_seats', 'id').first()
+    attendee = Attendee.objects.filter(seat__section__event=event).select_related('seat').order_by('id').first()
+    seat = attendee.seat if attendee else Seat.objects.filter(section__event=event).order_by('id').first()
+    return {
+        'event': event,
+        'attendee': attendee,
+        'seat': seat,
+        'name_query': attendee.name.split()[0][:4] if attendee else 'Alex',
+        'seat_ids': list(
+            Seat.objects.filter(section__event=event).order_by('id').values_list('id', flat=True)[:100]
+        ),
+    }
+
+
+# Write scenarios are set up again before every request, so each one takes
+# the success path instead of repeating a check-in or hold already made
+CHECK_IN_BATCH_SIZE = 20
+
+
+def _unchecked_tickets(context, count):
+    return list(
+        Attendee.objects.filter(seat__section__event=context['event'], checked_in_at__isnull=True)
+        .order_by('id').values_list('ticket_number', flat=True)[:count]
+    )
+
+
+def _free_seat_id(context):
+    """A seat of the event that is neither booked nor held"""
+    return Seat.objects.filter(
+        section__event=context['event'], is_available=True, attendee__isnull=True, hold__isnull=True
+    ).order_by('id').values_list('id', flat=True).first()
+
+
+def _held_token(seat_id):
+    """Token of a fresh hold on a free seat, for the confirm and release scenarios"""
+    seat = Seat.objects.select_related('section').get(pk=seat_id)
+    return reservations.hold_seats(seat.section.event_id, [seat_id], holder='bench')['token']
+
+
+def _confirm_hold_scenario(context):
+    seat_id = _free_seat_id(context)
+    return (
+        reverse('seating:confirm_hold', args=[_held_token(seat_id)]),
+        {'attendees': [{'seat_id': seat_id, 'name': 'Bench Buyer', 'email': 'bench@example.com'}]}
+    )
+
+
+SCENARIOS = {
+    'index': lambda c: (reverse('seating:index'), {}),
+    'seat_map': lambda c: (reverse('seating:seat_map', args=[c['event'].id]), {}),
+    'search_events': lambda c: (reverse('seating:search_events'), {'q': c['event'].name[:4], 'date_filter': 'all'}),
+    'search_attendee': lambda c: (reverse('seating:search_attendee'), {'q': c['name_query'], 'event_id': c['event'].id}),
+    'search_attendee_legacy': lambda c: (reverse('seating:search_attendee_legacy'), {'q': c['name_query']}),
+    'autocomplete_attendee': lambda c: (reverse('seating:autocomplete_attendee'), {'q': c['name_query'], 'event_id': c['event'].id}),
+    'event_detail_api': lambda c: (reverse('seating:event_detail_api', args=[c['event'].id]), {}),
+    'event_statistics': lambda c: (reverse('seating:event_statistics', args=[c['event'].id]), {}),
+    'live_occupancy': lambda c: (reverse('seating:live_occupancy', args=[c['event'].id]), {'once': 1}),
+    'occupancy_history': lambda c: (
+        reverse('seating:occupancy_history', args=[c['event'].id]), {'section': 'all'}
+    ),
+    'event_map_data': lambda c: (reverse('seating:event_map_data', args=[c['event'].id]), {}),
+    'event_layout': lambda c: (reverse('seating:event_layout', args=[c['event'].id]), {}),
+    'seats_in_viewport': lambda c: (
+        reverse('seating:seats_in_viewport', args=[c['event'].id]), {'x0': 20, 'y0': 20, 'x1': 40, 'y1': 40}
+    ),
+    'nearest_seat': lambda c: (reverse('seating:nearest_seat', args=[c['event'].id]), {'x': 50, 'y': 50}),
+    'best_available_seats': lambda c: (reverse('seating:best_available_seats', args=[c['event'].id]), {'party': 4}),
+    'export_attendees': lambda c: (reverse('seating:export_attendees', args=[c['event'].id]), {'format': 'csv'}),
+    'check_in': lambda c: (
+        reverse('seating:check_in', args=[c['event'].id]),
+        {'ticket_number': _unchecked_tickets(c, 1)[0], 'gate': 'bench'}
+    ),
+    'check_in_batch': lambda c: (
+        reverse('seating:check_in_batch', args=[c['event'].id]),
+        {'scans': [{'ticket_number': ticket, 'gate': 'bench'} for ticket in _unchecked_tickets(c, CHECK_IN_BATCH_SIZE)]}
+    ),
+    'hold_seats': lambda c: (
+        reverse('seating:hold_seats', args=[c['event'].id]), {'seat_ids': [_free_seat_id(c)], 'holder': 'bench'}
+    ),
+    'confirm_hold': _confirm_hold_scenario,
+    'release_hold': lambda c: (reverse('seating:release_hold', args=[_held_token(_free_seat_id(c))]), {}),
+    'seat_info': lambda c: (reverse('seating:seat_info', args=[c['seat'].id]), {}),
+    'seat_info_legacy': lambda c: (reverse('seating:seat_info_legacy', args=[c['seat'].id]), {}),
+    'seats_info': lambda c: (
+        reverse('seating:seats_info'), {'ids': ','.join(str(seat_id) for seat_id in c['seat_ids'])}
+    ),
+}
+
+
+def route_names():
+    return [pattern.name for pattern in urls.urlpatterns if pattern.name]
+
+
+def missing_scenarios():
+    return [name for name in route_names() if name not in SCENARIOS]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    return statistics.quantiles(ordered, n=100, method='inclusive')[int(fraction * 100) - 1]
+
+
+def request(client, name, path, params):
+    if name in POST_SCENARIOS:
+        return client.post(path, json.dumps(params), content_type='application/json')
+    return client.get(path, params)
+
+
+def measure(client, name, context, iterations, cold=True):
+    """
+    Request a scenario repeatedly, setting it up again (untimed) before every
+    request; returns (path, durations in ms, max query count, status)
+    """
+    durations = []
+    max_queries = 0
+    status = None
+    for _ in range(iterations):
+        path, params = SCENARIOS[name](context)
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request(client, name, path, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            durations.append((time.perf_counter() - started) * 1000)
+        max_queries = max(max_queries, len(queries))
+        status = response.status_code
+    return path, durations, max_queries, status
+
+
+def _staff_client():
+    user, _ = get_user_model().objects.get_or_create(username='benchmark-staff', defaults={'is_staff': True})
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def run_benchmarks(iterations=10, cold=True, check_latency=True, names=None):
+    """Benchmark every scenario; returns (results, failures)"""
+    # The token-protected write APIs accept a one-off token for the run
+    token = secrets.token_urlsafe()
+    with override_settings(SEATING_API_TOKENS=[token]):
+        client = Client(headers={'Authorization': f'Bearer {token}'})
+        return _run_benchmarks(client, iterations, cold, check_latency, names)
+
+
+def _run_benchmarks(anonymous_client, iterations, cold, check_latency, names):
+    staff_client = _staff_client()
+    context = build_context()
+    results = {}
+    failures = []
+
+    for name in names or route_names():
+        client = staff_client if name in STAFF_SCENARIOS else anonymous_client
+        # Warm process-level structures (autocomplete, spatial grid) once
+        request(client, name, *SCENARIOS[name](context))
+        path, durations, queries, status = measure(client, name, context, iterations, cold=cold)
+        p50, p95 = percentile(durations, 0.5), percentile(durations, 0.95)
+        results[name] = {
+            'path': path,
+            'status': status,
+            'queries': queries,
+            'p50_ms': round(p50, 3),
+            'p95_ms': round(p95, 3),
+        }
+
+        if status not in EXPECTED_STATUSES.get(name, (200,)):
+            failures.append(f'{name}: HTTP {status}')
+        budget = QUERY_BUDGETS.get(name)
+        if budget is not None and queries > budget:
+            failures.append(f'{name}: {queries} queries (budget {budget})')
+        latency_budget = LATENCY_BUDGETS_MS.get(name, DEFAULT_LATENCY_BUDGET_MS)
+        if check_latency and p95 > latency_budget:
+            failures.append(f'{name}: p95 {p95:.1f}ms (budget {latency_budget}ms)')
+
+    return results, failures
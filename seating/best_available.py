@@ -0,0 +1,211 @@
+"""
+Best-available seat finder for parties.
+
+For each event a process-local ``SeatingChart`` keeps, per section and row,
+the seats in left-to-right order with running sums of their coordinates and
+the runs of adjacent free seats (a wider than usual gap between two seats is
+an aisle and ends a run). Charts are rebuilt when the event's cache version
+changes, i.e. when seats or attendees change. Holds change far more often
+than that and do not move the version, so a query fetches the live holds of
+the event in one statement and only re-splits the runs of rows that contain
+a held seat.
+
+A run of free seats is a candidate block for a party that fits in it. The
+window of the run whose centre is closest to the focal point (the stage by
+default) is found by bisection on the row's x coordinates. Rows are visited
+in order of their bounding box's distance to the focal point, and the search
+stops as soon as no remaining row can hold a closer block than the ones
+found, so a query usually looks at a handful of rows near the stage.
+"""
+import bisect
+import heapq
+import math
+import statistics
+
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import EventMemo
+from .models import ArchivedSeat, Seat, SeatHold
+
+# A gap between neighbouring seats this many times the row's usual spacing is an aisle
+AISLE_GAP_FACTOR = 1.5
+
+MAX_PARTY_SIZE = 20
+
+
+def get_stage_point():
+    """Default focal point, in floor plan coordinates (0-100)"""
+    return getattr(settings, 'SEATING_STAGE_POINT', (50.0, 0.0))
+
+
+class Row:
+    """The seats of one row, left to right"""
+
+    def __init__(self, section_id, section, label, seats):
+        self.section_id = section_id
+        self.section = section
+        self.label = label
+        self.ids = [seat[0] for seat in seats]
+        self.numbers = [seat[1] for seat in seats]
+        self.xs = [seat[2] for seat in seats]
+        self.ys = [seat[3] for seat in seats]
+        self.free = [seat[4] for seat in seats]
+        self.sum_x = [0.0]
+        self.sum_y = [0.0]
+        for x, y in zip(self.xs, self.ys):
+            self.sum_x.append(self.sum_x[-1] + x)
+            self.sum_y.append(self.sum_y[-1] + y)
+
+        self.box = (min(self.xs), min(self.ys), max(self.xs), max(self.ys))
+
+        gaps = [right - left for left, right in zip(self.xs, self.xs[1:])]
+        spacing = statistics.median(gaps) if gaps else 0
+        self.aisle_after = {
+            position for position, gap in enumerate(gaps) if gap > spacing * AISLE_GAP_FACTOR
+        }
+        self.runs = self.free_runs(self.free)
+
+    def free_runs(self, free):
+        """(start, end) position ranges of adjacent free seats"""
+        runs = []
+        start = None
+        for position, is_free in enumerate(free):
+            if is_free and start is None:
+                start = position
+            if start is not None and (not is_free or position in self.aisle_after):
+                end = position + 1 if is_free else position
+                runs.append((start, end))
+                start = None
+        if start is not None:
+            runs.append((start, len(free)))
+        return runs
+
+    def bound(self, focus):
+        """Distance from the focal point to the row's bounding box, which no block can beat"""
+        x0, y0, x1, y1 = self.box
+        return math.hypot(max(x0 - focus[0], 0, focus[0] - x1), max(y0 - focus[1], 0, focus[1] - y1))
+
+    def centre(self, start, size):
+        return (
+            (self.sum_x[start + size] - self.sum_x[start]) / size,
+            (self.sum_y[start + size] - self.sum_y[start]) / size,
+        )
+
+    def best_block(self, run, size, focus):
+        """(distance, start) of the window of a run closest to the focal point"""
+        run_start, run_end = run
+        # Window centres move right with the start, so look around the window centred on focus x
+        middle = bisect.bisect_left(self.xs, focus[0], run_start, run_end) - size // 2
+        best = None
+        for start in range(middle - 1, middle + 2):
+            start = min(max(start, run_start), run_end - size)
+            x, y = self.centre(start, size)
+            candidate = (math.hypot(x - focus[0], y - focus[1]), start)
+            if best is None or candidate < best:
+                best = candidate
+        return best
+
+    def block(self, start, size, distance):
+        x, y = self.centre(start, size)
+        return {
+            'section_id': self.section_id,
+            'section': self.section,
+            'row': self.label,
+            'seat_ids': self.ids[start:start + size],
+            'seats': self.numbers[start:start + size],
+            'center': {'x': round(x, 3), 'y': round(y, 3)},
+            'distance': round(distance, 3),
+        }
+
+
+class SeatingChart:
+    """Rows of every section of one event, with their free runs"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.positions = {
+            seat_id: (row, position)
+            for row in rows for position, seat_id in enumerate(row.ids)
+        }
+
+    def find(self, size, focus, section_ids=None, held=(), limit=5):
+        """The ``limit`` best blocks of ``size`` adjacent free seats, nearest the focal point first"""
+        held_rows = {}
+        for seat_id in held:
+            if seat_id in self.positions:
+                row, position = self.positions[seat_id]
+                held_rows.setdefault(row, set()).add(position)
+
+        # Visit rows nearest first and stop once no remaining row can beat the worst block kept
+        bounds = sorted(
+            (row.bound(focus), index) for index, row in enumerate(self.rows)
+            if section_ids is None or row.section_id in section_ids
+        )
+        best = []
+        for bound, index in bounds:
+            if len(best) >= limit and bound > -best[0][0]:
+                break
+            row = self.rows[index]
+            runs = row.runs
+            if row in held_rows:
+                taken = held_rows[row]
+                runs = row.free_runs([is_free and position not in taken for position, is_free in enumerate(row.free)])
+            for run in runs:
+                if run[1] - run[0] >= size:
+                    distance, start = row.best_block(run, size, focus)
+                    # Max-heap of the ``limit`` nearest blocks so far
+                    candidate = (-distance, -index, -start)
+                    if len(best) < limit:
+                        heapq.heappush(best, candidate)
+                    elif candidate > best[0]:
+                        heapq.heapreplace(best, candidate)
+
+        blocks = sorted((-distance, -index, -start) for distance, index, start in best)
+        return [self.rows[index].block(start, size, distance) for distance, index, start in blocks]
+
+
+def _chart_rows(model, event_id):
+    seats = model.objects.filter(section__event_id=event_id).order_by(
+        'section__name', 'section_id', 'row', 'x_coordinate', 'id'
+    ).values_list(
+        'id', 'section_id', 'section__name', 'row', 'seat_number',
+        'x_coordinate', 'y_coordinate', 'is_available', 'attendee__id'
+    )
+    rows = []
+    current = None
+    members = []
+    for seat_id, section_id, section, row, number, x, y, is_available, attendee_id in seats.iterator(chunk_size=5000):
+        if (section_id, row) != current:
+            if members:
+                rows.append(Row(*current_info, members))
+            current, current_info, members = (section_id, row), (section_id, section, row), []
+        members.append((seat_id, number, x, y, is_available and attendee_id is None))
+    if members:
+        rows.append(Row(*current_info, members))
+    return rows
+
+
+def build_chart(event_id):
+    # From the archive once the event has no live seats
+    return SeatingChart(_chart_rows(Seat, event_id) or _chart_rows(ArchivedSeat, event_id))
+
+
+_charts = EventMemo(build_chart)
+
+
+def get_chart(event_id):
+    return _charts.get(event_id)
+
+
+def held_seat_ids():
+    """Seats under a live hold, in any event"""
+    # Live holds are few; reading them through the expiry index is much
+    # cheaper than joining the event's seats, and the chart skips other events
+    return SeatHold.objects.filter(expires_at__gt=timezone.now()).values_list('seat_id', flat=True)
+
+
+def find_best_available(event_id, size, focus=None, section_ids=None, limit=5):
+    """Best blocks of ``size`` adjacent free, unheld seats of an event"""
+    focus = focus or get_stage_point()
+    return get_chart(event_id).find(size, focus, section_ids=section_ids, held=held_seat_ids(), limit=limit)
@@ -0,0 +1,41 @@
+"""
+Helpers for bulk writes that bypass model signals.
+
+``bulk_create``/``bulk_update``/``QuerySet.update`` do not fire the signals
+that keep the search index, occupancy counters and cache versions in sync,
+so bulk loaders call ``refresh_events`` once they are done.
+"""
+from django.db import connection, transaction
+
+from . import caching, occupancy, search
+from .models import (
+    ArchivedAttendee, ArchivedEvent, ArchivedSeat, ArchivedSection, Attendee, Event, ImageProcessingJob,
+    OccupancySnapshot, SeatHold, SeatMapAsset, Seat, Section,
+)
+
+
+def refresh_events(event_ids):
+    """Recompute derived data for events touched by a bulk write"""
+    for event_id in set(event_ids):
+        with transaction.atomic():
+            occupancy.rebuild_counters(event_id)
+            search.rebuild_index(event_id=event_id)
+            caching.bump_event_version(event_id)
+
+
+def clear_seating_data():
+    """Delete all events and their data, archived ones and occupancy history included, with plain SQL, skipping per-row signals"""
+    event_ids = list(Event.objects.values_list('id', flat=True))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for model in (
+                ImageProcessingJob, SeatMapAsset, SeatHold, Attendee, Seat, Section, Event,
+                ArchivedAttendee, ArchivedSeat, ArchivedSection, ArchivedEvent, OccupancySnapshot,
+            ):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        search.rebuild_index()
+        search.rebuild_event_index()
+        search.rebuild_archive_index()
+        search.rebuild_archive_event_index()
+        for event_id in event_ids:
+            caching.bump_event_version(event_id)
@@ -0,0 +1,223 @@
+"""
+Per-event cache versioning.
+
+Every event has a version counter in the cache that is bumped (after commit)
+whenever the event or one of its sections, seats or attendees changes. Cached
+responses and fragments embed the version in their key, so they can be kept
+for hours and still stop being served the moment the event changes. A
+response read from a replica may predate the version in its key, so it is
+only kept as long as replicas are allowed to lag.
+
+Versions live in their own cache alias (``seating_versions``), which must not
+cull. If a version key is lost anyway, it is seeded again with the current
+time in nanoseconds rather than 0, so keys built on an earlier version are
+never reused.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+
+from . import instrumentation, routers
+
+VERSION_KEY = 'seating:event:{event_id}:version'
+VERSION_CACHE_ALIAS = 'seating_versions'
+
+_version_listeners = []
+
+
+def get_cache_timeout():
+    return getattr(settings, 'SEATING_EVENT_CACHE_TIMEOUT', 60 * 60 * 6)
+
+
+def get_memo_size():
+    return getattr(settings, 'SEATING_EVENT_MEMO_SIZE', 32)
+
+
+def _response_timeout():
+    if routers.read_from_replica():
+        return min(get_cache_timeout(), routers.get_max_lag())
+    return get_cache_timeout()
+
+
+def version_cache():
+    """The cache holding version counters, the default cache if no alias is configured for them"""
+    return caches[VERSION_CACHE_ALIAS if VERSION_CACHE_ALIAS in settings.CACHES else 'default']
+
+
+def get_counter(key):
+    """A counter from the version cache, seeded with a never-used value if missing"""
+    versions = version_cache()
+    value = versions.get(key)
+    if value is None:
+        versions.add(key, time.time_ns(), None)
+        value = versions.get(key)
+    return value
+
+
+async def aget_counter(key):
+    versions = version_cache()
+    value = await versions.aget(key)
+    if value is None:
+        await versions.aadd(key, time.time_ns(), None)
+        value = await versions.aget(key)
+    return value
+
+
+def increment_counter(key):
+    versions = version_cache()
+    try:
+        versions.incr(key)
+    except ValueError:
+        if not versions.add(key, time.time_ns(), None):
+            versions.incr(key)
+
+
+def get_event_version(event_id):
+    return get_counter(VERSION_KEY.format(event_id=event_id))
+
+
+async def aget_event_version(event_id):
+    return await aget_counter(VERSION_KEY.format(event_id=event_id))
+
+
+def on_version_change(listener):
+    """Register a callable run with the event id after each version bump in this process"""
+    _version_listeners.append(listener)
+
+
+def _increment(event_id):
+    increment_counter(VERSION_KEY.format(event_id=event_id))
+    for listener in _version_listeners:
+        listener(event_id)
+
+
+def bump_event_version(event_id):
+    """Invalidate everything cached for the event once the current transaction commits"""
+    if event_id is not None:
+        transaction.on_commit(lambda: _increment(event_id))
+
+
+def _versioned_key(name, event_id, version, parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'seating:event:{event_id}:v{version}:{name}:{digest}'
+
+
+def event_cache_key(name, event_id, *parts):
+    return _versioned_key(name, event_id, get_event_version(event_id), parts)
+
+
+async def aevent_cache_key(name, event_id, *parts):
+    return _versioned_key(name, event_id, await aget_event_version(event_id), parts)
+
+
+def _visitor_specific(request, response):
+    """Whether the response may differ between visitors (session, user, CSRF token or a Vary header)"""
+    session = getattr(request, 'session', None)
+    return bool(
+        (session is not None and session.accessed)
+        or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        or response.has_header('Vary')
+        or 'private' in response.get('Cache-Control', '')
+    )
+
+
+def _cacheable(request, response):
+    return (
+        response.status_code == 200 and not response.streaming and not response.cookies
+        and not _visitor_specific(request, response)
+    )
+
+
+def cache_per_event(view_func):
+    """
+    Cache successful GET responses of a view taking an ``event_id`` argument,
+    keyed on the event's current version and the full request path. Works on
+    both sync and async views.
+
+    The key does not vary per visitor, so responses that read the session or
+    the user, render a CSRF token or carry a Vary header are never stored.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            event_id = kwargs.get('event_id')
+            if request.method not in ('GET', 'HEAD') or event_id is None:
+                return await view_func(request, *args, **kwargs)
+
+            key = await aevent_cache_key(f'view:{view_func.__name__}', event_id, request.get_full_path())
+            response = await cache.aget(key)
+            instrumentation.record_cache(response is not None)
+            if response is not None:
+                return response
+
+            response = await view_func(request, *args, **kwargs)
+            if _cacheable(request, response):
+                await cache.aset(key, response, _response_timeout())
+            return response
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        event_id = kwargs.get('event_id')
+        if request.method not in ('GET', 'HEAD') or event_id is None:
+            return view_func(request, *args, **kwargs)
+
+        key = event_cache_key(f'view:{view_func.__name__}', event_id, request.get_full_path())
+        response = cache.get(key)
+        instrumentation.record_cache(response is not None)
+        if response is not None:
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        if _cacheable(request, response):
+            cache.set(key, response, _response_timeout())
+        return response
+
+    return wrapper
+
+
+class EventMemo:
+    """
+    Process-local store of per-event structures (search indexes, spatial
+    grids, ...) that are rebuilt lazily once the event's version moves on.
+    Only the ``SEATING_EVENT_MEMO_SIZE`` most recently used events are kept.
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, event_id):
+        version = get_event_version(event_id)
+        entry = self._entries.get(event_id)
+        if entry is not None and entry[0] == version:
+            instrumentation.record_cache(True)
+            with self._lock:
+                if event_id in self._entries:
+                    self._entries.move_to_end(event_id)
+            return entry[1]
+        instrumentation.record_cache(False)
+
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is None or entry[0] != version:
+                # Built from the primary: the entry is kept until the version moves
+                with routers.primary_block():
+                    entry = (version, self.builder(event_id))
+                self._entries[event_id] = entry
+            self._entries.move_to_end(event_id)
+            while len(self._entries) > get_memo_size():
+                self._entries.popitem(last=False)
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,203 @@
+"""
+Door check-in.
+
+Tickets are looked up through the unique ticket_number index and checked in
+with an UPDATE conditional on ``checked_in_at`` still being empty, so two
+gates scanning the same ticket at once cannot both let it through. Offline
+scanners upload what they scanned through ``check_in_batch``, which applies
+a whole batch in one transaction with the same conditional UPDATE, so it
+never overwrites a check-in made meanwhile. A batch can be retried safely:
+re-sending a scan that was already applied reports it as a duplicate.
+
+Check-ins leave the event's cache version alone (no cached response shows
+them); they bump a separate per-event counter that the occupancy recorder
+watches instead.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching
+from .models import Attendee
+
+CHECKED_IN = 'checked_in'
+DUPLICATE = 'duplicate'
+CONFLICT = 'conflict'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+STATUSES = (CHECKED_IN, DUPLICATE, CONFLICT, NOT_FOUND, INVALID)
+
+MAX_BATCH_SIZE = 1000
+
+# SQLite limits the number of variables in one statement
+LOOKUP_CHUNK_SIZE = 500
+
+CHECK_INS_KEY = 'seating:event:{event_id}:check_ins'
+
+ATTENDEE_FIELDS = (
+    'id', 'name', 'ticket_number', 'checked_in_at', 'check_in_gate',
+    'seat__row', 'seat__seat_number', 'seat__section__name'
+)
+
+
+def note_check_ins(event_id):
+    """Bump the event's check-in counter once the current transaction commits"""
+    transaction.on_commit(lambda: caching.increment_counter(CHECK_INS_KEY.format(event_id=event_id)))
+
+
+def get_check_in_counters(event_ids):
+    """{event_id: counter}; kept with the event versions, so a lost counter never repeats a value"""
+    return {event_id: caching.get_counter(CHECK_INS_KEY.format(event_id=event_id)) for event_id in event_ids}
+
+
+def parse_scanned_at(value):
+    """Scanner timestamp as an aware datetime; missing means now, future is clamped to now"""
+    now = timezone.now()
+    if value in (None, ''):
+        return now
+    scanned_at = value if isinstance(value, datetime) else parse_datetime(str(value))
+    if scanned_at is None:
+        raise ValueError(f"Invalid scan time '{value}'")
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return min(scanned_at, now)
+
+
+def describe(attendee):
+    return {
+        'id': attendee['id'],
+        'name': attendee['name'],
+        'ticket_number': attendee['ticket_number'],
+        'section': attendee['seat__section__name'],
+        'row': attendee['seat__row'],
+        'seat': attendee['seat__seat_number'],
+        'checked_in_at': attendee['checked_in_at'].isoformat() if attendee['checked_in_at'] else None,
+        'gate': attendee['check_in_gate'],
+    }
+
+
+def _result(ticket_number, status, attendee=None, error=None):
+    result = {'ticket_number': ticket_number, 'status': status}
+    if attendee is not None:
+        result['attendee'] = describe(attendee)
+    if error:
+        result['error'] = error
+    return result
+
+
+def _repeat_status(attendee, scanned_at, gate):
+    # The same scan sent again (e.g. a retried upload) is harmless; any other
+    # scan of a ticket that is already in means the ticket was used twice
+    if attendee['checked_in_at'] == scanned_at and attendee['check_in_gate'] == gate:
+        return DUPLICATE
+    return CONFLICT
+
+
+def check_in(event_id, ticket_number, gate='', scanned_at=None):
+    """Check a single scanned ticket in"""
+    scanned_at = parse_scanned_at(scanned_at)
+    attendee = Attendee.objects.filter(
+        ticket_number=ticket_number, seat__section__event_id=event_id
+    ).values(*ATTENDEE_FIELDS).first()
+    if attendee is None:
+        return _result(ticket_number, NOT_FOUND)
+
+    if attendee['checked_in_at'] is None:
+        updated = Attendee.objects.filter(pk=attendee['id'], checked_in_at__isnull=True).update(
+            checked_in_at=scanned_at, check_in_gate=gate
+        )
+        if updated:
+            note_check_ins(event_id)
+            attendee.update(checked_in_at=scanned_at, check_in_gate=gate)
+            return _result(ticket_number, CHECKED_IN, attendee)
+        # Another gate won the race
+        attendee.update(Attendee.objects.filter(pk=attendee['id']).values('checked_in_at', 'check_in_gate').get())
+
+    return _result(ticket_number, _repeat_status(attendee, scanned_at, gate), attendee)
+
+
+def check_in_batch(event_id, scans):
+    """
+    Apply a batch of scans ({'ticket_number', 'scanned_at', 'gate'} dicts)
+    atomically. Scans are applied in scan-time order, so the earliest scan of
+    a ticket wins. Returns one result per scan, in the order given.
+    """
+    results = [None] * len(scans)
+    parsed = []
+    for index, scan in enumerate(scans):
+        ticket_number = str(scan.get('ticket_number') or '').strip() if isinstance(scan, dict) else ''
+        if not ticket_number:
+            results[index] = _result(ticket_number, INVALID, error='Missing ticket_number')
+            continue
+        try:
+            scanned_at = parse_scanned_at(scan.get('scanned_at'))
+        except ValueError as e:
+            results[index] = _result(ticket_number, INVALID, error=str(e))
+            continue
+        parsed.append((scanned_at, index, ticket_number, str(scan.get('gate') or '')[:50]))
+    parsed.sort(key=lambda scan: scan[:2])
+
+    tickets = list({ticket_number for _, _, ticket_number, _ in parsed})
+    with transaction.atomic():
+        attendees = {}
+        for start in range(0, len(tickets), LOOKUP_CHUNK_SIZE):
+            rows = Attendee.objects.filter(
+                seat__section__event_id=event_id,
+                ticket_number__in=tickets[start:start + LOOKUP_CHUNK_SIZE]
+            ).values(*ATTENDEE_FIELDS)
+            attendees.update((row['ticket_number'], row) for row in rows)
+
+        # The earliest scan of each ticket not checked in yet claims it
+        claims = {}
+        for scanned_at, index, ticket_number, gate in parsed:
+            attendee = attendees.get(ticket_number)
+            if attendee is not None and attendee['checked_in_at'] is None and attendee['id'] not in claims:
+                claims[attendee['id']] = (index, scanned_at, gate)
+        if _apply_claims(claims) < len(claims):
+            # Another scanner got to some of the tickets first: theirs stands
+            current = Attendee.objects.filter(pk__in=list(claims)).values_list('id', 'checked_in_at', 'check_in_gate')
+            lost = {pk: (checked_in_at, gate) for pk, checked_in_at, gate in current if claims[pk][1:] != (checked_in_at, gate)}
+            for attendee in attendees.values():
+                if attendee['id'] in lost:
+                    attendee['checked_in_at'], attendee['check_in_gate'] = lost[attendee['id']]
+                    del claims[attendee['id']]
+        if claims:
+            note_check_ins(event_id)
+
+    for scanned_at, index, ticket_number, gate in parsed:
+        attendee = attendees.get(ticket_number)
+        if attendee is None:
+            results[index] = _result(ticket_number, NOT_FOUND)
+        elif claims.get(attendee['id'], (None,))[0] == index:
+            attendee.update(checked_in_at=scanned_at, check_in_gate=gate)
+            results[index] = _result(ticket_number, CHECKED_IN, attendee)
+        else:
+            results[index] = _result(ticket_number, _repeat_status(attendee, scanned_at, gate), attendee)
+
+    return results
+
+
+def _apply_claims(claims):
+    """
+    Check the claimed attendees in with one conditional UPDATE per chunk, like
+    a single scan; returns how many were still not checked in
+    """
+    claimed = list(claims.items())
+    updated = 0
+    for start in range(0, len(claimed), LOOKUP_CHUNK_SIZE):
+        chunk = claimed[start:start + LOOKUP_CHUNK_SIZE]
+        updated += Attendee.objects.filter(pk__in=[pk for pk, _ in chunk], checked_in_at__isnull=True).update(
+            checked_in_at=Case(*[When(pk=pk, then=Value(scanned_at)) for pk, (_, scanned_at, _) in chunk]),
+            check_in_gate=Case(*[When(pk=pk, then=Value(gate)) for pk, (_, _, gate) in chunk]),
+        )
+    return updated
+
+
+def summarize(results):
+    summary = dict.fromkeys(STATUSES, 0)
+    for result in results:
+        summary[result['status']] += 1
+    return summary
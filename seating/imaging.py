@@ -0,0 +1,178 @@
+"""
+Tile pyramid and downscaled variants for event floor plans.
+
+Uploaded seat map images are cut into a deep-zoom style pyramid: level
+``max_level`` is the full-resolution image, every level below halves it, and
+level 0 is a single pixel. Each level is split into ``TILE_SIZE`` square
+tiles stored as ``<level>/<col>_<row>.<format>``. Whole-image variants at a few
+fixed widths are written alongside, in WebP and JPEG, for clients that just
+need a screen-sized picture.
+
+Output goes to a directory named after the image's content hash, so a new
+image never overwrites files the current asset still points to; the
+directories of earlier images are removed once the new asset is recorded.
+
+These functions only touch storage, never the database, so they can run in
+the worker processes of seating.pipeline.
+"""
+import hashlib
+import io
+import logging
+import math
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+VARIANT_WIDTHS = (480, 960, 1920)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+PROCESSED_ROOT = 'seat_maps/processed'
+
+
+def tile_format():
+    return 'webp' if features.check('webp') else 'jpeg'
+
+
+def _extension(image_format):
+    return 'jpg' if image_format == 'jpeg' else image_format
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'jpeg':
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _save(path, data):
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(data))
+
+
+def _load(image_name):
+    with default_storage.open(image_name, 'rb') as source:
+        data = source.read()
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+    return image, hashlib.sha1(data).hexdigest()[:12]
+
+
+def dominant_colors(image, count=5):
+    """Most common colors of a downsampled copy, as hex strings"""
+    sample = image.convert('RGB')
+    sample.thumbnail((96, 96))
+    palette_image = sample.quantize(colors=count, method=Image.Quantize.MEDIANCUT)
+    palette = palette_image.getpalette()
+    colors = sorted(palette_image.getcolors(), reverse=True)
+    return [
+        '#{:02x}{:02x}{:02x}'.format(*palette[index * 3:index * 3 + 3])
+        for _, index in colors
+    ]
+
+
+def build_pyramid(image, base_path, image_format=None):
+    """Write the tile pyramid of ``image`` under ``base_path`` and describe it"""
+    image_format = image_format or tile_format()
+    extension = _extension(image_format)
+    width, height = image.size
+    max_level = math.ceil(math.log2(max(width, height, 1)))
+
+    level_image = image
+    for level in range(max_level, -1, -1):
+        level_width, level_height = level_image.size
+        for col in range(math.ceil(level_width / TILE_SIZE)):
+            for row in range(math.ceil(level_height / TILE_SIZE)):
+                box = (
+                    col * TILE_SIZE, row * TILE_SIZE,
+                    min((col + 1) * TILE_SIZE, level_width), min((row + 1) * TILE_SIZE, level_height)
+                )
+                _save(f'{base_path}/{level}/{col}_{row}.{extension}', _encode(level_image.crop(box), image_format))
+        if level:
+            level_image = level_image.resize(
+                (max(1, math.ceil(level_width / 2)), max(1, math.ceil(level_height / 2))),
+                Image.Resampling.LANCZOS
+            )
+
+    return {
+        'width': width,
+        'height': height,
+        'tile_size': TILE_SIZE,
+        'overlap': 0,
+        'format': extension,
+        'max_level': max_level,
+        'url_template': default_storage.url(base_path) + '/{level}/{col}_{row}.' + extension,
+    }
+
+
+def build_variants(image, base_path):
+    """Write downscaled WebP/JPEG copies for each width narrower than the original"""
+    width, height = image.size
+    variants = []
+    for target_width in VARIANT_WIDTHS:
+        if target_width >= width:
+            break
+        target_height = max(1, round(height * target_width / width))
+        resized = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        variant = {'width': target_width, 'height': target_height}
+        for image_format in ('webp', 'jpeg'):
+            if image_format == 'webp' and not features.check('webp'):
+                continue
+            path = _save(f'{base_path}/{target_width}.{_extension(image_format)}', _encode(resized, image_format))
+            variant[image_format] = default_storage.url(path)
+        variants.append(variant)
+    return variants
+
+
+def _delete_tree(path):
+    directories, files = default_storage.listdir(path)
+    for name in directories:
+        _delete_tree(f'{path}/{name}')
+    for name in files:
+        default_storage.delete(f'{path}/{name}')
+    # File system storage leaves the emptied directory behind
+    try:
+        os.rmdir(default_storage.path(path))
+    except (NotImplementedError, OSError):
+        pass
+
+
+def remove_stale_outputs(event_id, keep=None):
+    """Delete the processed output of an event's images other than ``keep``; returns how many were removed"""
+    root = f'{PROCESSED_ROOT}/{event_id}'
+    if not default_storage.exists(root):
+        return 0
+    stale = [f'{root}/{name}' for name in default_storage.listdir(root)[0] if f'{root}/{name}' != keep]
+    for path in stale:
+        _delete_tree(path)
+    return len(stale)
+
+
+def process_seat_map(event_id, image_name):
+    """Generate tiles, variants and metadata for a stored seat map image"""
+    image, digest = _load(image_name)
+    base_path = f'{PROCESSED_ROOT}/{event_id}/{digest}'
+    result = {
+        'source': image_name,
+        'path': base_path,
+        'width': image.width,
+        'height': image.height,
+        'dominant_colors': dominant_colors(image),
+        'tiles': build_pyramid(image, f'{base_path}/tiles'),
+        'variants': build_variants(image, f'{base_path}/variants'),
+    }
+    logger.info(f"Processed seat map for event {event_id}: {result['tiles']['max_level'] + 1} levels")
+    return result
@@ -0,0 +1,146 @@
+"""
+Per-request SQL, cache and timing metrics.
+
+Every database connection gets an execute wrapper when it is opened, which
+times queries against the request being handled. The request is found
+through a context variable, so queries the async ORM runs in worker threads
+are counted too. ``RequestMetricsMiddleware`` starts the metrics of each
+request and also collects the cache hits/misses reported by seating.caching.
+The totals are sent back as ``Server-Timing`` headers (visible in browser
+dev tools) and logged as one JSON line per request on the
+``seating.requests`` logger. Requests slower than ``SEATING_SLOW_REQUEST_MS``
+are logged as warnings with their SQL.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('seating.requests')
+
+_current = ContextVar('seating_request_metrics', default=None)
+
+
+def get_slow_request_ms():
+    return getattr(settings, 'SEATING_SLOW_REQUEST_MS', 500)
+
+
+def server_timing_enabled():
+    return getattr(settings, 'SEATING_SERVER_TIMING', True)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_query(self, sql, duration):
+        self.db_time += duration
+        self.queries.append((sql, duration))
+
+
+def _time_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def record_cache(hit):
+    """Count a cache lookup against the request being handled, if any"""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def server_timing(metrics, total):
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.2f};desc="{len(metrics.queries)} queries"',
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+        f'app;dur={(total - metrics.db_time) * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    """Record queries, DB time and cache hits/misses for each request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    def finish(self, request, response, metrics, total):
+        if server_timing_enabled():
+            response['Server-Timing'] = server_timing(metrics, total)
+        self.log(request, response, metrics, total)
+        return response
+
+    def log(self, request, response, metrics, total):
+        total_ms = total * 1000
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'queries': len(metrics.queries),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+        }
+        if total_ms >= get_slow_request_ms():
+            entry['slow'] = True
+            entry['sql'] = [
+                {'ms': round(duration * 1000, 2), 'sql': sql}
+                for sql, duration in metrics.queries
+            ]
+            logger.warning(json.dumps(entry))
+        else:
+            logger.info(json.dumps(entry))
@@ -0,0 +1,157 @@
+"""
+Compact columnar encoding of an event's full seat layout.
+
+Seats are returned as parallel arrays instead of one object per seat. Row and
+seat labels are dictionary encoded (venues reuse the same few labels), and
+availability and occupancy are bitmaps with bit ``i`` (LSB first) describing
+the ``i``-th seat.
+
+The binary form is::
+
+    b'SEAT' | uint32 header length | header JSON (utf-8)
+    | int64 ids[count] | uintN section[count] | uintN row[count]
+    | uintN number[count] | float32 x[count] | float32 y[count]
+    | available bitmap | occupied bitmap
+
+The section, row and number indexes are uint16 unless a column has more than
+65536 labels; the header's ``index_sizes`` gives each column's width in bytes
+(2 or 4). All integers and floats are little-endian; each bitmap is
+``ceil(count / 8)`` bytes.
+"""
+import base64
+import json
+import struct
+import sys
+from array import array
+
+from .models import ArchivedSeat, ArchivedSection, Seat, Section
+
+BINARY_MAGIC = b'SEAT'
+BINARY_VERSION = 2
+INDEX_COLUMNS = ('section', 'row', 'number')
+
+
+def _bitmap(flags):
+    bits = bytearray((len(flags) + 7) // 8)
+    for position, flag in enumerate(flags):
+        if flag:
+            bits[position >> 3] |= 1 << (position & 7)
+    return bytes(bits)
+
+
+def _labels(values):
+    """Dictionary-encode values, returning (labels, indexes)"""
+    lookup = {}
+    indexes = []
+    for value in values:
+        index = lookup.get(value)
+        if index is None:
+            index = lookup[value] = len(lookup)
+        indexes.append(index)
+    return list(lookup), indexes
+
+
+def build_layout(event_id):
+    """Collect the layout of an event's seats without instantiating models"""
+    # From the archive once the event has no live sections
+    for section_model, seat_model in ((Section, Seat), (ArchivedSection, ArchivedSeat)):
+        sections = list(
+            section_model.objects.filter(event_id=event_id).order_by('name').values_list('id', 'name', 'color')
+        )
+        if sections:
+            break
+    section_index = {section_id: position for position, (section_id, _, _) in enumerate(sections)}
+
+    rows = seat_model.objects.filter(section__event_id=event_id).order_by(
+        'section__name', 'row', 'seat_number', 'id'
+    ).values_list(
+        'id', 'section_id', 'row', 'seat_number', 'x_coordinate', 'y_coordinate',
+        'is_available', 'attendee__id'
+    )
+
+    ids, section, row_values, number_values, xs, ys, available, occupied = [], [], [], [], [], [], [], []
+    for seat_id, section_id, row, seat_number, x, y, is_available, attendee_id in rows.iterator(chunk_size=5000):
+        ids.append(seat_id)
+        section.append(section_index[section_id])
+        row_values.append(row)
+        number_values.append(seat_number)
+        xs.append(x)
+        ys.append(y)
+        available.append(is_available)
+        occupied.append(attendee_id is not None)
+
+    row_labels, row_indexes = _labels(row_values)
+    number_labels, number_indexes = _labels(number_values)
+
+    return {
+        'event_id': event_id,
+        'count': len(ids),
+        'sections': {
+            'ids': [section_id for section_id, _, _ in sections],
+            'names': [name for _, name, _ in sections],
+            'colors': [color for _, _, color in sections],
+        },
+        'rows': row_labels,
+        'numbers': number_labels,
+        'seats': {
+            'ids': ids,
+            'section': section,
+            'row': row_indexes,
+            'number': number_indexes,
+            'x': xs,
+            'y': ys,
+        },
+        'available': _bitmap(available),
+        'occupied': _bitmap(occupied),
+    }
+
+
+def to_json(layout):
+    seats = layout['seats']
+    return {
+        **layout,
+        'seats': {
+            **seats,
+            'x': [round(x, 2) for x in seats['x']],
+            'y': [round(y, 2) for y in seats['y']],
+        },
+        'available': base64.b64encode(layout['available']).decode('ascii'),
+        'occupied': base64.b64encode(layout['occupied']).decode('ascii'),
+    }
+
+
+def _packed(typecode, values):
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _index_typecode(values):
+    return 'H' if max(values, default=0) <= 0xFFFF else 'I'
+
+
+def to_binary(layout):
+    seats = layout['seats']
+    typecodes = {column: _index_typecode(seats[column]) for column in INDEX_COLUMNS}
+    header = json.dumps({
+        'version': BINARY_VERSION,
+        'event_id': layout['event_id'],
+        'count': layout['count'],
+        'sections': layout['sections'],
+        'rows': layout['rows'],
+        'numbers': layout['numbers'],
+        'index_sizes': {column: array(typecode).itemsize for column, typecode in typecodes.items()},
+    }, separators=(',', ':')).encode('utf-8')
+
+    return b''.join([
+        BINARY_MAGIC,
+        struct.pack('<I', len(header)),
+        header,
+        _packed('q', seats['ids']),
+        *(_packed(typecodes[column], seats[column]) for column in INDEX_COLUMNS),
+        _packed('f', seats['x']),
+        _packed('f', seats['y']),
+        layout['available'],
+        layout['occupied'],
+    ])
@@ -0,0 +1,321 @@
+"""
+Live occupancy feeds for Server-Sent Events.
+
+All open streams of an event in a process share one ``EventFeed``. The feed
+watches the event's cache version, which seating.signals and the bulk
+helpers bump on every change in any process. When it moves, the feed reads
+the event's counters and seat states once, diffs them against what it had,
+encodes the changes once and hands the same message to every subscriber.
+Bumps made in this process wake the feed straight away; changes made by
+other processes are noticed on the next poll. Either way a change costs one
+computation per process, however many dashboards are listening.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.db import connections
+
+from . import caching
+from .models import COUNTER_FIELDS, Event, Seat, Section
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15
+RETRY_MS = 3000
+
+# Streams are closed after this long; EventSource reconnects on its own
+MAX_STREAM_SECONDS = 30 * 60
+
+# Above this many changed seats clients are told to reload the layout instead
+MAX_SEAT_CHANGES = 5000
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def occupancy(bookable, occupied):
+    return {
+        'total_seats': bookable,
+        'occupied_seats': occupied,
+        'available_seats': max(0, bookable - occupied),
+        'occupancy_rate': round(occupied / bookable * 100, 1) if bookable > 0 else 0,
+    }
+
+
+def read_counters(event_id):
+    """Event and per-section counters, or None if the event is gone"""
+    event = Event.objects.filter(pk=event_id).values(*COUNTER_FIELDS).first()
+    if event is None:
+        return None
+    sections = {
+        section['id']: section
+        for section in Section.objects.filter(event_id=event_id).values('id', 'name', *COUNTER_FIELDS)
+    }
+    return {'event': event, 'sections': sections}
+
+
+def read_seat_states(event_id):
+    """Map of seat id to (is_available, occupied)"""
+    return {
+        seat_id: (is_available, attendee_id is not None)
+        for seat_id, is_available, attendee_id in Seat.objects.filter(section__event_id=event_id).values_list(
+            'id', 'is_available', 'attendee'
+        ).iterator(chunk_size=5000)
+    }
+
+
+def snapshot_message(event_id, version, counters):
+    return {
+        'event_id': event_id,
+        'version': version,
+        'overall': occupancy(counters['event']['bookable_seats'], counters['event']['occupied_seats']),
+        'sections': [
+            {'id': section['id'], 'name': section['name'],
+             **occupancy(section['bookable_seats'], section['occupied_seats'])}
+            for section in counters['sections'].values()
+        ],
+    }
+
+
+def diff_counters(previous, current):
+    """Occupancy message for what changed between two counter reads, or None"""
+    changed_sections = []
+    for section_id, section in current['sections'].items():
+        before = previous['sections'].get(section_id)
+        if before is None or any(before[field] != section[field] for field in COUNTER_FIELDS):
+            changed_sections.append({
+                'id': section_id,
+                'name': section['name'],
+                'occupied_delta': section['occupied_seats'] - (before['occupied_seats'] if before else 0),
+                **occupancy(section['bookable_seats'], section['occupied_seats']),
+            })
+    removed_sections = [section_id for section_id in previous['sections'] if section_id not in current['sections']]
+    event_changed = any(previous['event'][field] != current['event'][field] for field in COUNTER_FIELDS)
+
+    if not (changed_sections or removed_sections or event_changed):
+        return None
+    return {
+        'overall': occupancy(current['event']['bookable_seats'], current['event']['occupied_seats']),
+        'occupied_delta': current['event']['occupied_seats'] - previous['event']['occupied_seats'],
+        'sections': changed_sections,
+        'removed_sections': removed_sections,
+    }
+
+
+def diff_seats(previous, current):
+    """Seat state changes between two reads, as a list of seat dicts"""
+    changes = [
+        {'id': seat_id, 'is_available': state[0], 'occupied': state[1]}
+        for seat_id, state in current.items()
+        if previous.get(seat_id) != state
+    ]
+    changes.extend({'id': seat_id, 'removed': True} for seat_id in previous.keys() - current.keys())
+    return changes
+
+
+def format_message(event_type, data):
+    """Encode one Server-Sent Event"""
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+class Subscription:
+    """Message queue of one stream consumed by a (WSGI) thread"""
+
+    def __init__(self):
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Message queue of one stream consumed by an ASGI event loop"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop has shut down; the stream is gone
+            pass
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventFeed:
+    """Watches one event and fans its changes out to the subscribed streams"""
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.subscribers = set()
+        self.pending = set()
+        self.stopped = False
+        self.wake = threading.Event()
+        self.version = None
+        self.counters = None
+        self.seats = None
+        self.thread = threading.Thread(target=self.run, name=f'live-feed-{event_id}', daemon=True)
+
+    def run(self):
+        try:
+            while not self.stopped:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Error in live feed for event {self.event_id}: {str(e)}")
+                self.wake.wait(POLL_INTERVAL)
+                self.wake.clear()
+        finally:
+            connections.close_all()
+
+    def broadcast(self, message, subscribers):
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def changes(self, version, counters, seats):
+        """Encoded messages describing the move from the current state to a new one"""
+        messages = []
+        occupancy_change = diff_counters(self.counters, counters)
+        if occupancy_change:
+            messages.append(format_message('occupancy', {'version': version, **occupancy_change}))
+        seat_changes = diff_seats(self.seats, seats)
+        if len(seat_changes) > MAX_SEAT_CHANGES:
+            messages.append(format_message('reload', {'version': version}))
+        elif seat_changes:
+            messages.append(format_message('seats', {'version': version, 'seats': seat_changes}))
+        return messages
+
+    def refresh(self):
+        messages = []
+        deleted = False
+        version = caching.get_event_version(self.event_id)
+        if version != self.version:
+            counters = read_counters(self.event_id)
+            if counters is None:
+                deleted = self.stopped = True
+            else:
+                seats = read_seat_states(self.event_id)
+                if self.version is not None:
+                    messages = self.changes(version, counters, seats)
+                self.version, self.counters, self.seats = version, counters, seats
+
+        with _feeds_lock:
+            pending, self.pending = self.pending, set()
+            subscribers = self.subscribers - pending
+
+        if deleted:
+            self.broadcast(format_message('deleted', {'event_id': self.event_id}), subscribers | pending)
+            return
+        for message in messages:
+            self.broadcast(message, subscribers)
+        if pending:
+            self.broadcast(
+                format_message('snapshot', snapshot_message(self.event_id, self.version, self.counters)), pending
+            )
+
+
+def subscribe(event_id, subscription):
+    with _feeds_lock:
+        feed = _feeds.get(event_id)
+        if feed is None or feed.stopped:
+            feed = _feeds[event_id] = EventFeed(event_id)
+            feed.thread.start()
+        feed.subscribers.add(subscription)
+        feed.pending.add(subscription)
+    feed.wake.set()
+
+
+def unsubscribe(event_id, subscription):
+    with _feeds_lock:
+        feed = _feeds.get(event_id)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscription)
+        feed.pending.discard(subscription)
+        if not feed.subscribers:
+            feed.stopped = True
+            del _feeds[event_id]
+    feed.wake.set()
+
+
+def notify(event_id):
+    """Wake the event's feed, if this process has one, after a local change"""
+    feed = _feeds.get(event_id)
+    if feed is not None:
+        feed.wake.set()
+
+
+caching.on_version_change(notify)
+
+
+def current_snapshot(event_id):
+    """Snapshot message for clients that do not keep a stream open"""
+    version = caching.get_event_version(event_id)
+    counters = read_counters(event_id)
+    return format_message('snapshot', snapshot_message(event_id, version, counters))
+
+
+def stream(event_id):
+    """Blocking SSE generator for WSGI servers"""
+    subscription = Subscription()
+    subscribe(event_id, subscription)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            message = subscription.get(HEARTBEAT_INTERVAL)
+            if subscription.overflowed:
+                # Too slow to keep up; reconnecting gets a fresh snapshot
+                yield format_message('reload', {})
+                break
+            yield message if message is not None else ': keepalive\n\n'
+    finally:
+        unsubscribe(event_id, subscription)
+
+
+async def astream(event_id):
+    """Non-blocking SSE generator for ASGI servers"""
+    subscription = AsyncSubscription()
+    subscribe(event_id, subscription)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            message = await subscription.get(HEARTBEAT_INTERVAL)
+            if subscription.overflowed:
+                yield format_message('reload', {})
+                break
+            yield message if message is not None else ': keepalive\n\n'
+    finally:
+        unsubscribe(event_id, subscription)
@@ -0,0 +1,100 @@
+"""
+Concurrent-connection load generator for comparing deployments.
+
+``run_load`` opens a number of keep-alive HTTP/1.1 connections to a running
+server at once and has each of them issue GET requests back to back for a
+fixed duration. The ``benchmark_concurrency`` command uses it to compare the
+sync WSGI deployment (gunicorn on spotme/wsgi.py) with the ASGI one (uvicorn
+on spotme/asgi.py with SEATING_ASYNC_VIEWS on, serving seating.async_views) on
+the same endpoints.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from .benchmarks import percentile
+
+NETWORK_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError)
+
+
+async def _read_response(reader):
+    """Read one response, returning (status, server closes the connection)"""
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    chunked = close = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            close = value == 'close'
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, close
+
+
+async def _client(host, port, paths, deadline, timeout, stats):
+    reader = writer = None
+    sent = 0
+    while time.perf_counter() < deadline:
+        path = paths[sent % len(paths)]
+        sent += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            started = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n'.encode())
+            await writer.drain()
+            status, close = await asyncio.wait_for(_read_response(reader), timeout)
+            stats['latencies'].append((time.perf_counter() - started) * 1000)
+            if status >= 500:
+                stats['errors'] += 1
+        except NETWORK_ERRORS:
+            stats['errors'] += 1
+            close = True
+        if close and writer is not None:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run(base_url, paths, connections, duration, timeout):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    stats = {'latencies': [], 'errors': 0}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(host, port, paths, deadline, timeout, stats) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies = stats['latencies']
+    return {
+        'connections': connections,
+        'requests': len(latencies),
+        'errors': stats['errors'],
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def run_load(base_url, paths, connections, duration=10, timeout=10):
+    """Hit ``paths`` on ``base_url`` from ``connections`` concurrent connections"""
+    return asyncio.run(_run(base_url, paths, connections, duration, timeout))
@@ -0,0 +1,39 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from seating import archive
+
+
+class Command(BaseCommand):
+    help = 'Move past events with their sections, seats and attendees from the live tables to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Archive events dated more than N days ago (default: SEATING_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument('--batch-size', type=int, default=archive.DEFAULT_BATCH_SIZE, help='Events moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the events that would be archived')
+        parser.add_argument('--interval', type=float, default=0, help='Keep archiving every N seconds (0 runs once)')
+
+    def handle(self, *args, **options):
+        while True:
+            days = options['days'] if options['days'] is not None else archive.get_archive_after_days()
+            event_ids = archive.archivable_event_ids(before=date.today() - timedelta(days=days))
+            if options['dry_run']:
+                self.stdout.write(f"Would archive {len(event_ids)} events: {', '.join(map(str, event_ids)) or '-'}")
+                return
+
+            if event_ids or not options['interval']:
+                started = time.perf_counter()
+                moved = archive.archive_events(event_ids, batch_size=options['batch_size'])
+                self.stdout.write(
+                    f"Archived {moved['archivedevent']} events, {moved['archivedsection']} sections, "
+                    f"{moved['archivedseat']} seats and {moved['archivedattendee']} attendees "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,61 @@
+import json
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from seating import benchmarks, loadtest
+
+# The JSON APIs that have async versions in seating.async_views
+ENDPOINTS = ('search_events', 'search_attendee', 'seat_info', 'event_statistics', 'event_detail_api')
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent-connection capacity of running WSGI and ASGI servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True, metavar='NAME=URL',
+            help='Server to load, e.g. wsgi=http://127.0.0.1:8000 (repeatable)'
+        )
+        parser.add_argument('--connections', default='10,50,200', help='Comma-separated concurrency levels')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per concurrency level')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+        parser.add_argument('--output', default='concurrency_output.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, _, url = target.partition('=')
+            if not url.startswith('http://'):
+                raise CommandError(f"Invalid target '{target}', expected NAME=http://host:port")
+            targets.append((name, url.rstrip('/')))
+        levels = [int(level) for level in options['connections'].split(',') if level.strip()]
+
+        # The servers must use this database so these records exist for them too
+        context = benchmarks.build_context()
+        if context['event'] is None:
+            raise CommandError('No active event to benchmark; seed data with populate_sample_data first')
+        paths = []
+        for name in ENDPOINTS:
+            path, params = benchmarks.SCENARIOS[name](context)
+            paths.append(f'{path}?{urlencode(params)}' if params else path)
+
+        report = {'timestamp': timezone.now().isoformat(), 'paths': paths, 'results': {}}
+        self.stdout.write(f"{'target':<10}{'conns':>7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, url in targets:
+            report['results'][name] = []
+            for connections in levels:
+                result = loadtest.run_load(
+                    url, paths, connections, duration=options['duration'], timeout=options['timeout']
+                )
+                report['results'][name].append(result)
+                self.stdout.write(
+                    f"{name:<10}{connections:>7}{result['requests_per_second']:>10}"
+                    f"{result['p50_ms'] or '-':>10}{result['p95_ms'] or '-':>10}{result['p99_ms'] or '-':>10}"
+                    f"{result['errors']:>8}"
+                )
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,165 @@
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from seating import checkin, reservations
+from seating.benchmarks import percentile
+from seating.models import Attendee, Event, Seat, Section
+
+# Database settings compared, as (OPTIONS, CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+PROFILES = {
+    'default': ({}, 0, False),
+    'production': (settings.SQLITE_PRODUCTION_OPTIONS, settings.DB_CONN_MAX_AGE, True),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare mixed read/write throughput of the default and production SQLite profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent request threads')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of requests that write')
+        parser.add_argument('--rows', type=int, default=40, help='Rows per section of the seeded event (50 seats each)')
+        parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles to run')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+        parser.add_argument('--output', default='database_output.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_database compares SQLite profiles only')
+        names = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in PROFILES]
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(unknown)}")
+
+        directory = tempfile.mkdtemp()
+        settings_dict = connection.settings_dict
+        saved = {key: settings_dict.get(key) for key in ('NAME', 'OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        settings_dict['TEST']['NAME'] = os.path.join(directory, 'seeded.sqlite3')
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        report = {'timestamp': timezone.now().isoformat(), 'workers': options['workers'],
+                  'write_ratio': options['write_ratio'], 'profiles': {}}
+        try:
+            call_command(
+                'populate_sample_data', events=1, sections=4, rows=options['rows'], seats_per_row=50,
+                seed=options['seed'], verbosity=0, stdout=io.StringIO()
+            )
+            connections.close_all()
+            for name in names:
+                # Every profile starts from an identical copy of the seeded file
+                path = os.path.join(directory, f'{name}.sqlite3')
+                shutil.copy(settings_dict['NAME'], path)
+                profile_options, max_age, health_checks = PROFILES[name]
+                settings_dict.update(NAME=path, OPTIONS=dict(profile_options), CONN_MAX_AGE=max_age,
+                                     CONN_HEALTH_CHECKS=health_checks)
+                report['profiles'][name] = self.run_profile(options)
+                connections.close_all()
+        finally:
+            settings_dict.update(NAME=os.path.join(directory, 'seeded.sqlite3'), OPTIONS={})
+            connection.creation.destroy_test_db(saved['NAME'], verbosity=0)
+            settings_dict.update(saved)
+            teardown_test_environment()
+            shutil.rmtree(directory, ignore_errors=True)
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.print_report(report)
+        self.stdout.write(f"Results written to {options['output']}")
+
+    def run_profile(self, options):
+        event_id = Event.objects.values_list('id', flat=True).get()
+        seat_ids = list(Seat.objects.values_list('id', flat=True))
+        free_seat_ids = list(Seat.objects.filter(attendee__isnull=True).values_list('id', flat=True))
+        tickets = iter(Attendee.objects.order_by('?').values_list('ticket_number', flat=True))
+        connections.close_all()
+
+        lock = threading.Lock()
+        latencies = {'read': [], 'write': []}
+        errors = Counter()
+        deadline = time.perf_counter() + options['duration']
+
+        def read(rng):
+            # A seat lookup and an event statistics page
+            Seat.objects.select_related('section__event', 'attendee').filter(pk=rng.choice(seat_ids)).first()
+            list(Section.objects.filter(event_id=event_id))
+
+        def write(rng):
+            # A door scan, or a checkout that holds a seat and gives it back
+            with lock:
+                ticket = next(tickets, None)
+            if ticket is not None and rng.random() < 0.5:
+                checkin.check_in(event_id, ticket, gate='bench')
+                return
+            result = reservations.hold_seats(event_id, [rng.choice(free_seat_ids)], holder='bench')
+            if result['status'] == reservations.HELD:
+                reservations.release_hold(result['token'])
+
+        def worker(index):
+            rng = random.Random(options['seed'] * 7919 + index)
+            while time.perf_counter() < deadline:
+                kind = 'write' if rng.random() < options['write_ratio'] else 'read'
+                # Django closes or keeps the connection at request boundaries like this
+                close_old_connections()
+                started = time.perf_counter()
+                try:
+                    (write if kind == 'write' else read)(rng)
+                    with lock:
+                        latencies[kind].append((time.perf_counter() - started) * 1000)
+                except DatabaseError as e:
+                    with lock:
+                        errors[f'{kind}: {type(e).__name__}: {e}'] += 1
+                finally:
+                    close_old_connections()
+            connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            list(executor.map(worker, range(options['workers'])))
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'requests': sum(len(values) for values in latencies.values()),
+            'errors': sum(errors.values()),
+            'error_types': dict(errors),
+        }
+        result['requests_per_second'] = round(result['requests'] / elapsed, 1)
+        for kind, values in latencies.items():
+            result[kind] = {
+                'requests': len(values),
+                **{
+                    f'p{point}_ms': round(percentile(values, point / 100), 2) if values else None
+                    for point in (50, 95, 99)
+                },
+            }
+        return result
+
+    def print_report(self, report):
+        self.stdout.write(f"{report['workers']} workers, {report['write_ratio']:.0%} writes")
+        self.stdout.write(
+            f"{'profile':<12}{'req/s':>9}{'read p50':>10}{'read p99':>10}{'write p50':>11}{'write p99':>11}{'errors':>8}"
+        )
+        for name, result in report['profiles'].items():
+            self.stdout.write(
+                f"{name:<12}{result['requests_per_second']:>9}"
+                f"{result['read']['p50_ms'] or '-':>10}{result['read']['p99_ms'] or '-':>10}"
+                f"{result['write']['p50_ms'] or '-':>11}{result['write']['p99_ms'] or '-':>11}{result['errors']:>8}"
+            )
+            for error, count in itertools.islice(result['error_types'].items(), 3):
+                self.stdout.write(f'  {count} x {error}')
@@ -0,0 +1,99 @@
+import io
+import json
+import platform
+import subprocess
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from seating import benchmarks
+
+# Seeded layout: 2 events x 5 sections, 50 seats per row
+EVENTS = 2
+SECTIONS = 5
+SEATS_PER_ROW = 50
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every seating route at several data scales against query and latency budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000', help='Comma-separated total seat counts to seed')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per endpoint and scale')
+        parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON results')
+        parser.add_argument('--warm', action='store_true', help='Keep the cache between requests instead of clearing it')
+        parser.add_argument('--no-latency-check', action='store_true', help='Only enforce query budgets')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the seeded data')
+
+    def handle(self, *args, **options):
+        missing = benchmarks.missing_scenarios()
+        if missing:
+            raise CommandError(f"No benchmark scenario for routes: {', '.join(missing)}")
+
+        scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        report = {
+            'timestamp': timezone.now().isoformat(),
+            'commit': self.git_commit(),
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'cache': 'warm' if options['warm'] else 'cold',
+            'scales': {},
+            'failures': [],
+        }
+
+        # Seed into a throwaway test database, never the configured one
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for scale in scales:
+                rows = max(1, scale // (EVENTS * SECTIONS * SEATS_PER_ROW))
+                self.seed(rows, options['seed'])
+
+                results, failures = benchmarks.run_benchmarks(
+                    iterations=options['iterations'],
+                    cold=not options['warm'],
+                    check_latency=not options['no_latency_check']
+                )
+                report['scales'][str(scale)] = results
+                report['failures'].extend(f'{scale} seats: {failure}' for failure in failures)
+                self.print_results(scale, results)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if report['failures']:
+            for failure in report['failures']:
+                self.stderr.write(failure)
+            raise CommandError(f"{len(report['failures'])} budget violations")
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget'))
+
+    def seed(self, rows, seed):
+        call_command(
+            'populate_sample_data',
+            events=EVENTS, sections=SECTIONS, rows=rows, seats_per_row=SEATS_PER_ROW,
+            seed=seed, verbosity=0, stdout=io.StringIO()
+        )
+
+    def print_results(self, scale, results):
+        self.stdout.write(f'\n{scale} seats')
+        self.stdout.write(f"{'endpoint':<26}{'status':>7}{'queries':>9}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<26}{result['status']:>7}{result['queries']:>9}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            )
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,164 @@
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from seating import occupancy, reservations
+from seating.benchmarks import percentile
+from seating.models import Attendee, Seat, SeatHold
+
+
+class Command(BaseCommand):
+    help = 'Race many concurrent claimers for the seats of one section and check no seat is sold twice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--claimers', type=int, default=200, help='Concurrent claimer threads')
+        parser.add_argument('--seats', type=int, default=100, help='Seats in the contested section')
+        parser.add_argument('--seats-per-claim', type=int, default=2, help='Adjacent seats each claim asks for')
+        parser.add_argument('--attempts', type=int, default=5, help='Claims a claimer makes before giving up')
+        parser.add_argument('--confirm', action='store_true', help='Book the seats of every successful hold')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for seat choices')
+        parser.add_argument('--output', default='holds_output.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        # Claimers use their own connections, so an in-memory test database
+        # will not do; seed into a throwaway file instead
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark_holds.sqlite3')
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command(
+                'populate_sample_data', events=1, sections=1, rows=1, seats_per_row=options['seats'],
+                occupancy=0, seed=options['seed'], verbosity=0, stdout=io.StringIO()
+            )
+            seats = list(Seat.objects.order_by('x_coordinate', 'id').values_list('id', 'section__event_id'))
+            report = self.race([seat_id for seat_id, _ in seats], seats[0][1], options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.print_report(report)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if report['violations'] or report['errors']:
+            for violation in report['violations']:
+                self.stderr.write(violation)
+            raise CommandError(f"{len(report['violations'])} invariant violations, {report['errors']} errors")
+        self.stdout.write(self.style.SUCCESS('No seat was held or booked twice'))
+
+    def race(self, seat_ids, event_id, options):
+        claimers = options['claimers']
+        size = options['seats_per_claim']
+        barrier = threading.Barrier(claimers)
+        latencies = []
+        outcomes = Counter()
+        errors = Counter()
+        winners = []
+        lock = threading.Lock()
+
+        def claimer(index):
+            rng = random.Random(options['seed'] * 100003 + index)
+            barrier.wait()
+            try:
+                for _ in range(options['attempts']):
+                    start = rng.randrange(len(seat_ids) - size + 1)
+                    wanted = seat_ids[start:start + size]
+                    started = time.perf_counter()
+                    try:
+                        result = reservations.hold_seats(event_id, wanted, holder=f'claimer-{index}')
+                        if result['status'] == reservations.HELD and options['confirm']:
+                            result = reservations.confirm_hold(result['token'], [
+                                {'seat_id': seat_id, 'name': f'Claimer {index}', 'email': f'claimer{index}@example.com'}
+                                for seat_id in wanted
+                            ])
+                    except Exception as e:
+                        with lock:
+                            errors[f'{type(e).__name__}: {e}'] += 1
+                        continue
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                        outcomes[result['status']] += 1
+                        if result['status'] in (reservations.HELD, reservations.CONFIRMED):
+                            winners.append((index, result.get('token'), wanted))
+                    if result['status'] in (reservations.HELD, reservations.CONFIRMED):
+                        return
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=claimers) as executor:
+            list(executor.map(claimer, range(claimers)))
+        elapsed = time.perf_counter() - started
+
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'claimers': claimers,
+            'seats': len(seat_ids),
+            'seats_per_claim': size,
+            'confirm': options['confirm'],
+            'claims': len(latencies),
+            'claims_per_second': round(len(latencies) / elapsed, 1),
+            'outcomes': dict(outcomes),
+            'seats_won': sum(len(wanted) for _, _, wanted in winners),
+            'p50_ms': round(percentile(latencies, 0.5), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+            'errors': sum(errors.values()),
+            'error_types': dict(errors),
+            'violations': self.find_violations(winners, options['confirm']),
+        }
+
+    def find_violations(self, winners, confirmed):
+        """Every seat went to at most one claimer, and the database agrees with the winners"""
+        violations = []
+        owners = {}
+        for index, _, wanted in winners:
+            for seat_id in wanted:
+                if seat_id in owners:
+                    violations.append(f'Seat {seat_id} won by claimers {owners[seat_id]} and {index}')
+                owners[seat_id] = index
+
+        if confirmed:
+            booked = dict(Attendee.objects.values_list('seat_id', 'name'))
+            expected = {seat_id: f'Claimer {index}' for seat_id, index in owners.items()}
+            if booked != expected:
+                violations.append(f'{len(booked)} seats booked, expected {len(expected)} for the winning claimers')
+            if SeatHold.objects.filter(seat__attendee__isnull=False).exists():
+                violations.append('Holds remain on booked seats')
+            violations.extend(
+                f'{model} {pk} counters {stored} != {actual}'
+                for model, pk, stored, actual in occupancy.find_mismatches()
+            )
+        else:
+            held = dict(SeatHold.objects.values_list('seat_id', 'token'))
+            expected = {seat_id: token for _, token, wanted in winners for seat_id in wanted}
+            if held != expected:
+                violations.append(f'{len(held)} seats held, expected {len(expected)} for the winning claimers')
+        return violations
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['claimers']} claimers, {report['seats']} seats, {report['seats_per_claim']} per claim "
+            f"({report['database']}{', confirming' if report['confirm'] else ''})"
+        )
+        self.stdout.write(f"claims: {report['claims']} ({report['claims_per_second']}/s), outcomes: {report['outcomes']}")
+        self.stdout.write(f"seats won: {report['seats_won']}/{report['seats']}")
+        self.stdout.write(f"latency ms: p50 {report['p50_ms']}, p95 {report['p95_ms']}, p99 {report['p99_ms']}")
+        self.stdout.write(f"errors: {report['errors']} {report['error_types'] or ''}")
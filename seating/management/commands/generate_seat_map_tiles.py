@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from seating import pipeline
+from seating.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Queue tile pyramid and variant generation for event seat map images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events', help='Only process this event id (repeatable)')
+        parser.add_argument('--force', action='store_true', help='Regenerate even if the processed assets are up to date')
+
+    def handle(self, *args, **options):
+        events = Event.objects.exclude(seat_map_image='').exclude(seat_map_image__isnull=True)
+        if options['events']:
+            events = events.filter(id__in=options['events'])
+
+        queued = 0
+        for event in events:
+            if not options['force'] and not pipeline.needs_processing(event):
+                continue
+            pipeline.enqueue(event.pk, event.seat_map_image.name)
+            queued += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} seat maps; run run_image_worker to process them'))
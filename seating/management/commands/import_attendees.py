@@ -0,0 +1,182 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from seating import bulk
+from seating.models import Attendee, Event, Seat
+
+REQUIRED_FIELDS = ('name', 'email', 'ticket_number', 'section', 'row', 'seat')
+UPDATE_FIELDS = ['name', 'email', 'phone', 'seat']
+
+
+class Command(BaseCommand):
+    help = 'Stream attendees from a CSV or NDJSON export into an event'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--event', type=int, required=True, help='Event the seats belong to')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Input format (default: from file extension, csv for stdin)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert and transaction')
+        parser.add_argument('--upsert', action='store_true', help='Update attendees whose ticket_number already exists')
+        parser.add_argument('--max-errors', type=int, default=20, help='Number of row errors to print')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event']} does not exist")
+
+        input_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        self.upsert = options['upsert']
+        self.max_errors = options['max_errors']
+        self.errors = 0
+        # Events whose counters, search index and caches need refreshing afterwards
+        self.touched_events = {event.pk}
+
+        # Resolve (section, row, seat) keys and current seat owners once
+        self.seats = {
+            (section, row, number): seat_id
+            for seat_id, section, row, number in Seat.objects.filter(section__event=event).values_list(
+                'id', 'section__name', 'row', 'seat_number'
+            ).iterator(chunk_size=5000)
+        }
+        self.seat_owners = dict(
+            Attendee.objects.filter(seat__section__event=event).values_list('seat_id', 'ticket_number').iterator(chunk_size=5000)
+        )
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        started = time.perf_counter()
+        totals = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0}
+        try:
+            batch = []
+            for line_number, record in self.read_records(stream, input_format):
+                batch.append((line_number, record))
+                if len(batch) >= options['batch_size']:
+                    self.flush(batch, totals)
+                    batch = []
+                    self.report(totals, started)
+            if batch:
+                self.flush(batch, totals)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        bulk.refresh_events(self.touched_events)
+        self.report(totals, started)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['rows']} rows: {totals['created']} created, "
+            f"{totals['updated']} updated, {totals['skipped']} skipped"
+        ))
+
+    def read_records(self, stream, input_format):
+        if input_format == 'csv':
+            for line_number, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_number, row
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                self.row_error(line_number, f'invalid JSON ({e})')
+
+    def row_error(self, line_number, message):
+        self.errors += 1
+        if self.errors <= self.max_errors:
+            self.stderr.write(f'Line {line_number}: {message}')
+
+    def clean(self, line_number, record):
+        values = {key: str(record.get(key) or '').strip() for key in REQUIRED_FIELDS + ('phone',)}
+        if not values['seat']:
+            values['seat'] = str(record.get('seat_number') or '').strip()
+        missing = [field for field in REQUIRED_FIELDS if not values[field]]
+        if missing:
+            self.row_error(line_number, f"missing {', '.join(missing)}")
+            return None
+        seat_id = self.seats.get((values['section'], values['row'], values['seat']))
+        if seat_id is None:
+            self.row_error(line_number, f"unknown seat {values['section']}/{values['row']}/{values['seat']}")
+            return None
+        values['seat_id'] = seat_id
+        return values
+
+    def flush(self, batch, totals):
+        totals['rows'] += len(batch)
+        rows = {}
+        for line_number, record in batch:
+            values = self.clean(line_number, record)
+            if values is None:
+                totals['skipped'] += 1
+                continue
+            if values['ticket_number'] in rows:
+                if not self.upsert:
+                    self.row_error(line_number, f"duplicate ticket {values['ticket_number']}")
+                    totals['skipped'] += 1
+                    continue
+                totals['skipped'] += 1  # Later rows of the same ticket win
+            rows[values['ticket_number']] = (line_number, values)
+
+        existing = {
+            attendee.ticket_number: attendee
+            for attendee in Attendee.objects.filter(ticket_number__in=list(rows)).annotate(
+                previous_event_id=F('seat__section__event_id')
+            )
+        }
+
+        to_create, to_update = [], []
+        claimed, vacated, moved_from = {}, [], set()
+        for ticket_number, (line_number, values) in rows.items():
+            attendee = existing.get(ticket_number)
+            if attendee is not None and not self.upsert:
+                self.row_error(line_number, f'ticket {ticket_number} already exists')
+                totals['skipped'] += 1
+                continue
+
+            owner = claimed.get(values['seat_id'], self.seat_owners.get(values['seat_id']))
+            if owner is not None and owner != ticket_number:
+                self.row_error(line_number, f'seat already taken by ticket {owner}')
+                totals['skipped'] += 1
+                continue
+            claimed[values['seat_id']] = ticket_number
+
+            if attendee is None:
+                to_create.append(Attendee(
+                    name=values['name'], email=values['email'], phone=values['phone'],
+                    seat_id=values['seat_id'], ticket_number=ticket_number
+                ))
+            else:
+                if attendee.seat_id != values['seat_id']:
+                    vacated.append(attendee.seat_id)
+                    moved_from.add(attendee.previous_event_id)
+                attendee.name = values['name']
+                attendee.email = values['email']
+                attendee.phone = values['phone']
+                attendee.seat_id = values['seat_id']
+                to_update.append(attendee)
+
+        try:
+            with transaction.atomic():
+                Attendee.objects.bulk_create(to_create, batch_size=500)
+                Attendee.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=500)
+        except IntegrityError as e:
+            self.stderr.write(f'Batch ending at line {batch[-1][0]} rolled back: {e}')
+            totals['skipped'] += len(to_create) + len(to_update)
+            return
+
+        for seat_id in vacated:
+            self.seat_owners.pop(seat_id, None)
+        self.seat_owners.update(claimed)
+        self.touched_events.update(moved_from)
+        totals['created'] += len(to_create)
+        totals['updated'] += len(to_update)
+
+    def report(self, totals, started):
+        elapsed = time.perf_counter() - started
+        rate = totals['rows'] / elapsed if elapsed > 0 else 0
+        self.stdout.write(f"{totals['rows']} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
@@ -1,106 +1,156 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta, time
 import random
+import time as clock
+
+from seating import bulk
 from seating.models import Event, Section, Seat, Attendee
 
+EVENT_TEMPLATES = [
+    ("Global Health Summit", "Expo Center Hall 1", time(9, 0), "A summit for global health leaders and innovators."),
+    ("AI & Robotics Expo", "Tech Arena", time(10, 30), "Showcasing the latest in artificial intelligence and robotics."),
+    ("Startup Pitch Night", "Downtown Conference Room", time(18, 0), "Pitch your startup to investors and network with founders."),
+    ("Music Festival 2025", "Open Air Grounds", time(15, 0), "A celebration of music, food, and culture."),
+]
+
+SECTION_TEMPLATES = [
+    ("Main Floor", "#3498db"),
+    ("VIP", "#f39c12"),
+    ("Balcony", "#2ecc71"),
+    ("Gallery", "#9b59b6"),
+]
+
+FIRST_NAMES = [
+    "Alex", "Taylor", "Jordan", "Morgan", "Casey", "Jamie", "Robin", "Drew",
+    "Samira", "Chris", "Patricia", "Ravi", "Linda", "Omar", "Emily", "Sofia",
+]
+
+LAST_NAMES = [
+    "Morgan", "Lee", "Kim", "Smith", "Patel", "Chen", "Singh", "Martinez",
+    "Ali", "Evans", "Gomez", "Kumar", "Tran", "Hassan", "Clark", "Rossi",
+]
+
+
+def row_label(index):
+    """0 -> A, 25 -> Z, 26 -> AA, ..."""
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
 class Command(BaseCommand):
-    help = 'Seed database with fresh, realistic event data'
+    help = 'Seed database with generated event data (small by default, production-sized on request)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=4, help='Number of events')
+        parser.add_argument('--sections', type=int, default=4, help='Sections per event')
+        parser.add_argument('--rows', type=int, default=3, help='Rows per section')
+        parser.add_argument('--seats-per-row', type=int, default=10, help='Seats per row')
+        parser.add_argument('--occupancy', type=float, default=0.7, help='Fraction of seats with an attendee (0-1)')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument('--append', action='store_true', help='Keep existing data instead of clearing it first')
 
     def handle(self, *args, **options):
+        if not 0 <= options['occupancy'] <= 1:
+            raise CommandError('--occupancy must be between 0 and 1')
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = clock.perf_counter()
+
         # Clear old data
-        Attendee.objects.all().delete()
-        Seat.objects.all().delete()
-        Section.objects.all().delete()
-        Event.objects.all().delete()
-
-        # Sample events
-        events_data = [
-            {
-                "name": "Global Health Summit",
-                "venue": "Expo Center Hall 1",
-                "date": timezone.now().date() + timedelta(days=10),
-                "time": time(9, 0),
-                "description": "A summit for global health leaders and innovators."
-            },
-            {
-                "name": "AI & Robotics Expo",
-                "venue": "Tech Arena",
-                "date": timezone.now().date() + timedelta(days=25),
-                "time": time(10, 30),
-                "description": "Showcasing the latest in artificial intelligence and robotics."
-            },
-            {
-                "name": "Startup Pitch Night",
-                "venue": "Downtown Conference Room",
-                "date": timezone.now().date() + timedelta(days=5),
-                "time": time(18, 0),
-                "description": "Pitch your startup to investors and network with founders."
-            },
-            {
-                "name": "Music Festival 2025",
-                "venue": "Open Air Grounds",
-                "date": timezone.now().date() + timedelta(days=40),
-                "time": time(15, 0),
-                "description": "A celebration of music, food, and culture."
-            },
-        ]
-
-        section_templates = [
-            ("Main Floor", "#3498db"),
-            ("VIP", "#f39c12"),
-            ("Balcony", "#2ecc71"),
-            ("Gallery", "#9b59b6"),
-        ]
-
-        attendee_names = [
-            "Alex Morgan", "Taylor Lee", "Jordan Kim", "Morgan Smith",
-            "Casey Patel", "Jamie Chen", "Robin Singh", "Drew Martinez",
-            "Samira Ali", "Chris Evans", "Patricia Gomez", "Ravi Kumar",
-            "Linda Tran", "Omar Hassan", "Emily Clark", "Sofia Rossi"
-        ]
-
-        for event_data in events_data:
-            event = Event.objects.create(
-                name=event_data["name"],
-                venue=event_data["venue"],
-                date=event_data["date"],
-                time=event_data["time"],
-                description=event_data["description"],
-                is_active=True
-            )
-
-            sections = []
-            for name, color in section_templates:
-                section = Section.objects.create(
-                    event=event,
+        if not options['append']:
+            bulk.clear_seating_data()
+
+        today = timezone.now().date()
+        event_ids = []
+        seat_total = attendee_total = 0
+
+        for event_index in range(options['events']):
+            name, venue, start_time, description = EVENT_TEMPLATES[event_index % len(EVENT_TEMPLATES)]
+            if event_index >= len(EVENT_TEMPLATES):
+                name = f"{name} #{event_index // len(EVENT_TEMPLATES) + 1}"
+
+            with transaction.atomic():
+                event = Event.objects.create(
                     name=name,
-                    color=color,
-                    capacity=30
+                    venue=venue,
+                    date=today + timedelta(days=rng.randint(1, 60)),
+                    time=start_time,
+                    description=description,
+                    is_active=True
+                )
+                event_ids.append(event.pk)
+
+                seats_per_section = options['rows'] * options['seats_per_row']
+                sections = Section.objects.bulk_create([
+                    Section(
+                        event=event,
+                        name=self.section_name(section_index),
+                        color=SECTION_TEMPLATES[section_index % len(SECTION_TEMPLATES)][1],
+                        capacity=seats_per_section
+                    )
+                    for section_index in range(options['sections'])
+                ])
+
+                ticket_sequence = 0
+                for section_index, section in enumerate(sections):
+                    seats = Seat.objects.bulk_create(
+                        self.generate_seats(section, section_index, options, rng),
+                        batch_size=batch_size
+                    )
+                    seat_total += len(seats)
+
+                    attendees = []
+                    for seat in seats:
+                        if rng.random() >= options['occupancy']:
+                            continue
+                        ticket_sequence += 1
+                        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                        attendees.append(Attendee(
+                            name=f"{first} {last} {rng.randint(100, 999)}",
+                            email=f"{first.lower()}.{last.lower()}.{event.pk}.{ticket_sequence}@eventmail.com",
+                            seat=seat,
+                            # Event pk + per-event sequence keeps tickets unique at any scale
+                            ticket_number=f"TCK-{event.pk}-{ticket_sequence:07d}"
+                        ))
+                    Attendee.objects.bulk_create(attendees, batch_size=batch_size)
+                    attendee_total += len(attendees)
+
+            self.stdout.write(f"{event.name}: {seat_total} seats, {attendee_total} attendees so far")
+
+        bulk.refresh_events(event_ids)
+
+        elapsed = clock.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(event_ids)} events, {seat_total} seats and {attendee_total} attendees in {elapsed:.1f}s'
+        ))
+
+    def section_name(self, index):
+        name = SECTION_TEMPLATES[index % len(SECTION_TEMPLATES)][0]
+        if index >= len(SECTION_TEMPLATES):
+            name = f"{name} {index // len(SECTION_TEMPLATES) + 1}"
+        return name
+
+    def generate_seats(self, section, section_index, options, rng):
+        """Lay sections out side by side, rows top to bottom within each band"""
+        band_width = 90 / options['sections']
+        band_start = 5 + section_index * band_width
+        for row in range(options['rows']):
+            y_coord = 10 + (row + 0.5) * 80 / options['rows']
+            for seat_num in range(options['seats_per_row']):
+                x_coord = band_start + (seat_num + 0.5) * band_width / options['seats_per_row']
+                yield Seat(
+                    section=section,
+                    seat_number=str(seat_num + 1),
+                    row=row_label(row),
+                    x_coordinate=min(100, max(0, x_coord + rng.uniform(-0.1, 0.1))),
+                    y_coordinate=min(100, max(0, y_coord + rng.uniform(-0.1, 0.1))),
+                    is_available=True
                 )
-                sections.append(section)
-
-            for section in sections:
-                for row in range(1, 4):  # 3 rows per section
-                    for seat_num in range(1, 11):  # 10 seats per row
-                        x_coord = 10 + section_templates.index((section.name, section.color)) * 20 + random.uniform(-3, 3)
-                        y_coord = 20 + row * 10 + random.uniform(-2, 2)
-                        seat = Seat.objects.create(
-                            section=section,
-                            seat_number=str(seat_num),
-                            row=chr(64 + row),  # A, B, C
-                            x_coordinate=x_coord,
-                            y_coordinate=y_coord,
-                            is_available=True
-                        )
-                        # Randomly assign attendees to some seats
-                        if random.random() < 0.7:  # 70% seats occupied
-                            name = random.choice(attendee_names)
-                            Attendee.objects.create(
-                                name=f"{name} {random.randint(100,999)}",
-                                email=f"{name.replace(' ', '').lower()}{random.randint(100,999)}@eventmail.com",
-                                seat=seat,
-                                ticket_number=f"TCK-{random.randint(10000,99999)}"
-                            )
-
-        self.stdout.write(self.style.SUCCESS('Seeded new events, sections, seats, and attendees'))
\ No newline at end of file
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from seating import occupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the stored seat/occupancy counters on events and sections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report counters that differ from the seat and attendee tables'
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = occupancy.find_mismatches()
+            for model_name, pk, stored, expected in mismatches:
+                self.stdout.write(f'{model_name} {pk}: stored {stored}, expected {expected}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} counter mismatches found')
+            self.stdout.write(self.style.SUCCESS('All occupancy counters are consistent'))
+            return
+
+        sections, events = occupancy.rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {events} events and {sections} sections'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from seating import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the attendee and event full-text search indexes, live and archived'
+
+    def handle(self, *args, **options):
+        if not all(
+            search.index_available(archived=archived) and search.event_index_available(archived=archived)
+            for archived in (False, True)
+        ):
+            raise CommandError('Search index tables are not available (SQLite with FTS5 required)')
+
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} attendees'))
+        count = search.rebuild_event_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} events'))
+        count = search.rebuild_archive_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} archived attendees'))
+        count = search.rebuild_archive_event_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} archived events'))
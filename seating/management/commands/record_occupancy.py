@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from seating import snapshots
+
+
+class Command(BaseCommand):
+    help = 'Record the occupancy of active events and sections that changed, and prune expired snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Keep recording every N seconds (0 runs once)')
+
+    def handle(self, *args, **options):
+        recorder = snapshots.SnapshotRecorder()
+        while True:
+            recorded = recorder.record()
+            pruned = snapshots.prune()
+            if recorded or pruned or not options['interval']:
+                self.stdout.write(f'Recorded {recorded} series, pruned {pruned} snapshots')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from seating import reservations
+
+
+class Command(BaseCommand):
+    help = 'Release expired seat holds in bulk, once or at a fixed interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Keep sweeping every N seconds (0 sweeps once)')
+        parser.add_argument('--batch-size', type=int, default=reservations.SWEEP_BATCH_SIZE, help='Holds deleted per statement')
+
+    def handle(self, *args, **options):
+        while True:
+            released = reservations.release_expired(batch_size=options['batch_size'])
+            if released or not options['interval']:
+                self.stdout.write(f'Released {released} expired holds')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
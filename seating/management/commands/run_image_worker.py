@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from seating import pipeline
+
+
+class Command(BaseCommand):
+    help = 'Process queued seat map images in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Size of the process pool')
+        parser.add_argument('--batch-size', type=int, default=4, help='Jobs claimed per batch')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        requeued = pipeline.requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs')
+
+        processed = 0
+        with pipeline.create_executor(options['processes']) as executor:
+            while True:
+                handled = pipeline.process_batch(executor, options['batch_size'])
+                processed += handled
+                if handled:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
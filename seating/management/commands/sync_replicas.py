@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into each read replica, once or at a fixed interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help='Keep syncing every N seconds (0 syncs once)')
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'SEATING_REPLICA_DATABASES', [])
+        if not replicas:
+            raise CommandError('No replicas configured; set SQLITE_REPLICAS to their file paths')
+        databases = [settings.DATABASES['default']] + [settings.DATABASES[alias] for alias in replicas]
+        if any(database['ENGINE'] != 'django.db.backends.sqlite3' for database in databases):
+            raise CommandError('sync_replicas copies SQLite files; other databases replicate server-side')
+
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                self.sync(settings.DATABASES['default']['NAME'], settings.DATABASES[alias]['NAME'])
+            if options['verbosity'] > 1 or not options['interval']:
+                self.stdout.write(
+                    f'Synced {len(replicas)} replicas in {(time.perf_counter() - started) * 1000:.0f}ms'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, source_path, replica_path):
+        # The backup API copies a consistent snapshot while the primary keeps
+        # taking writes, and swaps the replica's pages under its own lock, so
+        # readers see either the old copy or the new one
+        source = sqlite3.connect(source_path)
+        replica = sqlite3.connect(replica_path, timeout=30)
+        try:
+            source.backup(replica)
+        finally:
+            replica.close()
+            source.close()
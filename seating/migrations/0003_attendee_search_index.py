@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.create_index_table(cursor)
+    search.reset_index_state()
+    search.rebuild_index(using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.drop_index_table(cursor)
+    search.reset_index_state()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0002_alter_attendee_options_alter_event_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:28
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Event = apps.get_model('seating', 'Event')
+    Section = apps.get_model('seating', 'Section')
+    db_alias = schema_editor.connection.alias
+    fields = ['total_seats', 'bookable_seats', 'occupied_seats']
+
+    event_totals = {}
+    sections = Section.objects.using(db_alias).annotate(
+        seat_total=Count('seats', distinct=True),
+        seat_bookable=Count('seats', filter=Q(seats__is_available=True), distinct=True),
+        seat_occupied=Count('seats__attendee', distinct=True)
+    )
+    updated = []
+    for section in sections:
+        section.total_seats = section.seat_total
+        section.bookable_seats = section.seat_bookable
+        section.occupied_seats = section.seat_occupied
+        updated.append(section)
+        totals = event_totals.setdefault(section.event_id, [0, 0, 0])
+        totals[0] += section.seat_total
+        totals[1] += section.seat_bookable
+        totals[2] += section.seat_occupied
+    Section.objects.using(db_alias).bulk_update(updated, fields, batch_size=500)
+
+    events = []
+    for event_id, totals in event_totals.items():
+        events.append(Event(pk=event_id, **dict(zip(fields, totals))))
+    Event.objects.using(db_alias).bulk_update(events, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0003_attendee_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='bookable_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats marked available for booking'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='occupied_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats with an attendee'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='total_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='bookable_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats marked available for booking'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='occupied_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats with an attendee'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='total_seats',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0004_occupancy_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='seat_map_tiles',
+            field=models.JSONField(blank=True, editable=False, help_text='Tile pyramid and variants generated from the seat map image', null=True),
+        ),
+    ]
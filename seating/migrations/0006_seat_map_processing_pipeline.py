@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_seat_map_tiles(apps, schema_editor):
+    Event = apps.get_model('seating', 'Event')
+    SeatMapAsset = apps.get_model('seating', 'SeatMapAsset')
+    db_alias = schema_editor.connection.alias
+    for event in Event.objects.using(db_alias).exclude(seat_map_tiles__isnull=True):
+        manifest = event.seat_map_tiles
+        SeatMapAsset.objects.using(db_alias).create(
+            event=event,
+            source=manifest['source'],
+            width=manifest['tiles']['width'],
+            height=manifest['tiles']['height'],
+            variants=manifest['variants'],
+            tiles=manifest['tiles'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0005_event_seat_map_tiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatMapAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Name of the processed seat_map_image file', max_length=255)),
+                ('width', models.PositiveIntegerField(help_text='Intrinsic image width in pixels')),
+                ('height', models.PositiveIntegerField(help_text='Intrinsic image height in pixels')),
+                ('dominant_colors', models.JSONField(default=list, help_text='Most common colors as hex strings')),
+                ('variants', models.JSONField(default=list, help_text='Downscaled WebP/JPEG copies')),
+                ('tiles', models.JSONField(default=dict, help_text='Tile pyramid scheme')),
+                ('processed_at', models.DateTimeField(auto_now=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='seat_map_asset', to='seating.event')),
+            ],
+        ),
+        migrations.RunPython(copy_seat_map_tiles, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='event',
+            name='seat_map_tiles',
+        ),
+        migrations.CreateModel(
+            name='ImageProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='seating.event')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='seating_ima_status_76d611_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0006_seat_map_processing_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendee',
+            name='check_in_gate',
+            field=models.CharField(blank=True, help_text='Gate or scanner that checked the ticket in', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='attendee',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, help_text='When the ticket was first scanned at the door', null=True),
+        ),
+    ]
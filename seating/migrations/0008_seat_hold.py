@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0007_attendee_check_in'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, help_text='Shared by the seats of one checkout', max_length=64)),
+                ('holder', models.CharField(blank=True, help_text='Who is checking out, e.g. a session or user id', max_length=200)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('seat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hold', to='seating.seat')),
+            ],
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0008_seat_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSeat',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('seat_number', models.CharField(max_length=20)),
+                ('row', models.CharField(max_length=10)),
+                ('x_coordinate', models.FloatField()),
+                ('y_coordinate', models.FloatField()),
+                ('is_available', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['row', 'seat_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('total_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats')),
+                ('bookable_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats marked available for booking')),
+                ('occupied_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats with an attendee')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('venue', models.CharField(max_length=200)),
+                ('date', models.DateField()),
+                ('time', models.TimeField(blank=True, null=True)),
+                ('seat_map_image', models.CharField(blank=True, help_text='Seat map image file name', max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-date', '-time'],
+                'indexes': [models.Index(fields=['date'], name='seating_arc_date_30c923_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendee',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('ticket_number', models.CharField(db_index=True, max_length=50)),
+                ('checked_in_at', models.DateTimeField(blank=True, null=True)),
+                ('check_in_gate', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('seat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendee', to='seating.archivedseat')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSection',
+            fields=[
+                ('total_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats')),
+                ('bookable_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats marked available for booking')),
+                ('occupied_seats', models.PositiveIntegerField(default=0, editable=False, help_text='Number of seats with an attendee')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('color', models.CharField(max_length=7)),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='seating.archivedevent')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedseat',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seats', to='seating.archivedsection'),
+        ),
+    ]
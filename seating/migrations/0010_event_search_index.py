@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_event_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.create_event_index_table(cursor)
+    search.reset_index_state()
+    search.rebuild_event_index(using=schema_editor.connection.alias)
+
+
+def drop_event_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.drop_event_index_table(cursor)
+    search.reset_index_state()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0009_event_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchEntry',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='seating.event')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('venue', models.TextField()),
+                ('document', models.TextField(db_column='seating_event_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'seating_event_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_event_search_index, drop_event_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0010_event_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.BigIntegerField()),
+                ('section_id', models.BigIntegerField(default=0, help_text='0 for the whole event')),
+                ('resolution', models.PositiveIntegerField(help_text='Bucket length in seconds')),
+                ('taken_at', models.DateTimeField(help_text='Start of the bucket; values are the last recorded in it')),
+                ('bookable_seats', models.PositiveIntegerField()),
+                ('occupied_seats', models.PositiveIntegerField()),
+                ('checked_in', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolution', 'taken_at'], name='occupancy_snapshot_retention')],
+                'constraints': [models.UniqueConstraint(fields=('event_id', 'resolution', 'section_id', 'taken_at'), name='unique_occupancy_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_archive_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.create_index_table(cursor, search.ARCHIVE_FTS_TABLE)
+        search.create_event_index_table(cursor, search.ARCHIVE_EVENT_FTS_TABLE)
+    search.reset_index_state()
+    search.rebuild_archive_index(using=schema_editor.connection.alias)
+    search.rebuild_archive_event_index(using=schema_editor.connection.alias)
+
+
+def drop_archive_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from seating import search
+    with schema_editor.connection.cursor() as cursor:
+        search.drop_index_table(cursor, search.ARCHIVE_FTS_TABLE)
+        search.drop_event_index_table(cursor, search.ARCHIVE_EVENT_FTS_TABLE)
+    search.reset_index_state()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seating', '0011_occupancy_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEventSearchEntry',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='seating.archivedevent')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('venue', models.TextField()),
+                ('document', models.TextField(db_column='seating_archivedevent_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'seating_archivedevent_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_archive_search_indexes, drop_archive_search_indexes),
+    ]
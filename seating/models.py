@@ -1,7 +1,54 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
-class Event(models.Model):
+# Denormalized occupancy counters, maintained by signals in seating.signals
+COUNTER_FIELDS = ('total_seats', 'bookable_seats', 'occupied_seats')
+
+
+class SavedWithCounters(models.Model):
+    """
+    Models whose save signals adjust the occupancy counters: the save and the
+    counter updates commit (or roll back) together
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class OccupancyCounters(SavedWithCounters):
+    """Stored seat counters shared by Event and Section"""
+    total_seats = models.PositiveIntegerField(default=0, editable=False, help_text="Number of seats")
+    bookable_seats = models.PositiveIntegerField(default=0, editable=False, help_text="Number of seats marked available for booking")
+    occupied_seats = models.PositiveIntegerField(default=0, editable=False, help_text="Number of seats with an attendee")
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Never write counters back from a possibly stale instance; they are
+        # only changed through atomic F() updates.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def available_seats(self):
+        return max(0, self.total_seats - self.occupied_seats)
+
+    @property
+    def occupancy_rate(self):
+        return round(self.occupied_seats / self.total_seats * 100, 1) if self.total_seats > 0 else 0
+
+
+class Event(OccupancyCounters):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True, help_text="Event description")
     venue = models.CharField(max_length=200)
@@ -28,7 +75,26 @@ class Event(models.Model):
         from datetime import date
         return self.date < date.today()
 
-class Section(models.Model):
+class EventSearchEntry(models.Model):
+    """Row of the FTS5 event search table maintained by seating.search; joined to Event for ranked search"""
+    event = models.OneToOneField(
+        Event, primary_key=True, db_column='rowid', db_constraint=False, on_delete=models.DO_NOTHING,
+        related_name='search_entry'
+    )
+    name = models.TextField()
+    description = models.TextField()
+    venue = models.TextField()
+    # FTS5 hidden columns: the one named after the table is the MATCH target,
+    # rank is the row's weighted bm25 score for the current match
+    document = models.TextField(db_column='seating_event_search')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'seating_event_search'
+
+
+class Section(OccupancyCounters):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='sections')
     name = models.CharField(max_length=100)  # e.g., "Section A", "VIP", "Balcony"
     color = models.CharField(max_length=7, default="#3498db", help_text="Hex color for map")
@@ -41,7 +107,7 @@ class Section(models.Model):
     def __str__(self):
         return f"{self.event.name} - {self.name}"
 
-class Seat(models.Model):
+class Seat(SavedWithCounters):
     section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='seats')
     seat_number = models.CharField(max_length=20)
     row = models.CharField(max_length=10)
@@ -70,12 +136,14 @@ class Seat(models.Model):
         """Check if seat is occupied by an attendee"""
         return hasattr(self, 'attendee')
 
-class Attendee(models.Model):
+class Attendee(SavedWithCounters):
     name = models.CharField(max_length=200)
     email = models.EmailField()
     phone = models.CharField(max_length=20, blank=True)
     seat = models.OneToOneField(Seat, on_delete=models.CASCADE, related_name='attendee')
     ticket_number = models.CharField(max_length=50, unique=True)
+    checked_in_at = models.DateTimeField(null=True, blank=True, help_text="When the ticket was first scanned at the door")
+    check_in_gate = models.CharField(max_length=50, blank=True, help_text="Gate or scanner that checked the ticket in")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -87,4 +155,188 @@ class Attendee(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.name} - {self.seat}"
\ No newline at end of file
+        return f"{self.name} - {self.seat}"
+
+
+class SeatHold(models.Model):
+    """A seat kept for one checkout until it is confirmed, released or expires"""
+    seat = models.OneToOneField(Seat, on_delete=models.CASCADE, related_name='hold')
+    token = models.CharField(max_length=64, db_index=True, help_text="Shared by the seats of one checkout")
+    holder = models.CharField(max_length=200, blank=True, help_text="Who is checking out, e.g. a session or user id")
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.seat} held until {self.expires_at:%H:%M:%S}"
+
+
+class SeatMapAsset(models.Model):
+    """Processed derivatives and metadata of an event's seat map image"""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='seat_map_asset')
+    source = models.CharField(max_length=255, help_text="Name of the processed seat_map_image file")
+    width = models.PositiveIntegerField(help_text="Intrinsic image width in pixels")
+    height = models.PositiveIntegerField(help_text="Intrinsic image height in pixels")
+    dominant_colors = models.JSONField(default=list, help_text="Most common colors as hex strings")
+    variants = models.JSONField(default=list, help_text="Downscaled WebP/JPEG copies")
+    tiles = models.JSONField(default=dict, help_text="Tile pyramid scheme")
+    processed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.event.name} - {self.width}x{self.height}"
+
+
+class ImageProcessingJob(models.Model):
+    """Queued seat map processing work, consumed by the run_image_worker command"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='image_jobs')
+    image_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event.name} - {self.image_name} ({self.status})"
+
+
+# Archive of past events, filled by seating.archive. Rows keep their live ids
+# and the live field and relation names, so the read-only APIs can serve them
+# with the same code.
+
+class ArchivedEvent(OccupancyCounters):
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    venue = models.CharField(max_length=200)
+    date = models.DateField()
+    time = models.TimeField(blank=True, null=True)
+    seat_map_image = models.CharField(max_length=100, blank=True, null=True, help_text="Seat map image file name")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def is_past(self):
+        return True
+
+
+class ArchivedSection(OccupancyCounters):
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(ArchivedEvent, on_delete=models.CASCADE, related_name='sections')
+    name = models.CharField(max_length=100)
+    color = models.CharField(max_length=7)
+    capacity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.event.name} - {self.name}"
+
+
+class ArchivedSeat(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    section = models.ForeignKey(ArchivedSection, on_delete=models.CASCADE, related_name='seats')
+    seat_number = models.CharField(max_length=20)
+    row = models.CharField(max_length=10)
+    x_coordinate = models.FloatField()
+    y_coordinate = models.FloatField()
+    is_available = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['row', 'seat_number']
+
+    def __str__(self):
+        return f"{self.section.name} - Row {self.row}, Seat {self.seat_number}"
+
+
+class ArchivedAttendee(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20, blank=True)
+    seat = models.OneToOneField(ArchivedSeat, on_delete=models.CASCADE, related_name='attendee')
+    ticket_number = models.CharField(max_length=50, db_index=True)
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    check_in_gate = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} - {self.seat}"
+
+
+class ArchivedEventSearchEntry(models.Model):
+    """Row of the FTS5 search table of archived events, the archive's counterpart of EventSearchEntry"""
+    event = models.OneToOneField(
+        ArchivedEvent, primary_key=True, db_column='rowid', db_constraint=False, on_delete=models.DO_NOTHING,
+        related_name='search_entry'
+    )
+    name = models.TextField()
+    description = models.TextField()
+    venue = models.TextField()
+    document = models.TextField(db_column='seating_archivedevent_search')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'seating_archivedevent_search'
+
+
+class OccupancySnapshot(models.Model):
+    """
+    Last recorded occupancy of an event (section_id 0) or one of its sections
+    in a time bucket, for each resolution (see seating.snapshots). Ids are
+    plain integers so the history outlives the event's live and archived rows.
+    """
+    event_id = models.BigIntegerField()
+    section_id = models.BigIntegerField(default=0, help_text="0 for the whole event")
+    resolution = models.PositiveIntegerField(help_text="Bucket length in seconds")
+    taken_at = models.DateTimeField(help_text="Start of the bucket; values are the last recorded in it")
+    bookable_seats = models.PositiveIntegerField()
+    occupied_seats = models.PositiveIntegerField()
+    checked_in = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event_id', 'resolution', 'section_id', 'taken_at'], name='unique_occupancy_snapshot'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'taken_at'], name='occupancy_snapshot_retention'),
+        ]
+
+    def __str__(self):
+        return f"Event {self.event_id} section {self.section_id} at {self.taken_at:%Y-%m-%d %H:%M} ({self.resolution}s)"
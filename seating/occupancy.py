@@ -0,0 +1,68 @@
+"""
+Rebuild and verification helpers for the denormalized occupancy counters.
+
+Day-to-day the counters on Event and Section are maintained incrementally by
+the signals in seating.signals; these helpers recompute them from the seat
+and attendee tables after bulk loads or to audit drift.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import COUNTER_FIELDS, Event, Section
+
+
+def expected_counters(event_id=None):
+    """Return ({section_id: counters}, {event_id: counters}) computed from scratch"""
+    sections = {}
+    events = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    section_query = Section.objects.all()
+    event_query = Event.objects.all()
+    if event_id is not None:
+        section_query = section_query.filter(event_id=event_id)
+        event_query = event_query.filter(id=event_id)
+    rows = section_query.values_list('id', 'event_id').annotate(
+        seat_total=Count('seats', distinct=True),
+        seat_bookable=Count('seats', filter=Q(seats__is_available=True), distinct=True),
+        seat_occupied=Count('seats__attendee', distinct=True)
+    ).order_by()
+    for section_id, section_event_id, total, bookable, occupied in rows:
+        counters = {'total_seats': total, 'bookable_seats': bookable, 'occupied_seats': occupied}
+        sections[section_id] = counters
+        for field, value in counters.items():
+            events[section_event_id][field] += value
+
+    # Events without sections still need zeroed counters
+    for pk in event_query.values_list('id', flat=True):
+        events[pk]
+    return sections, dict(events)
+
+
+def _stored_counters(model):
+    return {
+        row[0]: dict(zip(COUNTER_FIELDS, row[1:]))
+        for row in model.objects.values_list('id', *COUNTER_FIELDS)
+    }
+
+
+def find_mismatches():
+    """Compare stored counters with recomputed ones"""
+    expected_sections, expected_events = expected_counters()
+    mismatches = []
+    for model, expected in ((Section, expected_sections), (Event, expected_events)):
+        stored = _stored_counters(model)
+        for pk, counters in expected.items():
+            if stored.get(pk) != counters:
+                mismatches.append((model.__name__, pk, stored.get(pk), counters))
+    return mismatches
+
+
+@transaction.atomic
+def rebuild_counters(event_id=None):
+    """Overwrite stored counters (of all events, or one) with recomputed values"""
+    expected_sections, expected_events = expected_counters(event_id)
+    for model, expected in ((Section, expected_sections), (Event, expected_events)):
+        objs = [model(pk=pk, **counters) for pk, counters in expected.items()]
+        model.objects.bulk_update(objs, COUNTER_FIELDS, batch_size=500)
+    return len(expected_sections), len(expected_events)
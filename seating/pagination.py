@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination for event listings.
+
+Events are ordered newest first by (date, time, id), with events without a
+start time after the timed ones of the same day. A page is fetched with a
+WHERE clause that continues right after the last event of the previous page,
+so the database walks the date index from that point and page 100 costs the
+same as page one. Cursors are opaque URL-safe tokens holding that last sort
+key.
+
+Full-text search results (querysets annotated with ``search_rank``) are
+ordered by relevance instead, best first, and their cursors hold the
+(rank, id) of the last result.
+
+Listings that also cover archived events fetch one page from the live and
+one from the archived events with the same cursor, and ``merge_pages`` keeps
+the first rows of both in listing order. Archived events keep their ids, so
+sort keys stay unique across the two tables.
+"""
+import base64
+import json
+from datetime import date, time
+
+from django.db.models import F, Q
+
+ORDERING = ('-date', F('time').desc(nulls_last=True), '-id')
+RANKED_ORDERING = ('search_rank', 'id')
+
+# Totals are counted up to this many rows, then reported as approximate
+TOTAL_COUNT_LIMIT = 1000
+
+
+def is_ranked(queryset):
+    return 'search_rank' in queryset.query.annotations
+
+
+def encode_cursor(event):
+    if getattr(event, 'search_rank', None) is not None:
+        key = ['rank', event.search_rank, event.id]
+    else:
+        key = [event.date.isoformat(), event.time.isoformat() if event.time else None, event.id]
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def decode_cursor(cursor):
+    """Sort key (date, time, id) of a cursor; raises ValueError if it is malformed"""
+    try:
+        event_date, event_time, event_id = _decode(cursor)
+        return (
+            date.fromisoformat(event_date),
+            time.fromisoformat(event_time) if event_time is not None else None,
+            int(event_id),
+        )
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def decode_rank_cursor(cursor):
+    """Sort key (rank, id) of a search result cursor; raises ValueError if it is malformed"""
+    try:
+        kind, rank, event_id = _decode(cursor)
+        if kind != 'rank':
+            raise ValueError
+        return float(rank), int(event_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def after(cursor):
+    """Filter selecting the events that sort after a cursor's key"""
+    event_date, event_time, event_id = decode_cursor(cursor)
+    if event_time is None:
+        # Untimed events come last within their day
+        same_day = Q(time__isnull=True, id__lt=event_id)
+    else:
+        same_day = Q(time__lt=event_time) | Q(time__isnull=True) | Q(time=event_time, id__lt=event_id)
+    return Q(date__lt=event_date) | (Q(date=event_date) & same_day)
+
+
+def after_rank(cursor):
+    """Filter selecting the search results that rank after a cursor's key"""
+    rank, event_id = decode_rank_cursor(cursor)
+    return Q(search_rank__gt=rank) | Q(search_rank=rank, id__gt=event_id)
+
+
+def page_queryset(queryset, cursor=None, limit=12):
+    """Queryset of one page, with one extra row to tell whether more follow"""
+    if is_ranked(queryset):
+        queryset = queryset.order_by(*RANKED_ORDERING)
+        if cursor:
+            queryset = queryset.filter(after_rank(cursor))
+        return queryset[:limit + 1]
+
+    queryset = queryset.order_by(*ORDERING)
+    if cursor:
+        queryset = queryset.filter(after(cursor))
+    return queryset[:limit + 1]
+
+
+def split_page(rows, limit):
+    """(events, next_cursor) from the rows of ``page_queryset``"""
+    events = rows[:limit]
+    next_cursor = encode_cursor(events[-1]) if len(rows) > limit else None
+    return events, next_cursor
+
+
+def sort_key(event):
+    """Key sorting events as the listings do, first shown first"""
+    if getattr(event, 'search_rank', None) is not None:
+        return (event.search_rank, event.id)
+    clock = event.time
+    micros = ((clock.hour * 60 + clock.minute) * 60 + clock.second) * 10 ** 6 + clock.microsecond if clock else 0
+    return (-event.date.toordinal(), clock is None, -micros, -event.id)
+
+
+def merge_pages(pages, limit=12):
+    """Rows of one page out of the ``page_queryset`` rows of several querysets"""
+    if len(pages) == 1:
+        return pages[0]
+    return sorted((row for page in pages for row in page), key=sort_key)[:limit + 1]
+
+
+def paginate(querysets, cursor=None, limit=12):
+    """(events, next_cursor) of one page of several querysets merged"""
+    pages = [list(page_queryset(queryset, cursor, limit)) for queryset in querysets]
+    return split_page(merge_pages(pages, limit), limit)
+
+
+def total_queryset(queryset):
+    """Count query bounded by TOTAL_COUNT_LIMIT, for an approximate total"""
+    # Only ids, so annotations such as search highlights are not computed
+    return queryset.order_by().values('pk')[:TOTAL_COUNT_LIMIT + 1]
+
+
+def describe_total(count):
+    return {'total': min(count, TOTAL_COUNT_LIMIT), 'total_is_exact': count <= TOTAL_COUNT_LIMIT}
+
+
+def approximate_total(*querysets):
+    return describe_total(sum(total_queryset(queryset).count() for queryset in querysets))
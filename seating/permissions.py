@@ -0,0 +1,41 @@
+"""
+Credentials for the write APIs called by devices rather than browsers.
+
+Door scanners and the sales clients holding seats have no session and no
+CSRF token, so these endpoints are CSRF-exempt and instead require an
+``Authorization: Bearer`` token listed in ``SEATING_API_TOKENS``. With no
+tokens configured they turn every request away.
+"""
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+
+def get_api_tokens():
+    return [token for token in getattr(settings, 'SEATING_API_TOKENS', ()) if token]
+
+
+def request_token(request):
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+
+def has_api_token(request):
+    token = request_token(request).encode()
+    # Compare against every token in constant time
+    return bool(token) and any([hmac.compare_digest(token, valid.encode()) for valid in get_api_tokens()])
+
+
+def api_token_required(view_func):
+    """Answer 401 unless the request carries a valid API token"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not has_api_token(request):
+            response = JsonResponse({'success': False, 'error': 'A valid API token is required'}, status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,128 @@
+"""
+Background processing of seat map uploads.
+
+Saving an event only records an ImageProcessingJob row; the heavy Pillow work
+(see seating.imaging) happens in the ``run_image_worker`` command, which claims
+pending jobs from the table and hands them to a process pool. Results are
+written back from the worker's main process as a SeatMapAsset.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import caching, imaging
+from .models import Event, ImageProcessingJob, SeatMapAsset
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+# Jobs left running longer than this are assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=15)
+
+
+def enqueue(event_id, image_name):
+    """Queue processing of an event's seat map unless it is already queued"""
+    already_queued = ImageProcessingJob.objects.filter(
+        event_id=event_id,
+        image_name=image_name,
+        status__in=[ImageProcessingJob.STATUS_PENDING, ImageProcessingJob.STATUS_RUNNING]
+    ).exists()
+    if not already_queued:
+        ImageProcessingJob.objects.create(event_id=event_id, image_name=image_name)
+
+
+def needs_processing(event):
+    """Check if the event's current image has no up-to-date SeatMapAsset"""
+    if not event.seat_map_image:
+        return False
+    return not SeatMapAsset.objects.filter(event=event, source=event.seat_map_image.name).exists()
+
+
+def requeue_stale_jobs():
+    return ImageProcessingJob.objects.filter(
+        status=ImageProcessingJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status=ImageProcessingJob.STATUS_PENDING)
+
+
+def claim_jobs(limit):
+    """Atomically move up to ``limit`` pending jobs to running and return them"""
+    claimed = []
+    candidates = ImageProcessingJob.objects.filter(
+        status=ImageProcessingJob.STATUS_PENDING
+    ).values_list('id', flat=True)[:limit]
+    for job_id in list(candidates):
+        updated = ImageProcessingJob.objects.filter(
+            id=job_id, status=ImageProcessingJob.STATUS_PENDING
+        ).update(status=ImageProcessingJob.STATUS_RUNNING, started_at=timezone.now())
+        if updated:
+            claimed.append(ImageProcessingJob.objects.get(id=job_id))
+    return claimed
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method; harmless under fork
+    django.setup()
+
+
+def _run(event_id, image_name):
+    return imaging.process_seat_map(event_id, image_name)
+
+
+def record_result(job, result):
+    """Store a finished job's output, unless the event's image changed meanwhile"""
+    with transaction.atomic():
+        current_image = Event.objects.filter(pk=job.event_id).values_list('seat_map_image', flat=True).first()
+        if current_image == job.image_name:
+            SeatMapAsset.objects.update_or_create(
+                event_id=job.event_id,
+                defaults={
+                    'source': result['source'],
+                    'width': result['width'],
+                    'height': result['height'],
+                    'dominant_colors': result['dominant_colors'],
+                    'variants': result['variants'],
+                    'tiles': result['tiles'],
+                }
+            )
+            caching.bump_event_version(job.event_id)
+            # The asset no longer points at earlier images' tiles and variants
+            transaction.on_commit(lambda: imaging.remove_stale_outputs(job.event_id, keep=result['path']))
+        ImageProcessingJob.objects.filter(pk=job.pk).update(
+            status=ImageProcessingJob.STATUS_DONE, error='', finished_at=timezone.now()
+        )
+
+
+def record_failure(job, error):
+    attempts = job.attempts + 1
+    status = ImageProcessingJob.STATUS_FAILED if attempts >= MAX_ATTEMPTS else ImageProcessingJob.STATUS_PENDING
+    ImageProcessingJob.objects.filter(pk=job.pk).update(
+        status=status, attempts=attempts, error=str(error), finished_at=timezone.now()
+    )
+    logger.error(f"Seat map job {job.pk} for event {job.event_id} failed (attempt {attempts}): {error}")
+
+
+def process_batch(executor, batch_size):
+    """Claim and run one batch of jobs; returns the number of jobs handled"""
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return 0
+
+    futures = [(job, executor.submit(_run, job.event_id, job.image_name)) for job in jobs]
+    for job, future in futures:
+        try:
+            record_result(job, future.result())
+        except Exception as e:
+            record_failure(job, e)
+    return len(jobs)
+
+
+def create_executor(processes):
+    # Forked children must not share the parent's database connections
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
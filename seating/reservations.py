@@ -0,0 +1,160 @@
+"""
+Seat holds for checkout.
+
+``hold_seats`` keeps a group of seats for one checkout for a limited time.
+Seats that are booked, not bookable or held are refused up front. A seat
+can have at most one hold (SeatHold.seat is unique), so the claim itself is
+an INSERT that either succeeds or fails with an IntegrityError: when several
+buyers go for the same seat at once the database lets exactly one of them
+through and the others get an ``unavailable`` result naming the seats they
+lost. A group is held all-or-nothing. Expired holds stop counting as soon
+as they expire: claims delete the expired holds on the seats they ask for,
+and ``release_expired`` (run by the ``release_expired_holds`` command)
+deletes the rest in bulk. ``confirm_hold`` turns a live hold into attendees,
+drawing new ticket numbers if a random one turns out to be taken.
+"""
+import secrets
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Attendee, Seat, SeatHold
+
+HELD = 'held'
+UNAVAILABLE = 'unavailable'
+CONFIRMED = 'confirmed'
+EXPIRED = 'expired'
+CONFLICT = 'conflict'
+INVALID = 'invalid'
+TICKET_CLASH = 'ticket_clash'
+
+DEFAULT_HOLD_SECONDS = 600
+MAX_HOLD_SECONDS = 1800
+MAX_SEATS_PER_HOLD = 20
+
+SWEEP_BATCH_SIZE = 1000
+
+# Attempts at drawing ticket numbers no attendee has yet
+TICKET_ATTEMPTS = 3
+
+
+def hold_seats(event_id, seat_ids, holder='', seconds=DEFAULT_HOLD_SECONDS):
+    """Hold all of ``seat_ids`` for one checkout, or none of them"""
+    seat_ids = sorted(set(seat_ids))
+    now = timezone.now()
+    token = secrets.token_urlsafe(16)
+    expires_at = now + timedelta(seconds=seconds)
+    holds = [
+        SeatHold(seat_id=seat_id, token=token, holder=holder[:200], expires_at=expires_at)
+        for seat_id in seat_ids
+    ]
+
+    try:
+        with transaction.atomic():
+            # Expired holds on these seats lapse now rather than at the next sweep
+            SeatHold.objects.filter(seat_id__in=seat_ids, expires_at__lte=now).delete()
+            bookable = set(Seat.objects.filter(
+                id__in=seat_ids, is_available=True, attendee__isnull=True, hold__isnull=True,
+                section__event_id=event_id, section__event__is_active=True
+            ).values_list('id', flat=True))
+            if len(bookable) < len(seat_ids):
+                return {'status': UNAVAILABLE, 'seat_ids': [seat_id for seat_id in seat_ids if seat_id not in bookable]}
+            SeatHold.objects.bulk_create(holds)
+    except IntegrityError:
+        # Another checkout took one of the seats between the check and the insert
+        taken = SeatHold.objects.filter(seat_id__in=seat_ids, expires_at__gt=now).values_list('seat_id', flat=True)
+        return {'status': UNAVAILABLE, 'seat_ids': sorted(taken)}
+
+    return {
+        'status': HELD,
+        'token': token,
+        'expires_at': expires_at.isoformat(),
+        'seat_ids': seat_ids,
+    }
+
+
+def confirm_hold(token, attendees):
+    """
+    Book the seats of a live hold. ``attendees`` has one {'seat_id', 'name',
+    'email', 'phone'} dict per held seat.
+    """
+    details = {}
+    for attendee in attendees:
+        try:
+            details[int(attendee['seat_id'])] = attendee
+        except (KeyError, TypeError, ValueError):
+            return {'status': INVALID, 'error': 'Every attendee needs a seat_id'}
+
+    with transaction.atomic():
+        live_holds = SeatHold.objects.filter(token=token, expires_at__gt=timezone.now())
+        # Lock the holds with a no-op UPDATE rather than SELECT ... FOR UPDATE:
+        # it locks the rows just the same, and on SQLite it takes the write
+        # lock before anything is read, so the transaction cannot fail later
+        # trying to upgrade a read lock while other checkouts are writing
+        if not live_holds.update(holder=F('holder')):
+            return {'status': EXPIRED}
+        holds = list(live_holds.select_related('seat__section').order_by('seat_id'))
+
+        missing = [hold.seat_id for hold in holds if not (details.get(hold.seat_id) or {}).get('name')]
+        if missing or set(details) - {hold.seat_id for hold in holds}:
+            return {'status': INVALID, 'error': 'Give a name for each held seat, and no other seats', 'seat_ids': missing}
+
+        for _ in range(TICKET_ATTEMPTS):
+            try:
+                booked = _book(holds, details)
+                break
+            except IntegrityError:
+                # Either a seat was booked outside the hold (e.g. from the admin)
+                # or a random ticket number was already taken
+                taken = sorted(Attendee.objects.filter(
+                    seat_id__in=[hold.seat_id for hold in holds]
+                ).values_list('seat_id', flat=True))
+                if taken:
+                    return {'status': CONFLICT, 'error': 'A held seat has already been booked', 'seat_ids': taken}
+        else:
+            return {'status': TICKET_CLASH, 'error': 'Could not issue unique ticket numbers, try again'}
+
+        SeatHold.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+
+    return {
+        'status': CONFIRMED,
+        'attendees': [
+            {'id': attendee.id, 'seat_id': attendee.seat_id, 'name': attendee.name, 'ticket_number': attendee.ticket_number}
+            for attendee in booked
+        ],
+    }
+
+
+def _book(holds, details):
+    """Create the attendees of the held seats, all or none"""
+    with transaction.atomic():
+        return [
+            Attendee.objects.create(
+                seat=hold.seat,
+                name=str(details[hold.seat_id]['name'])[:200],
+                email=str(details[hold.seat_id].get('email') or '')[:254],
+                phone=str(details[hold.seat_id].get('phone') or '')[:20],
+                ticket_number=f'TCK-{hold.seat.section.event_id}-{secrets.token_hex(5).upper()}',
+            )
+            for hold in holds
+        ]
+
+
+def release_hold(token):
+    """Give up a hold before it expires; returns how many seats were freed"""
+    deleted, _ = SeatHold.objects.filter(token=token).delete()
+    return deleted
+
+
+def release_expired(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Delete every expired hold, a batch at a time; returns how many were deleted"""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        batch = list(SeatHold.objects.filter(expires_at__lte=now).values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return released
+        deleted, _ = SeatHold.objects.filter(pk__in=batch).delete()
+        released += deleted
@@ -0,0 +1,182 @@
+"""
+Read replica routing.
+
+``ReplicaRouter`` sends reads to one of ``SEATING_REPLICA_DATABASES`` only
+while a view decorated with ``replica_reads`` is running; everything else,
+and every write, uses ``default``. The replica is picked once per request,
+so all of a request's reads see the same copy even though replicas are
+synced at different moments. Replicas may lag behind the primary, so reads
+stay on the primary for the rest of a request once it has written, and
+``PrimaryStickinessMiddleware`` keeps a client's reads on the primary for
+``SEATING_REPLICA_STICKY_SECONDS`` after any request of theirs wrote, letting
+them see their own changes. With no replicas configured the router changes
+nothing.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+STICKY_COOKIE = 'seating_primary_until'
+
+_state = ContextVar('seating_replica_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'SEATING_REPLICA_DATABASES', [])
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'SEATING_REPLICA_STICKY_SECONDS', 10)
+
+
+def get_max_lag():
+    return getattr(settings, 'SEATING_REPLICA_MAX_LAG_SECONDS', 30)
+
+
+class RoutingState:
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.allow_replica = False
+        self.wrote = False
+        self.used_replica = False
+        self.replica = None
+
+
+def read_from_replica():
+    """Whether the current request has read anything from a replica"""
+    state = _state.get()
+    return state is not None and state.used_replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = get_replicas()
+        if state is None or not replicas or not state.allow_replica or state.wrote:
+            return 'default'
+        state.used_replica = True
+        if state.replica not in replicas:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and get its schema with its data
+        if db in get_replicas():
+            return False
+        return None
+
+
+@contextmanager
+def replica_block():
+    """Let the reads in the block go to a replica, unless the client must stay on the primary"""
+    state = _state.get()
+    token = None
+    if state is None:
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.allow_replica
+    state.allow_replica = not state.sticky
+    try:
+        yield
+    finally:
+        state.allow_replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+@contextmanager
+def primary_block():
+    """Keep the reads in the block on the primary, even inside a replica-read view"""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    previous = state.allow_replica
+    state.allow_replica = False
+    try:
+        yield
+    finally:
+        state.allow_replica = previous
+
+
+def replica_reads(view_func):
+    """Serve a read-only view (sync or async) from a replica when one is configured"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_block():
+                return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with replica_block():
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryStickinessMiddleware:
+    """Track writes per request and pin the client's reads to the primary shortly after one"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        try:
+            sticky = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        return RoutingState(sticky=sticky)
+
+    def finish(self, response, state):
+        if state.wrote and get_replicas():
+            seconds = get_sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, f'{time.time() + seconds:.3f}', max_age=seconds, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,352 @@
+"""
+Full-text search indexes backed by SQLite FTS5 tables.
+
+The attendee table is a trigram index mirroring ``Attendee.name`` and
+``Attendee.ticket_number`` keyed on the attendee id, together with the owning
+event id, so substring searches are answered from the index instead of
+scanning the attendee/seat/section join.
+
+The event table mirrors ``Event.name``, ``description`` and ``venue`` keyed on
+the event id, with prefix indexes so search-as-you-type terms match word
+starts. It is exposed to the ORM as the unmanaged ``EventSearchEntry`` model,
+so ``search_events`` can join it to any event queryset (date filters,
+pagination) and rank matches with weighted bm25.
+
+Archived events and attendees (seating.archive) have indexes of their own
+with the same layout, so searches reach them without the live indexes
+growing with every past event. ``ArchivedEventSearchEntry`` exposes the
+archived event index the same way.
+"""
+import logging
+import re
+import time
+
+from django.db import connections, router
+from django.db.models import F, Func, Lookup, TextField, Value
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import ArchivedEventSearchEntry, Attendee, Event, EventSearchEntry
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'seating_attendee_search'
+EVENT_FTS_TABLE = EventSearchEntry._meta.db_table
+ARCHIVE_FTS_TABLE = 'seating_archivedattendee_search'
+ARCHIVE_EVENT_FTS_TABLE = ArchivedEventSearchEntry._meta.db_table
+
+# bm25 weights of the event columns: name, description, venue
+EVENT_RANK_WEIGHTS = (10.0, 1.0, 4.0)
+
+# Highlighted terms are wrapped in control characters by SQLite and turned
+# into <mark> tags once the rest of the text is HTML-escaped
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 16
+
+# The trigram tokenizer can only match substrings of at least three characters
+MIN_INDEXED_QUERY_LENGTH = 3
+
+# A database found without an index is checked again after this many seconds,
+# so a replica synced from a primary that has since built it starts using it
+MISSING_INDEX_RECHECK_SECONDS = 60
+
+# (alias, table) -> True, or the monotonic time the table was found missing
+_available_tables = {}
+
+
+def _table_available(table, using):
+    checked = _available_tables.get((using, table))
+    if checked is True:
+        return True
+    if checked is not None and time.monotonic() - checked < MISSING_INDEX_RECHECK_SECONDS:
+        return False
+    connection = connections[using]
+    available = connection.vendor == 'sqlite' and table in connection.introspection.table_names()
+    _available_tables[using, table] = True if available else time.monotonic()
+    return available
+
+
+def index_available(using='default', archived=False):
+    """Check if the FTS5 attendee search table (or the archive's) exists on the ``using`` database"""
+    return _table_available(ARCHIVE_FTS_TABLE if archived else FTS_TABLE, using)
+
+
+def event_index_available(using='default', archived=False):
+    """Check if the FTS5 event search table (or the archive's) exists on the ``using`` database"""
+    return _table_available(ARCHIVE_EVENT_FTS_TABLE if archived else EVENT_FTS_TABLE, using)
+
+
+def reset_index_state():
+    """Forget the cached availability checks (e.g. after migrations)"""
+    _available_tables.clear()
+
+
+def create_index_table(cursor, table=FTS_TABLE):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        "name, ticket_number, event_id UNINDEXED, tokenize='trigram')"
+    )
+
+
+def drop_index_table(cursor, table=FTS_TABLE):
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def create_event_index_table(cursor, table=EVENT_FTS_TABLE):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        "name, description, venue, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # The hidden rank column then orders matches by weighted bm25
+    weights = ', '.join(str(weight) for weight in EVENT_RANK_WEIGHTS)
+    cursor.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('rank', %s)", [f'bm25({weights})'])
+
+
+def drop_event_index_table(cursor, table=EVENT_FTS_TABLE):
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _match_expression(query):
+    """Quote the user query as a single FTS5 string so operators are literal"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def index_attendee(attendee_id, name, ticket_number, event_id):
+    """Insert or replace a single attendee row in the search index"""
+    using = router.db_for_write(Attendee)
+    if not index_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [attendee_id])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, ticket_number, event_id) VALUES (%s, %s, %s, %s)",
+            [attendee_id, name, ticket_number, event_id]
+        )
+
+
+def remove_attendee(attendee_id):
+    """Remove a single attendee row from the search index"""
+    using = router.db_for_write(Attendee)
+    if not index_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [attendee_id])
+
+
+def rebuild_index(section_id=None, event_id=None, using=None):
+    """Repopulate the search index from the attendee table, optionally for one section or event"""
+    using = using or router.db_for_write(Attendee)
+    if not index_available(using):
+        return 0
+    source = (
+        "SELECT a.id, a.name, a.ticket_number, sec.event_id "
+        "FROM seating_attendee a "
+        "JOIN seating_seat s ON s.id = a.seat_id "
+        "JOIN seating_section sec ON sec.id = s.section_id"
+    )
+    if section_id is not None:
+        condition, params = "sec.id = %s", [section_id]
+    elif event_id is not None:
+        condition, params = "sec.event_id = %s", [event_id]
+    else:
+        condition, params = None, []
+
+    with connections[using].cursor() as cursor:
+        if condition is None:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        else:
+            source += f" WHERE {condition}"
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ("
+                "SELECT a.id FROM seating_attendee a "
+                "JOIN seating_seat s ON s.id = a.seat_id "
+                f"JOIN seating_section sec ON sec.id = s.section_id WHERE {condition})",
+                params
+            )
+            if event_id is not None:
+                # Also drop rows of attendees that moved away from the event
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE event_id = %s", [event_id])
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, name, ticket_number, event_id) {source}", params)
+        return cursor.rowcount
+
+
+def can_search(query, archived=False):
+    """Check if a query can be answered from the index (or the archive's)"""
+    return index_available(router.db_for_read(Attendee), archived) and len(query) >= MIN_INDEXED_QUERY_LENGTH
+
+
+def search_attendee_ids(query, event_id=None, limit=10, archived=False):
+    """
+    Return ids of attendees of active events matching ``query``,
+    best match first; with ``archived``, of archived attendees.
+    """
+    table, event_table = (ARCHIVE_FTS_TABLE, 'seating_archivedevent') if archived else (FTS_TABLE, 'seating_event')
+    sql = (
+        f"SELECT idx.rowid FROM {table} idx "
+        f"JOIN {event_table} e ON e.id = idx.event_id "
+        f"WHERE {table} MATCH %s AND e.is_active = 1"
+    )
+    params = [_match_expression(query)]
+    if event_id is not None:
+        sql += " AND idx.event_id = %s"
+        params.append(event_id)
+    sql += " ORDER BY idx.rank LIMIT %s"
+    params.append(limit)
+
+    # Read from the same database as the attendee lookup that follows
+    with connections[router.db_for_read(Attendee)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+# Events
+
+def index_event(event_id, name, description, venue):
+    """Insert or replace a single event row in the search index"""
+    using = router.db_for_write(Event)
+    if not event_index_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {EVENT_FTS_TABLE} WHERE rowid = %s", [event_id])
+        cursor.execute(
+            f"INSERT INTO {EVENT_FTS_TABLE} (rowid, name, description, venue) VALUES (%s, %s, %s, %s)",
+            [event_id, name, description or '', venue]
+        )
+
+
+def remove_events(event_ids):
+    """Remove event rows from the search index"""
+    using = router.db_for_write(Event)
+    if not event_index_available(using) or not event_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(event_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {EVENT_FTS_TABLE} WHERE rowid IN ({placeholders})", list(event_ids))
+
+
+def rebuild_event_index(using=None):
+    """Repopulate the event search index from the event table"""
+    using = using or router.db_for_write(Event)
+    if not event_index_available(using):
+        return 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {EVENT_FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {EVENT_FTS_TABLE} (rowid, name, description, venue) "
+            "SELECT id, name, COALESCE(description, ''), venue FROM seating_event"
+        )
+        return cursor.rowcount
+
+
+def _where_in(column, ids):
+    """`` WHERE column IN (...)`` over ``ids`` as (sql, params), or no condition for None"""
+    if ids is None:
+        return '', []
+    return f" WHERE {column} IN ({', '.join(['%s'] * len(ids))})", list(ids)
+
+
+def rebuild_archive_index(event_ids=None, using=None):
+    """Repopulate the archive's attendee index from the archive tables, optionally for some events only"""
+    using = using or router.db_for_write(Attendee)
+    if not index_available(using, archived=True) or event_ids == []:
+        return 0
+    condition, params = _where_in('event_id', event_ids)
+    source_condition, _ = _where_in('sec.event_id', event_ids)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ARCHIVE_FTS_TABLE}{condition}", params)
+        cursor.execute(
+            f"INSERT INTO {ARCHIVE_FTS_TABLE} (rowid, name, ticket_number, event_id) "
+            "SELECT a.id, a.name, a.ticket_number, sec.event_id "
+            "FROM seating_archivedattendee a "
+            "JOIN seating_archivedseat s ON s.id = a.seat_id "
+            f"JOIN seating_archivedsection sec ON sec.id = s.section_id{source_condition}",
+            params
+        )
+        return cursor.rowcount
+
+
+def rebuild_archive_event_index(event_ids=None, using=None):
+    """Repopulate the archive's event index from the archived event table, optionally for some events only"""
+    using = using or router.db_for_write(Event)
+    if not event_index_available(using, archived=True) or event_ids == []:
+        return 0
+    condition, params = _where_in('rowid', event_ids)
+    source_condition, _ = _where_in('id', event_ids)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ARCHIVE_EVENT_FTS_TABLE}{condition}", params)
+        cursor.execute(
+            f"INSERT INTO {ARCHIVE_EVENT_FTS_TABLE} (rowid, name, description, venue) "
+            f"SELECT id, name, COALESCE(description, ''), venue FROM seating_archivedevent{source_condition}",
+            params
+        )
+        return cursor.rowcount
+
+
+def event_match_expression(query):
+    """
+    FTS5 expression matching events with every word of ``query`` as a word
+    prefix, or None if the query has no words. Words are quoted, so FTS5
+    operators in the query are literal.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+@EventSearchEntry._meta.get_field('document').register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+ArchivedEventSearchEntry._meta.get_field('document').register_lookup(Match)
+
+
+class Highlight(Func):
+    """Column ``column`` of a matched event with the matching terms marked"""
+    function = 'highlight'
+    output_field = TextField()
+
+    def __init__(self, column):
+        super().__init__(F('search_entry__document'), Value(column), Value(MARK_START), Value(MARK_END))
+
+
+class Snippet(Func):
+    """The best matching fragment of column ``column``, with the matching terms marked"""
+    function = 'snippet'
+    output_field = TextField()
+
+    def __init__(self, column):
+        super().__init__(
+            F('search_entry__document'), Value(column), Value(MARK_START), Value(MARK_END), Value('…'),
+            Value(SNIPPET_TOKENS)
+        )
+
+
+def can_search_events(query, archived=False):
+    """Check if an event query can be answered from the index (or the archive's)"""
+    return event_index_available(router.db_for_read(Event), archived) and event_match_expression(query) is not None
+
+
+def search_events(queryset, query):
+    """
+    Events of ``queryset`` (live or archived) matching ``query``, annotated with ``search_rank``
+    (lower is better) and the highlighted ``name_highlight``,
+    ``description_snippet`` and ``venue_highlight``.
+    """
+    return queryset.filter(search_entry__document__match=event_match_expression(query)).annotate(
+        search_rank=F('search_entry__rank'),
+        name_highlight=Highlight(0),
+        description_snippet=Snippet(1),
+        venue_highlight=Highlight(2),
+    )
+
+
+def mark_highlights(text):
+    """HTML of highlighted index text, the matching terms wrapped in <mark>"""
+    return mark_safe(escape(text or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
@@ -0,0 +1,227 @@
+import logging
+
+from django.db.models import F, QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import caching, occupancy, pipeline, search
+from .models import COUNTER_FIELDS, Event, Section, Seat, Attendee, SeatMapAsset
+
+logger = logging.getLogger(__name__)
+
+
+def _seat_location(seat_id):
+    """Return (section_id, event_id) for a seat, or (None, None) if it is gone"""
+    location = Seat.objects.filter(pk=seat_id).values_list(
+        'section_id', 'section__event_id'
+    ).first()
+    return location or (None, None)
+
+
+def _event_id_for_section(section_id):
+    return Section.objects.filter(pk=section_id).values_list(
+        'event_id', flat=True
+    ).first()
+
+
+def _deleting_events(origin):
+    """Whether a delete cascades from events, whose counters and search rows go with them"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Event
+
+
+def _apply_deltas(model, pk, deltas):
+    """F() update of a row's counters that refuses to take one below zero; returns whether it applied"""
+    floors = {f'{field}__gte': -delta for field, delta in deltas.items() if delta < 0}
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    return model.objects.filter(pk=pk, **floors).update(**updates) > 0
+
+
+def _counters_drifted(event_id):
+    """A counter would have gone below zero: report it and recompute the event's counters"""
+    logger.warning(f"Occupancy counters of event {event_id} drifted from the seat tables; recomputing them")
+    if event_id is not None:
+        occupancy.rebuild_counters(event_id)
+
+
+def _adjust_counters(section_id, event_id, **deltas):
+    """Apply counter deltas to a section and its event with atomic F() updates"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or section_id is None:
+        return
+    applied = _apply_deltas(Section, section_id, deltas)
+    if event_id is not None:
+        applied = _apply_deltas(Event, event_id, deltas) and applied
+    if not applied:
+        _counters_drifted(event_id)
+
+
+# Attendees
+
+@receiver(pre_save, sender=Attendee)
+def remember_attendee_seat(sender, instance, raw=False, **kwargs):
+    instance._previous_seat_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_seat_id = Attendee.objects.filter(pk=instance.pk).values_list(
+        'seat_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Attendee)
+def attendee_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep the search index and occupancy counters in sync with saved attendees"""
+    if raw:
+        return
+    section_id, event_id = _seat_location(instance.seat_id)
+    search.index_attendee(instance.pk, instance.name, instance.ticket_number, event_id)
+
+    previous_seat_id = getattr(instance, '_previous_seat_id', None)
+    if created or previous_seat_id is None:
+        _adjust_counters(section_id, event_id, occupied_seats=1)
+    elif previous_seat_id != instance.seat_id:
+        previous_section_id, previous_event_id = _seat_location(previous_seat_id)
+        _adjust_counters(previous_section_id, previous_event_id, occupied_seats=-1)
+        _adjust_counters(section_id, event_id, occupied_seats=1)
+        if previous_event_id is not None and previous_event_id != event_id:
+            caching.bump_event_version(previous_event_id)
+
+    if event_id is not None:
+        caching.bump_event_version(event_id)
+
+
+@receiver(post_delete, sender=Attendee)
+def attendee_deleted(sender, instance, origin=None, **kwargs):
+    """Drop deleted attendees from the search index and occupancy counters"""
+    if _deleting_events(origin):
+        return
+    search.remove_attendee(instance.pk)
+    section_id, event_id = _seat_location(instance.seat_id)
+    _adjust_counters(section_id, event_id, occupied_seats=-1)
+    if event_id is not None:
+        caching.bump_event_version(event_id)
+
+
+# Seats
+
+@receiver(pre_save, sender=Seat)
+def remember_seat_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_state = Seat.objects.filter(pk=instance.pk).values(
+        'section_id', 'is_available'
+    ).first()
+
+
+@receiver(post_save, sender=Seat)
+def seat_saved(sender, instance, created, raw=False, **kwargs):
+    """Keep section and event seat counters in sync with saved seats"""
+    if raw:
+        return
+    event_id = _event_id_for_section(instance.section_id)
+    previous = getattr(instance, '_previous_state', None)
+
+    if created or previous is None:
+        _adjust_counters(
+            instance.section_id, event_id,
+            total_seats=1, bookable_seats=int(instance.is_available)
+        )
+    elif previous['section_id'] != instance.section_id:
+        attendee = Attendee.objects.filter(seat_id=instance.pk).values_list(
+            'id', 'name', 'ticket_number'
+        ).first()
+        occupied = int(attendee is not None)
+        previous_event_id = _event_id_for_section(previous['section_id'])
+        _adjust_counters(
+            previous['section_id'], previous_event_id, total_seats=-1,
+            bookable_seats=-int(previous['is_available']), occupied_seats=-occupied
+        )
+        _adjust_counters(
+            instance.section_id, event_id, total_seats=1,
+            bookable_seats=int(instance.is_available), occupied_seats=occupied
+        )
+        if previous_event_id != event_id:
+            if attendee is not None:
+                search.index_attendee(*attendee, event_id)
+            if previous_event_id is not None:
+                caching.bump_event_version(previous_event_id)
+    elif previous['is_available'] != instance.is_available:
+        _adjust_counters(
+            instance.section_id, event_id,
+            bookable_seats=int(instance.is_available) - int(previous['is_available'])
+        )
+
+    if event_id is not None:
+        caching.bump_event_version(event_id)
+
+
+@receiver(post_delete, sender=Seat)
+def seat_deleted(sender, instance, origin=None, **kwargs):
+    if _deleting_events(origin):
+        return
+    event_id = _event_id_for_section(instance.section_id)
+    _adjust_counters(
+        instance.section_id, event_id,
+        total_seats=-1, bookable_seats=-int(instance.is_available)
+    )
+    if event_id is not None:
+        caching.bump_event_version(event_id)
+
+
+# Sections
+
+@receiver(pre_save, sender=Section)
+def remember_section_event(sender, instance, raw=False, **kwargs):
+    instance._previous_event_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_event_id = _event_id_for_section(instance.pk)
+
+
+@receiver(post_save, sender=Section)
+def section_saved(sender, instance, raw=False, **kwargs):
+    """Carry a section's counters over when it is moved to another event"""
+    if raw:
+        return
+    previous_event_id = getattr(instance, '_previous_event_id', None)
+    if previous_event_id is not None and previous_event_id != instance.event_id:
+        counters = Section.objects.filter(pk=instance.pk).values(*COUNTER_FIELDS).first()
+        if not _apply_deltas(Event, previous_event_id, {field: -value for field, value in counters.items()}):
+            _counters_drifted(previous_event_id)
+        _apply_deltas(Event, instance.event_id, counters)
+        search.rebuild_index(section_id=instance.pk)
+        caching.bump_event_version(previous_event_id)
+    caching.bump_event_version(instance.event_id)
+
+
+@receiver(post_delete, sender=Section)
+def section_deleted(sender, instance, **kwargs):
+    caching.bump_event_version(instance.event_id)
+
+
+# Events
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_event(instance.pk, instance.name, instance.description, instance.venue)
+    _queue_seat_map_processing(instance)
+    caching.bump_event_version(instance.pk)
+
+
+def _queue_seat_map_processing(event):
+    """Queue background processing when the uploaded seat map image changes"""
+    if not event.seat_map_image:
+        SeatMapAsset.objects.filter(event=event).delete()
+    elif pipeline.needs_processing(event):
+        pipeline.enqueue(event.pk, event.seat_map_image.name)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    """The per-seat and per-attendee handlers skip the cascade, so drop the attendees' search rows here"""
+    search.remove_events([instance.pk])
+    search.rebuild_index(event_id=instance.pk)
+    caching.bump_event_version(instance.pk)
@@ -0,0 +1,196 @@
+"""
+Occupancy time series for dashboards.
+
+``SnapshotRecorder`` (run by the record_occupancy command) samples the
+stored occupancy counters of every active event and section, plus how many
+attendees are checked in, and writes them to ``OccupancySnapshot``. The
+history is kept at several resolutions (``SEATING_OCCUPANCY_TIERS``): a
+sample is upserted into the current bucket of every tier, so each tier holds
+the last value seen in each of its buckets. ``prune`` drops each tier's rows
+past its retention except the newest of each series, which is the value
+still holding when the window starts, so a tier is complete for its whole
+retention window even for an event that has not changed in longer.
+
+Only changes are recorded. An event is read again only after its cache
+version or its check-in counter moved, and a series gets a row only when one of its values changed,
+so a quiet event costs nothing and ``occupancy_history`` carries the last
+value forward: it returns the value at the start of the range along with the
+changes inside it, read from the snapshot table alone.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Exists, F, OuterRef, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, checkin
+from .models import Attendee, Event, OccupancySnapshot, Section
+
+# (resolution, retention) in seconds, finest first; None keeps a tier forever
+DEFAULT_TIERS = (
+    (60, 2 * 24 * 3600),
+    (15 * 60, 30 * 24 * 3600),
+    (24 * 3600, None),
+)
+
+# A range is served from the finest tier that covers it in at most this many buckets
+MAX_POINTS = 1500
+
+VALUE_FIELDS = ('bookable_seats', 'occupied_seats', 'checked_in')
+
+
+def get_tiers():
+    return tuple(getattr(settings, 'SEATING_OCCUPANCY_TIERS', DEFAULT_TIERS))
+
+
+def bucket_start(moment, resolution):
+    seconds = int(moment.timestamp()) // resolution * resolution
+    return datetime.fromtimestamp(seconds, dt_timezone.utc)
+
+
+def read_occupancy(event_ids):
+    """{(event_id, section_id): (bookable, occupied, checked_in)}, section_id 0 for event totals"""
+    values = {(event_id, 0): [0, 0, 0] for event_id in event_ids}
+    checked_in = dict(
+        Attendee.objects.filter(
+            seat__section__event_id__in=event_ids, checked_in_at__isnull=False
+        ).values_list('seat__section_id').annotate(count=Count('id')).order_by()
+    )
+    sections = Section.objects.filter(event_id__in=event_ids).values_list(
+        'id', 'event_id', 'bookable_seats', 'occupied_seats'
+    )
+    for section_id, event_id, bookable, occupied in sections:
+        section = (bookable, occupied, checked_in.get(section_id, 0))
+        values[(event_id, section_id)] = section
+        values[(event_id, 0)] = [total + value for total, value in zip(values[(event_id, 0)], section)]
+    return {key: tuple(value) for key, value in values.items()}
+
+
+class SnapshotRecorder:
+    """Records the occupancy series that changed since its previous call"""
+
+    def __init__(self):
+        self.versions = {}
+        self.last = {}
+
+    def record(self, now=None):
+        """Sample changed events; returns how many series got a new value"""
+        now = now or timezone.now()
+        event_ids = list(Event.objects.filter(is_active=True).values_list('id', flat=True))
+        check_ins = checkin.get_check_in_counters(event_ids)
+        versions = {event_id: (caching.get_event_version(event_id), check_ins[event_id]) for event_id in event_ids}
+        changed = [event_id for event_id in event_ids if self.versions.get(event_id) != versions[event_id]]
+        if not changed:
+            return 0
+
+        updates = {
+            key: values for key, values in read_occupancy(changed).items() if self.last.get(key) != values
+        }
+        rows = [
+            OccupancySnapshot(
+                event_id=event_id, section_id=section_id, resolution=resolution,
+                taken_at=bucket_start(now, resolution), **dict(zip(VALUE_FIELDS, values))
+            )
+            for (event_id, section_id), values in updates.items()
+            for resolution, _ in get_tiers()
+        ]
+        OccupancySnapshot.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True,
+            unique_fields=['event_id', 'resolution', 'section_id', 'taken_at'], update_fields=list(VALUE_FIELDS)
+        )
+        self.last.update(updates)
+        self.versions.update({event_id: versions[event_id] for event_id in changed})
+        return len(updates)
+
+
+def prune(now=None):
+    """
+    Delete rows past their tier's retention, keeping each series' newest one
+    as the value at the start of the window; returns how many were deleted
+    """
+    now = now or timezone.now()
+    deleted = 0
+    for resolution, retention in get_tiers():
+        if retention is None:
+            continue
+        cutoff = now - timedelta(seconds=retention)
+        superseded = OccupancySnapshot.objects.filter(
+            event_id=OuterRef('event_id'), section_id=OuterRef('section_id'), resolution=resolution,
+            taken_at__gt=OuterRef('taken_at'), taken_at__lte=cutoff
+        )
+        deleted += OccupancySnapshot.objects.filter(
+            Exists(superseded), resolution=resolution, taken_at__lt=cutoff
+        ).delete()[0]
+    return deleted
+
+
+def parse_range(start, end, now=None):
+    """(start, end) from ISO datetimes; end defaults to now and start to a day before end"""
+    now = now or timezone.now()
+    bounds = []
+    for value, default in ((end, now), (start, None)):
+        if value in (None, ''):
+            bounds.append(default)
+            continue
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f'Invalid datetime: {value}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        bounds.append(moment)
+    end, start = bounds
+    start = start or end - timedelta(days=1)
+    if start >= end:
+        raise ValueError('start must be before end')
+    return start, end
+
+
+def pick_resolution(start, end, now=None):
+    """Finest tier still holding ``start`` that spans the range in at most MAX_POINTS buckets"""
+    now = now or timezone.now()
+    tiers = get_tiers()
+    for resolution, retention in tiers:
+        covers = retention is None or start >= now - timedelta(seconds=retention)
+        if covers and (end - start).total_seconds() / resolution <= MAX_POINTS:
+            return resolution
+    return tiers[-1][0]
+
+
+def occupancy_history(event_id, start, end, resolution, section_ids=()):
+    """
+    {section_id: {'initial': values or None, 'points': [(taken_at, values), ...]}}
+    for the event totals (section 0) and the given sections (every section if
+    ``section_ids`` is None), where values are (bookable, occupied, checked_in)
+    and ``initial`` is the value at ``start``.
+    """
+    series_ids = [0, *(section_ids or ())]
+    snapshots = OccupancySnapshot.objects.filter(event_id=event_id, resolution=resolution)
+    if section_ids is not None:
+        snapshots = snapshots.filter(section_id__in=series_ids)
+    history = {}
+
+    # The last value of each series before the range, which holds at its start
+    initial = snapshots.filter(taken_at__lt=start).annotate(
+        recency=Window(RowNumber(), partition_by=[F('section_id')], order_by=F('taken_at').desc())
+    ).filter(recency=1).values_list('section_id', *VALUE_FIELDS)
+    for section_id, *values in initial:
+        history[section_id] = {'initial': tuple(values), 'points': []}
+
+    points = snapshots.filter(taken_at__gte=start, taken_at__lte=end).order_by('section_id', 'taken_at')
+    for section_id, taken_at, *values in points.values_list('section_id', 'taken_at', *VALUE_FIELDS):
+        history.setdefault(section_id, {'initial': None, 'points': []})['points'].append((taken_at, tuple(values)))
+    return history
+
+
+def serialize_history(history):
+    """Series as compact rows for charts: [epoch seconds, bookable, occupied, checked_in]"""
+    return [
+        {
+            'section_id': section_id or None,
+            'initial': list(series['initial']) if series['initial'] else None,
+            'points': [[int(taken_at.timestamp()), *values] for taken_at, values in series['points']],
+        }
+        for section_id, series in sorted(history.items())
+    ]
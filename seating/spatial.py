@@ -0,0 +1,115 @@
+"""
+Uniform-grid spatial index over seat coordinates.
+
+Seat coordinates are percentages (0-100) of the floor plan, so the plan is
+split into ``GRID_SIZE`` x ``GRID_SIZE`` buckets. Viewport queries only visit
+the buckets overlapping the rectangle and nearest-seat lookups search rings
+of buckets outward from the tapped point. Grids are held per process and
+rebuilt when the event's cache version changes.
+"""
+import math
+
+from .caching import EventMemo
+from .models import ArchivedSeat, Seat
+
+GRID_SIZE = 50
+CELL = 100.0 / GRID_SIZE
+
+
+def _cell(value):
+    return min(GRID_SIZE - 1, max(0, int(value / CELL)))
+
+
+class SeatGrid:
+    """Bucketed seat records for one event"""
+
+    def __init__(self, seats):
+        self.seats = seats
+        self.cells = {}
+        for position, seat in enumerate(seats):
+            key = (_cell(seat['x']), _cell(seat['y']))
+            self.cells.setdefault(key, []).append(position)
+
+    def __len__(self):
+        return len(self.seats)
+
+    def in_rect(self, x0, y0, x1, y1, limit=None):
+        """Seats with x0 <= x <= x1 and y0 <= y <= y1, in layout order"""
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        positions = []
+        for cx in range(_cell(x0), _cell(x1) + 1):
+            for cy in range(_cell(y0), _cell(y1) + 1):
+                for position in self.cells.get((cx, cy), ()):
+                    seat = self.seats[position]
+                    if x0 <= seat['x'] <= x1 and y0 <= seat['y'] <= y1:
+                        positions.append(position)
+        positions.sort()
+        if limit is not None:
+            positions = positions[:limit]
+        return [self.seats[position] for position in positions]
+
+    def nearest(self, x, y, max_distance=None, count=1):
+        """The ``count`` seats closest to (x, y), nearest first"""
+        if not self.seats:
+            return []
+        cx, cy = _cell(x), _cell(y)
+        found = []
+        for ring in range(GRID_SIZE):
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) != ring:
+                        continue
+                    for position in self.cells.get((gx, gy), ()):
+                        seat = self.seats[position]
+                        found.append((math.hypot(seat['x'] - x, seat['y'] - y), position))
+            # Every seat outside the searched rings is at least this far away
+            reach = ring * CELL
+            found.sort()
+            if len(found) >= count and found[count - 1][0] <= reach:
+                break
+            if max_distance is not None and reach > max_distance:
+                break
+
+        results = []
+        for distance, position in found[:count]:
+            if max_distance is not None and distance > max_distance:
+                break
+            results.append({**self.seats[position], 'distance': round(distance, 3)})
+        return results
+
+
+def _grid_seats(model, event_id):
+    rows = model.objects.filter(section__event_id=event_id).order_by(
+        'section__name', 'row', 'seat_number', 'id'
+    ).values_list(
+        'id', 'section_id', 'section__name', 'row', 'seat_number',
+        'x_coordinate', 'y_coordinate', 'is_available', 'attendee__id'
+    )
+    return [
+        {
+            'id': seat_id,
+            'section_id': section_id,
+            'section': section_name,
+            'row': row,
+            'seat_number': seat_number,
+            'x': x,
+            'y': y,
+            'is_available': is_available,
+            'occupied': attendee_id is not None,
+        }
+        for (seat_id, section_id, section_name, row, seat_number, x, y, is_available, attendee_id)
+        in rows.iterator(chunk_size=5000)
+    ]
+
+
+def build_grid(event_id):
+    # From the archive once the event has no live seats
+    return SeatGrid(_grid_seats(Seat, event_id) or _grid_seats(ArchivedSeat, event_id))
+
+
+_grids = EventMemo(build_grid)
+
+
+def get_grid(event_id):
+    return _grids.get(event_id)
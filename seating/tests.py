@@ -1,3 +1,1621 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import struct
+import tempfile
+from concurrent.futures import Executor, Future
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import (
+    archive, async_views, autocomplete, benchmarks, caching, checkin, export, imaging, layout, live, occupancy,
+    pagination, pipeline, reservations, routers, search, snapshots, spatial, urls, views,
+)
+from .models import (
+    ArchivedAttendee, ArchivedEvent, Attendee, Event, ImageProcessingJob, OccupancySnapshot, Seat, SeatHold, SeatMapAsset,
+    Section,
+)
+
+
+GUEST_NAMES = ['Alex Morgan', 'Taylor Lee', 'Jordan Kim', 'Casey Smith', 'Robin Patel', 'Drew Chen']
+
+
+def create_event(name, days=10, sections=1, rows=1, seats_per_row=5, booked=0):
+    """An event with a grid of seats per section; the first ``booked`` seats of each section get an attendee"""
+    event = Event.objects.create(name=name, venue='Arena', date=date.today() + timedelta(days=days), time=time(19))
+    for section_index in range(sections):
+        section = Section.objects.create(event=event, name=f'Block {section_index + 1}')
+        for position in range(rows * seats_per_row):
+            row, number = divmod(position, seats_per_row)
+            seat = Seat.objects.create(
+                section=section, row=chr(65 + row), seat_number=str(number + 1),
+                x_coordinate=5 + section_index * 30 + number * 2, y_coordinate=10 + row * 5
+            )
+            if position < booked:
+                Attendee.objects.create(
+                    name=f'{GUEST_NAMES[seat.pk % len(GUEST_NAMES)]} {seat.pk}', email=f'guest{seat.pk}@example.com',
+                    seat=seat, ticket_number=f'TCK-{event.pk}-{seat.pk}'
+                )
+    # Pick up the counters maintained by the signal handlers
+    event.refresh_from_db()
+    return event
+
+
+class AttendeeSearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        day = date.today() + timedelta(days=10)
+        cls.event = Event.objects.create(name='Derby', venue='Stadium', date=day)
+        cls.other = Event.objects.create(name='Final', venue='Stadium', date=day)
+        cls.home = Section.objects.create(event=cls.event, name='Home')
+        cls.away = Section.objects.create(event=cls.other, name='Away')
+        cls.seat = Seat.objects.create(section=cls.home, row='A', seat_number='1', x_coordinate=1, y_coordinate=5)
+        cls.away_seat = Seat.objects.create(section=cls.away, row='A', seat_number='1', x_coordinate=1, y_coordinate=5)
+
+    def test_index_follows_edits_and_moves(self):
+        attendee = Attendee.objects.create(
+            name='Zelda Quist', email='zelda@example.com', seat=self.seat, ticket_number='TCK-ZQ1'
+        )
+        self.assertEqual(search.search_attendee_ids('zelda', event_id=self.event.id), [attendee.id])
+        self.assertEqual(search.search_attendee_ids('ZQ1'), [attendee.id])
+
+        attendee.name = 'Wanda Quist'
+        attendee.save()
+        self.assertEqual(search.search_attendee_ids('zelda'), [])
+        self.assertEqual(search.search_attendee_ids('wanda'), [attendee.id])
+
+        attendee.seat = self.away_seat
+        attendee.save()
+        self.assertEqual(search.search_attendee_ids('wanda', event_id=self.event.id), [])
+        self.assertEqual(search.search_attendee_ids('wanda', event_id=self.other.id), [attendee.id])
+
+        # Moving the section carries its attendees' rows along
+        self.away.event = self.event
+        self.away.save()
+        self.assertEqual(search.search_attendee_ids('wanda', event_id=self.event.id), [attendee.id])
+
+        attendee.delete()
+        self.assertEqual(search.search_attendee_ids('wanda'), [])
+
+
+class AttendeeAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(name='Derby', venue='Stadium', date=date.today() + timedelta(days=10))
+        section = Section.objects.create(event=cls.event, name='Home')
+        names = ['Amy Joz', 'Zed Jo', 'Bea Joy', 'Cy Jon', 'Di Jot', 'Ed Job']
+        cls.attendees = {}
+        for number, name in enumerate(names, start=1):
+            seat = Seat.objects.create(
+                section=section, row='A', seat_number=str(number), x_coordinate=number, y_coordinate=5
+            )
+            cls.attendees[name] = Attendee.objects.create(
+                name=name, email=f'fan{number}@example.com', seat=seat, ticket_number=f'TCK-{number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        caching.version_cache().clear()
+
+    def names(self, query, limit=10):
+        results, truncated = autocomplete.autocomplete(self.event.id, query, limit=limit)
+        return [result['name'] for result in results], truncated
+
+    def test_exact_words_rank_first(self):
+        self.assertEqual(self.names('jo', limit=3), (['Zed Jo', 'Ed Job', 'Cy Jon'], False))
+        self.assertEqual(self.names('bea jo'), (['Bea Joy'], False))
+
+    def test_scan_limit_is_reported(self):
+        with mock.patch.object(autocomplete, 'MAX_SCAN', 3):
+            # The three best matches are known within the scan window
+            self.assertEqual(self.names('jo', limit=2), (['Zed Jo', 'Ed Job'], False))
+            self.assertEqual(self.names('jo'), (['Zed Jo', 'Ed Job', 'Cy Jon'], True))
+        response = self.client.get(
+            reverse('seating:autocomplete_attendee'), {'q': 'jo', 'event_id': self.event.id, 'limit': 2}
+        )
+        self.assertFalse(json.loads(response.content)['truncated'])
+
+    def test_index_follows_edits(self):
+        self.assertEqual(self.names('amy'), (['Amy Joz'], False))
+        attendee = self.attendees['Amy Joz']
+        with self.captureOnCommitCallbacks(execute=True):
+            attendee.name = 'Ana Joz'
+            attendee.save()
+        self.assertEqual(self.names('amy'), ([], False))
+        self.assertEqual(self.names('ana'), (['Ana Joz'], False))
+        with self.captureOnCommitCallbacks(execute=True):
+            attendee.delete()
+        self.assertEqual(self.names('joz'), ([], False))
+
+    @override_settings(SEATING_EVENT_MEMO_SIZE=2)
+    def test_memo_keeps_most_recently_used_events(self):
+        builds = []
+        memo = caching.EventMemo(lambda event_id: builds.append(event_id) or event_id)
+        for event_id in (1, 2, 1, 3, 1, 2):
+            memo.get(event_id)
+        # 2 was the least recently used when 3 came in
+        self.assertEqual(builds, [1, 2, 3, 2])
+        self.assertEqual(len(memo._entries), 2)
+
+
+class OccupancyCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        day = date.today() + timedelta(days=10)
+        cls.event = Event.objects.create(name='Derby', venue='Stadium', date=day)
+        cls.other = Event.objects.create(name='Final', venue='Stadium', date=day)
+        cls.north = Section.objects.create(event=cls.event, name='North')
+        cls.south = Section.objects.create(event=cls.event, name='South')
+        cls.away = Section.objects.create(event=cls.other, name='Away')
+
+    def seat(self, section, number, **fields):
+        return Seat.objects.create(
+            section=section, row='A', seat_number=str(number), x_coordinate=number, y_coordinate=5, **fields
+        )
+
+    def attendee(self, seat):
+        return Attendee.objects.create(name='Fan', email='fan@example.com', seat=seat, ticket_number=f'TCK-{seat.pk}')
+
+    def counters(self, obj):
+        obj.refresh_from_db()
+        return obj.total_seats, obj.bookable_seats, obj.occupied_seats
+
+    def test_seat_and_attendee_changes(self):
+        first = self.seat(self.north, 1)
+        second = self.seat(self.north, 2, is_available=False)
+        self.assertEqual(self.counters(self.north), (2, 1, 0))
+        attendee = self.attendee(first)
+        self.assertEqual(self.counters(self.event), (2, 1, 1))
+
+        # The attendee moves to a seat of another event
+        away_seat = self.seat(self.away, 1)
+        attendee.seat = away_seat
+        attendee.save()
+        self.assertEqual(self.counters(self.event), (2, 1, 0))
+        self.assertEqual(self.counters(self.other), (1, 1, 1))
+
+        # The seat moves back to this event with its attendee
+        away_seat.section = self.south
+        away_seat.save()
+        self.assertEqual(self.counters(self.south), (1, 1, 1))
+        self.assertEqual(self.counters(self.other), (0, 0, 0))
+
+        second.is_available = True
+        second.save()
+        self.assertEqual(self.counters(self.north), (2, 2, 0))
+
+        attendee.delete()
+        away_seat.delete()
+        self.assertEqual(self.counters(self.event), (2, 2, 0))
+        self.assertEqual(occupancy.find_mismatches(), [])
+
+    def test_drift_is_reported_and_recomputed(self):
+        attendee = self.attendee(self.seat(self.north, 1))
+        Section.objects.filter(pk=self.north.pk).update(occupied_seats=0)
+        with self.assertLogs('seating.signals', 'WARNING'):
+            attendee.delete()
+        self.assertEqual(self.counters(self.north), (1, 1, 0))
+        self.assertEqual(occupancy.find_mismatches(), [])
+
+    def test_event_delete_skips_per_seat_handlers(self):
+        for number in range(1, 21):
+            seat = self.seat(self.north if number % 2 else self.south, number)
+            if number <= 10:
+                self.attendee(seat)
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.event.delete()
+        self.assertFalse([query for query in queries if 'UPDATE "seating_section"' in query['sql']])
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE event_id = %s', [self.event.pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(occupancy.find_mismatches(), [])
+
+
+class EventCacheVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(name='Gala', venue='Hall', date=date.today() + timedelta(days=5))
+
+    def setUp(self):
+        cache.clear()
+        caching.version_cache().clear()
+
+    def fetch_name(self):
+        return self.client.get(reverse('seating:event_detail_api', args=[self.event.id])).json()['name']
+
+    def test_version_bump_invalidates_cached_response(self):
+        self.assertEqual(self.fetch_name(), 'Gala')
+        Event.objects.filter(pk=self.event.pk).update(name='Renamed')
+        self.assertEqual(self.fetch_name(), 'Gala')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.name = 'Gala Night'
+            self.event.save()
+        self.assertEqual(self.fetch_name(), 'Gala Night')
+
+    def test_evicted_version_is_never_reused(self):
+        self.assertEqual(self.fetch_name(), 'Gala')
+        key = caching.VERSION_KEY.format(event_id=self.event.id)
+        Event.objects.filter(pk=self.event.pk).update(name='Renamed')
+
+        caching.version_cache().delete(key)
+        self.assertEqual(self.fetch_name(), 'Renamed')
+
+        # Incrementing a lost key must not start counting from a used value either
+        version = caching.get_event_version(self.event.id)
+        caching.version_cache().delete(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.bump_event_version(self.event.id)
+        self.assertNotIn(caching.get_event_version(self.event.id), (0, 1, version))
+
+    def test_visitor_specific_responses_are_not_shared(self):
+        calls = []
+
+        @caching.cache_per_event
+        def view(request, event_id):
+            calls.append(request.GET['kind'])
+            if request.GET['kind'] == 'csrf':
+                get_token(request)
+            elif request.GET['kind'] == 'session':
+                request.session.get('_auth_user_id')
+            response = HttpResponse('page')
+            if request.GET['kind'] == 'vary':
+                response['Vary'] = 'Accept-Language'
+            return response
+
+        factory = RequestFactory()
+        for kind in ('shared', 'csrf', 'session', 'vary'):
+            for _ in range(2):
+                request = factory.get('/', {'kind': kind})
+                request.session = SessionStore()
+                view(request, event_id=self.event.id)
+        self.assertEqual(calls, ['shared', 'csrf', 'csrf', 'session', 'session', 'vary', 'vary'])
+
+    def test_seat_map_is_shared_between_visitors(self):
+        url = reverse('seating:seat_map', args=[self.event.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class EventLayoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(name='Derby', venue='Stadium', date=date.today() + timedelta(days=10))
+        north = Section.objects.create(event=cls.event, name='North', color='#112233')
+        south = Section.objects.create(event=cls.event, name='South', color='#445566')
+        cls.seats = []
+        for number in range(1, 10):
+            section = north if number <= 5 else south
+            seat = Seat.objects.create(
+                section=section, row='AB'[number % 2], seat_number=str(number),
+                x_coordinate=number * 10.5, y_coordinate=20.25, is_available=number != 3
+            )
+            cls.seats.append(seat)
+        for seat in cls.seats[1::4]:
+            Attendee.objects.create(
+                name='Fan', email=f'fan{seat.pk}@example.com', seat=seat, ticket_number=f'TCK-{seat.pk}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def fetch(self, **params):
+        return self.client.get(reverse('seating:event_layout', args=[self.event.id]), params)
+
+    def expected(self):
+        seats = Seat.objects.filter(section__event=self.event).order_by('section__name', 'row', 'seat_number', 'id')
+        return [
+            (seat.id, seat.section.name, seat.row, seat.seat_number, seat.x_coordinate, seat.y_coordinate,
+             seat.is_available, hasattr(seat, 'attendee'))
+            for seat in seats
+        ]
+
+    def bits(self, data, count):
+        return [bool(data[position >> 3] & (1 << (position & 7))) for position in range(count)]
+
+    def test_json_layout(self):
+        data = json.loads(self.fetch().content)
+        seats = data['seats']
+        decoded = [
+            (seat_id, data['sections']['names'][section], data['rows'][row], data['numbers'][number], x, y,
+             available, occupied)
+            for seat_id, section, row, number, x, y, available, occupied in zip(
+                seats['ids'], seats['section'], seats['row'], seats['number'], seats['x'], seats['y'],
+                self.bits(base64.b64decode(data['available']), data['count']),
+                self.bits(base64.b64decode(data['occupied']), data['count'])
+            )
+        ]
+        self.assertEqual(decoded, self.expected())
+        self.assertEqual(data['sections']['colors'], ['#112233', '#445566'])
+        # Labels are stored once however many seats use them
+        self.assertEqual(data['rows'], ['A', 'B'])
+
+    def test_binary_layout_matches_json(self):
+        payload = self.fetch(format='binary').content
+        self.assertEqual(payload[:4], layout.BINARY_MAGIC)
+        (header_length,) = struct.unpack_from('<I', payload, 4)
+        header = json.loads(payload[8:8 + header_length])
+        count = header['count']
+        offset = 8 + header_length
+        columns = {}
+        self.assertEqual(header['index_sizes'], {'section': 2, 'row': 2, 'number': 2})
+        for name, code, size in [('ids', 'q', 8), ('section', 'H', 2), ('row', 'H', 2), ('number', 'H', 2),
+                                 ('x', 'f', 4), ('y', 'f', 4)]:
+            columns[name] = list(struct.unpack_from(f'<{count}{code}', payload, offset))
+            offset += count * size
+        width = (count + 7) // 8
+        self.assertEqual(len(payload), offset + 2 * width)
+
+        data = json.loads(self.fetch().content)
+        self.assertEqual(header['rows'], data['rows'])
+        self.assertEqual(header['sections'], data['sections'])
+        for name in ('ids', 'section', 'row', 'number'):
+            self.assertEqual(columns[name], data['seats'][name])
+        for name in ('x', 'y'):
+            self.assertEqual([round(value, 2) for value in columns[name]], data['seats'][name])
+        self.assertEqual(payload[offset:offset + width], base64.b64decode(data['available']))
+        self.assertEqual(payload[offset + width:], base64.b64decode(data['occupied']))
+
+    def test_wide_indexes(self):
+        count = 70000
+        seat_layout = {
+            'event_id': 1, 'count': count, 'sections': {'ids': [1], 'names': ['Floor'], 'colors': ['#000000']},
+            'rows': ['A'], 'numbers': [str(number) for number in range(count)],
+            'seats': {
+                'ids': list(range(count)), 'section': [0] * count, 'row': [0] * count,
+                'number': list(range(count)), 'x': [1.0] * count, 'y': [1.0] * count,
+            },
+            'available': bytes((count + 7) // 8), 'occupied': bytes((count + 7) // 8),
+        }
+        payload = layout.to_binary(seat_layout)
+        (header_length,) = struct.unpack_from('<I', payload, 4)
+        header = json.loads(payload[8:8 + header_length])
+        self.assertEqual(header['index_sizes'], {'section': 2, 'row': 2, 'number': 4})
+        offset = 8 + header_length + count * (8 + 2 + 2)
+        self.assertEqual(struct.unpack_from('<2I', payload, offset + 65536 * 4), (65536, 65537))
+
+
+class SeatGridTests(TestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        self.seats = [
+            {'id': position, 'x': generator.uniform(0, 100), 'y': generator.uniform(0, 100)}
+            for position in range(400)
+        ]
+        self.grid = spatial.SeatGrid(self.seats)
+
+    def brute_force(self, x, y, max_distance=None, count=1):
+        ranked = sorted((math.hypot(seat['x'] - x, seat['y'] - y), seat['id']) for seat in self.seats)
+        return [seat_id for distance, seat_id in ranked[:count] if max_distance is None or distance <= max_distance]
+
+    def test_nearest_matches_brute_force(self):
+        generator = random.Random(11)
+        for _ in range(200):
+            x, y = generator.uniform(-10, 110), generator.uniform(-10, 110)
+            count = generator.randint(1, 5)
+            max_distance = generator.choice([None, 1.0, 5.0])
+            found = self.grid.nearest(x, y, max_distance=max_distance, count=count)
+            self.assertEqual([seat['id'] for seat in found], self.brute_force(x, y, max_distance, count))
+        self.assertEqual(spatial.SeatGrid([]).nearest(50, 50), [])
+
+    def test_rect_matches_brute_force(self):
+        found = self.grid.in_rect(60, 35.5, 20, 10)
+        expected = [seat['id'] for seat in self.seats if 20 <= seat['x'] <= 60 and 10 <= seat['y'] <= 35.5]
+        self.assertEqual([seat['id'] for seat in found], expected)
+        self.assertEqual(len(self.grid.in_rect(0, 0, 100, 100, limit=7)), 7)
+
+    def test_nearest_seat_view(self):
+        event = Event.objects.create(name='Derby', venue='Stadium', date=date.today() + timedelta(days=10))
+        section = Section.objects.create(event=event, name='Home')
+        near = Seat.objects.create(section=section, row='A', seat_number='1', x_coordinate=40, y_coordinate=40)
+        Seat.objects.create(section=section, row='A', seat_number='2', x_coordinate=60, y_coordinate=40)
+        url = reverse('seating:nearest_seat', args=[event.id])
+        data = json.loads(self.client.get(url, {'x': 43, 'y': 44}).content)
+        self.assertEqual([(seat['id'], seat['distance']) for seat in data['seats']], [(near.id, 5.0)])
+        self.assertEqual(json.loads(self.client.get(url, {'x': 43, 'y': 44, 'max_distance': 4}).content)['seats'], [])
+        self.assertEqual(self.client.get(url, {'x': 'left', 'y': 44}).status_code, 400)
+
+
+class SeatMapImagingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def store(self, name, image):
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def open(self, path):
+        with default_storage.open(path, 'rb') as handle:
+            return Image.open(io.BytesIO(handle.read())).size
+
+    def test_pyramid_levels_and_edge_tiles(self):
+        tiles = imaging.build_pyramid(Image.new('RGB', (600, 300), 'white'), 'pyramid')
+        self.assertEqual(tiles['max_level'], 10)
+        extension = tiles['format']
+        self.assertEqual(sorted(default_storage.listdir('pyramid')[0], key=int), [str(level) for level in range(11)])
+        # Full resolution: 3 x 2 tiles, cropped at the right and bottom edges
+        self.assertEqual(len(default_storage.listdir('pyramid/10')[1]), 6)
+        self.assertEqual(self.open(f'pyramid/10/0_0.{extension}'), (256, 256))
+        self.assertEqual(self.open(f'pyramid/10/2_1.{extension}'), (88, 44))
+        self.assertEqual(self.open(f'pyramid/9/1_0.{extension}'), (44, 150))
+        self.assertEqual(self.open(f'pyramid/0/0_0.{extension}'), (1, 1))
+
+    def test_variants_only_downscale(self):
+        variants = imaging.build_variants(Image.new('RGB', (1000, 500), 'white'), 'variants')
+        self.assertEqual([(variant['width'], variant['height']) for variant in variants], [(480, 240), (960, 480)])
+        self.assertEqual(self.open('variants/480.jpg'), (480, 240))
+        self.assertTrue(all(variant['jpeg'].endswith(f"/{variant['width']}.jpg") for variant in variants))
+
+    def test_dominant_colors(self):
+        image = Image.new('RGB', (40, 40), (255, 0, 0))
+        image.paste((0, 0, 255), (0, 0, 20, 20))
+        self.assertEqual(imaging.dominant_colors(image, count=2), ['#ff0000', '#0000ff'])
+
+    def test_reprocessing_removes_earlier_output(self):
+        event = Event.objects.create(name='Derby', venue='Stadium', date=date.today() + timedelta(days=10))
+        results = []
+        for name, color in (('first', 'red'), ('second', 'blue')):
+            image_name = self.store(f'seat_maps/{name}.png', Image.new('RGB', (300, 200), color))
+            Event.objects.filter(pk=event.pk).update(seat_map_image=image_name)
+            job = ImageProcessingJob.objects.create(event=event, image_name=image_name)
+            results.append(imaging.process_seat_map(event.id, image_name))
+            with self.captureOnCommitCallbacks(execute=True):
+                pipeline.record_result(job, results[-1])
+        first, second = results
+        self.assertFalse(default_storage.exists(first['path']))
+        self.assertEqual(default_storage.listdir(f'{imaging.PROCESSED_ROOT}/{event.id}')[0], [second['path'].rsplit('/', 1)[1]])
+        self.assertEqual(SeatMapAsset.objects.get(event=event).tiles, second['tiles'])
+
+
+class InlineExecutor(Executor):
+    """Runs submitted work in the calling process"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ImageWorkerTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.event = Event.objects.create(name='Derby', venue='Stadium', date=date.today() + timedelta(days=10))
+
+    def upload(self, color='red'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), color).save(buffer, 'PNG')
+        self.event.seat_map_image.save(f'{color}.png', ContentFile(buffer.getvalue()))
+        return ImageProcessingJob.objects.get(event=self.event, image_name=self.event.seat_map_image.name)
+
+    def test_upload_is_queued_once(self):
+        job = self.upload()
+        self.assertEqual(job.status, ImageProcessingJob.STATUS_PENDING)
+        pipeline.enqueue(self.event.pk, job.image_name)
+        self.event.save()
+        self.assertEqual(ImageProcessingJob.objects.count(), 1)
+
+    def test_claim_marks_jobs_running(self):
+        first = self.upload('red')
+        second = self.upload('blue')
+        claimed = pipeline.claim_jobs(1)
+        self.assertEqual([job.pk for job in claimed], [first.pk])
+        self.assertEqual(claimed[0].status, ImageProcessingJob.STATUS_RUNNING)
+        self.assertIsNotNone(claimed[0].started_at)
+        self.assertEqual([job.pk for job in pipeline.claim_jobs(5)], [second.pk])
+        self.assertEqual(pipeline.claim_jobs(5), [])
+
+    def test_batch_records_the_asset(self):
+        job = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(pipeline.process_batch(InlineExecutor(), 4), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageProcessingJob.STATUS_DONE)
+        asset = SeatMapAsset.objects.get(event=self.event)
+        self.assertEqual((asset.source, asset.width, asset.height), (job.image_name, 300, 200))
+        self.assertFalse(pipeline.needs_processing(self.event))
+        self.assertEqual(pipeline.process_batch(InlineExecutor(), 4), 0)
+
+    def test_failures_are_retried_then_given_up(self):
+        job = self.upload()
+        default_storage.delete(job.image_name)
+        with self.assertLogs('seating.pipeline', 'ERROR'):
+            for attempt in range(1, pipeline.MAX_ATTEMPTS + 1):
+                self.assertEqual(pipeline.process_batch(InlineExecutor(), 4), 1)
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, ImageProcessingJob.STATUS_FAILED)
+        self.assertTrue(job.error)
+        self.assertEqual(pipeline.process_batch(InlineExecutor(), 4), 0)
+        self.assertFalse(SeatMapAsset.objects.exists())
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = self.upload('red')
+        recent = self.upload('blue')
+        pipeline.claim_jobs(2)
+        ImageProcessingJob.objects.filter(pk=stale.pk).update(
+            started_at=timezone.now() - pipeline.STALE_AFTER - timedelta(minutes=1)
+        )
+        self.assertEqual(pipeline.requeue_stale_jobs(), 1)
+        statuses = dict(ImageProcessingJob.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            statuses, {stale.pk: ImageProcessingJob.STATUS_PENDING, recent.pk: ImageProcessingJob.STATUS_RUNNING}
+        )
+
+    def test_worker_command_uses_a_process_pool(self):
+        job = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_image_worker', processes=1, once=True, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageProcessingJob.STATUS_DONE)
+        self.assertTrue(SeatMapAsset.objects.filter(event=self.event).exists())
+
+
+class AttendeeImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        day = date.today() + timedelta(days=7)
+        cls.event = Event.objects.create(name='Opera', venue='House', date=day)
+        cls.other = Event.objects.create(name='Ballet', venue='House', date=day)
+        for event in (cls.event, cls.other):
+            section = Section.objects.create(event=event, name='Stalls')
+            for number in range(1, 4):
+                Seat.objects.create(
+                    section=section, row='A', seat_number=str(number), x_coordinate=number * 10, y_coordinate=10
+                )
+        cls.moving = Attendee.objects.create(
+            name='Mona Ving', email='mona@example.com', ticket_number='TCK-MOVE',
+            seat=Seat.objects.get(section__event=cls.other, seat_number='1')
+        )
+
+    def import_rows(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False) as handle:
+            writer = csv.DictWriter(handle, fieldnames=['name', 'email', 'ticket_number', 'section', 'row', 'seat'])
+            writer.writeheader()
+            writer.writerows(rows)
+        self.addCleanup(os.remove, handle.name)
+        stderr = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_attendees', handle.name, '--event', str(self.event.id), *args, stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def row(self, ticket_number, seat, name='Guest'):
+        return {
+            'name': name, 'email': 'guest@example.com', 'ticket_number': ticket_number,
+            'section': 'Stalls', 'row': 'A', 'seat': seat
+        }
+
+    def test_existing_ticket_needs_upsert(self):
+        errors = self.import_rows([self.row('TCK-NEW', '1'), self.row('TCK-MOVE', '2')])
+        self.assertIn('ticket TCK-MOVE already exists', errors)
+        self.assertEqual(Attendee.objects.get(ticket_number='TCK-MOVE').seat.section.event_id, self.other.id)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.occupied_seats, 1)
+
+    def test_upsert_moves_ticket_between_events(self):
+        versions = {event.id: caching.get_event_version(event.id) for event in (self.event, self.other)}
+        self.import_rows([self.row('TCK-NEW', '1'), self.row('TCK-MOVE', '2', name='Mona Moved')], '--upsert')
+
+        moved = Attendee.objects.select_related('seat__section').get(ticket_number='TCK-MOVE')
+        self.assertEqual((moved.name, moved.seat.section.event_id), ('Mona Moved', self.event.id))
+        # The event the ticket left is refreshed as well: counters, search index and caches
+        self.event.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.event.occupied_seats, self.other.occupied_seats), (2, 0))
+        self.assertEqual(search.search_attendee_ids('TCK-MOVE', event_id=self.other.id), [])
+        self.assertEqual(search.search_attendee_ids('TCK-MOVE', event_id=self.event.id), [moved.id])
+        for event_id, version in versions.items():
+            self.assertNotEqual(caching.get_event_version(event_id), version)
+
+
+class PopulateSampleDataTests(TestCase):
+    def populate(self, **options):
+        call_command('populate_sample_data', stdout=io.StringIO(), **{'seats_per_row': 5, 'rows': 2, **options})
+
+    def layout(self):
+        """Everything generated except ids, which the tickets and emails embed"""
+        return list(Seat.objects.order_by('section__event__name', 'section__name', 'row', 'seat_number').values_list(
+            'section__event__name', 'section__event__date', 'section__name', 'row', 'seat_number',
+            'x_coordinate', 'y_coordinate', 'attendee__name'
+        ))
+
+    def test_tickets_are_unique_across_events(self):
+        self.populate(events=6, sections=2, occupancy=1)
+        tickets = list(Attendee.objects.values_list('ticket_number', flat=True))
+        self.assertEqual(len(tickets), 6 * 2 * 10)
+        self.assertEqual(len(set(tickets)), len(tickets))
+        self.assertEqual(Event.objects.filter(name__endswith=' #2').count(), 2)
+        self.assertEqual(occupancy.find_mismatches(), [])
+
+    def test_same_seed_same_data(self):
+        self.populate(events=2, sections=2, seed=4)
+        first = self.layout()
+        self.populate(events=2, sections=2, seed=4)
+        self.assertEqual(self.layout(), first)
+        self.populate(events=2, sections=2, seed=5)
+        self.assertNotEqual(self.layout(), first)
+
+    def test_occupancy(self):
+        self.populate(events=1, sections=4, rows=10, seats_per_row=10, occupancy=0.25, seed=1)
+        self.assertAlmostEqual(Attendee.objects.count() / Seat.objects.count(), 0.25, delta=0.05)
+        self.populate(events=1, occupancy=0)
+        self.assertFalse(Attendee.objects.exists())
+        with self.assertRaises(CommandError):
+            self.populate(occupancy=1.5)
+
+    def test_append_keeps_existing_data(self):
+        self.populate(events=1, sections=1, seed=2)
+        seats = Seat.objects.count()
+        self.populate(events=1, sections=1, seed=2, append=True)
+        self.assertEqual((Event.objects.count(), Seat.objects.count()), (2, 2 * seats))
+        self.populate(events=1, sections=1, seed=2)
+        self.assertEqual((Event.objects.count(), Seat.objects.count()), (1, seats))
+
+
+class EndpointQueryBudgetTests(TestCase):
+    """Every route must have a benchmark scenario and stay within its query budget"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_event('Health Summit', sections=3, rows=4, seats_per_row=10, booked=28)
+        create_event('Robotics Expo', days=20, sections=3, rows=4, seats_per_row=10, booked=28)
+
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual(benchmarks.missing_scenarios(), [])
+
+    def test_every_route_has_a_query_budget(self):
+        missing = [name for name in benchmarks.route_names() if name not in benchmarks.QUERY_BUDGETS]
+        self.assertEqual(missing, [])
+
+    def test_query_budgets(self):
+        results, failures = benchmarks.run_benchmarks(iterations=2, check_latency=False)
+        self.assertEqual(failures, [], results)
+
+
+class RequestMetricsTests(TestCase):
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('seating:index'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    @override_settings(SEATING_SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_sql(self):
+        with self.assertLogs('seating.requests', 'WARNING') as logs:
+            self.client.get(reverse('seating:index'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertTrue(entry['slow'])
+        self.assertEqual(len(entry['sql']), entry['queries'])
+
+
+class AttendeeExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', sections=2, rows=2, seats_per_row=5, booked=7)
+        cls.attendee_count = Attendee.objects.count()
+        cls.staff = get_user_model().objects.create_user('organiser', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def export(self, export_format):
+        response = self.client.get(
+            reverse('seating:export_attendees', args=[self.event.id]), {'format': export_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(tuple(rows[0]), export.COLUMNS)
+        self.assertEqual(len(rows) - 1, self.attendee_count)
+
+    def test_ndjson_export(self):
+        records = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(len(records), self.attendee_count)
+        self.assertEqual(set(records[0]), set(export.COLUMNS))
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('seating:export_attendees', args=[self.event.id]), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_staff(self):
+        url = reverse('seating:export_attendees', args=[self.event.id])
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(get_user_model().objects.create_user('visitor'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+@override_settings(SEATING_API_TOKENS=['gate-token'])
+class CheckInTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', sections=2, seats_per_row=5, booked=3)
+        create_event('Robotics Expo', booked=2)
+        cls.tickets = list(
+            Attendee.objects.filter(seat__section__event=cls.event).order_by('id').values_list('ticket_number', flat=True)[:3]
+        )
+        cls.other_ticket = Attendee.objects.exclude(seat__section__event=cls.event).values_list('ticket_number', flat=True).first()
+
+    def post(self, name, data, token='gate-token'):
+        return self.client.post(
+            reverse(name, args=[self.event.id]), json.dumps(data), content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+    def test_requires_api_token(self):
+        for name in ('seating:check_in', 'seating:check_in_batch'):
+            self.assertEqual(self.post(name, {'ticket_number': self.tickets[0]}, token='guess').status_code, 401)
+        self.assertIsNone(Attendee.objects.get(ticket_number=self.tickets[0]).checked_in_at)
+
+    def test_single_scan(self):
+        response = self.post('seating:check_in', {'ticket_number': self.tickets[0], 'gate': 'north'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], checkin.CHECKED_IN)
+        self.assertIsNotNone(Attendee.objects.get(ticket_number=self.tickets[0]).checked_in_at)
+
+        response = self.post('seating:check_in', {'ticket_number': self.tickets[0], 'gate': 'south'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['attendee']['gate'], 'north')
+
+    def test_ticket_of_another_event(self):
+        response = self.post('seating:check_in', {'ticket_number': self.other_ticket})
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_is_idempotent(self):
+        scans = [
+            {'ticket_number': self.tickets[0], 'scanned_at': '2026-01-01T18:00:00Z', 'gate': 'a'},
+            {'ticket_number': self.tickets[1], 'scanned_at': '2026-01-01T18:01:00Z', 'gate': 'a'},
+            {'ticket_number': self.tickets[1], 'scanned_at': '2026-01-01T18:00:30Z', 'gate': 'b'},
+            {'ticket_number': self.other_ticket},
+            {'ticket_number': self.tickets[2], 'scanned_at': 'yesterday'},
+        ]
+        summary = self.post('seating:check_in_batch', {'scans': scans}).json()['summary']
+        self.assertEqual(summary[checkin.CHECKED_IN], 2)
+        self.assertEqual(summary[checkin.CONFLICT], 1)
+        self.assertEqual(summary[checkin.NOT_FOUND], 1)
+        self.assertEqual(summary[checkin.INVALID], 1)
+        # The earliest scan of a ticket wins
+        self.assertEqual(Attendee.objects.get(ticket_number=self.tickets[1]).check_in_gate, 'b')
+
+        summary = self.post('seating:check_in_batch', {'scans': scans[:3]}).json()['summary']
+        self.assertEqual(summary[checkin.DUPLICATE], 2)
+        self.assertEqual(summary[checkin.CONFLICT], 1)
+
+    def test_batch_keeps_check_in_made_meanwhile(self):
+        apply_claims = checkin._apply_claims
+
+        def racing_scan(claims):
+            # A gate scans the ticket after the batch looked it up
+            checkin.check_in(self.event.id, self.tickets[0], gate='north')
+            return apply_claims(claims)
+
+        scans = [{'ticket_number': ticket, 'gate': 'south'} for ticket in self.tickets[:2]]
+        with mock.patch.object(checkin, '_apply_claims', racing_scan):
+            results = checkin.check_in_batch(self.event.id, scans)
+        self.assertEqual([result['status'] for result in results], [checkin.CONFLICT, checkin.CHECKED_IN])
+        self.assertEqual(results[0]['attendee']['gate'], 'north')
+        self.assertEqual(Attendee.objects.get(ticket_number=self.tickets[0]).check_in_gate, 'north')
+        self.assertEqual(Attendee.objects.get(ticket_number=self.tickets[1]).check_in_gate, 'south')
+
+
+class LiveOccupancyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', sections=2, rows=2, seats_per_row=5, booked=6)
+
+    def test_snapshot(self):
+        response = self.client.get(reverse('seating:live_occupancy', args=[self.event.id]), {'once': 1})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        event_type, data = response.content.decode().strip().split('\n')
+        self.assertEqual(event_type, 'event: snapshot')
+        snapshot = json.loads(data[len('data: '):])
+        self.assertEqual(snapshot['overall']['occupied_seats'], self.event.occupied_seats)
+        self.assertEqual(len(snapshot['sections']), 2)
+
+    def test_changes_are_diffed(self):
+        counters = live.read_counters(self.event.id)
+        seats = live.read_seat_states(self.event.id)
+        self.assertIsNone(live.diff_counters(counters, counters))
+        self.assertEqual(live.diff_seats(seats, seats), [])
+
+        attendee = Attendee.objects.filter(seat__section__event=self.event).select_related('seat').first()
+        attendee.delete()
+        change = live.diff_counters(counters, live.read_counters(self.event.id))
+        self.assertEqual(change['occupied_delta'], -1)
+        self.assertEqual(len(change['sections']), 1)
+        self.assertEqual(
+            live.diff_seats(seats, live.read_seat_states(self.event.id)),
+            [{'id': attendee.seat_id, 'is_available': True, 'occupied': False}]
+        )
+
+
+class EventPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        day = date.today() + timedelta(days=5)
+        # Several events per day, some without a start time, to exercise the tie-breakers
+        for index in range(14):
+            Event.objects.create(
+                name=f'Event {index}', venue='Hall', date=day - timedelta(days=index // 4),
+                time=None if index % 3 == 0 else time(9 + index % 2)
+            )
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('seating:search_events'), {'date_filter': 'all', 'limit': 4, **params})
+        return response.status_code, json.loads(response.content)
+
+    def test_cursor_walks_every_event_once(self):
+        seen = []
+        cursor = ''
+        while True:
+            status, data = self.fetch(cursor=cursor)
+            self.assertEqual(status, 200)
+            seen.extend(result['id'] for result in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                self.assertFalse(data['has_more'])
+                break
+        expected = list(Event.objects.order_by(*pagination.ORDERING).values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_total(self):
+        status, data = self.fetch(with_total=1)
+        self.assertEqual((data['total'], data['total_is_exact']), (14, True))
+
+    def test_invalid_cursor(self):
+        status, data = self.fetch(cursor='not-a-cursor')
+        self.assertEqual(status, 400)
+        self.assertFalse(data['success'])
+
+
+class SeatBatchLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_event('Health Summit', rows=2, seats_per_row=5, booked=4)
+        cls.seats = list(Seat.objects.order_by('id'))
+
+    def fetch(self, params):
+        response = self.client.get(reverse('seating:seats_info'), params)
+        return response.status_code, json.loads(response.content)
+
+    def test_ids_in_requested_order_with_inline_errors(self):
+        first, second = self.seats[0], self.seats[3]
+        with self.assertNumQueries(1):
+            self.fetch({'ids': f'{second.id},{first.id}'})
+        # Ids missing from the live tables are looked up in the archive, in one more query
+        with self.assertNumQueries(2):
+            status, data = self.fetch({'ids': f'{second.id},abc,{first.id},0,{second.id}'})
+        self.assertEqual(status, 200)
+        self.assertEqual([result['id'] for result in data['results']], [second.id, 'abc', first.id, 0])
+        self.assertEqual([result['success'] for result in data['results']], [True, False, True, False])
+        self.assertEqual(data['found'], 2)
+
+    def test_row(self):
+        seat = self.seats[0]
+        status, data = self.fetch({'section': seat.section_id, 'row': seat.row})
+        expected = Seat.objects.filter(section_id=seat.section_id, row=seat.row).order_by('x_coordinate', 'id')
+        self.assertEqual([result['id'] for result in data['results']], [seat.id for seat in expected])
+
+    def test_missing_parameters(self):
+        self.assertEqual(self.fetch({})[0], 400)
+        self.assertEqual(self.fetch({'section': 'x', 'row': 'A'})[0], 400)
+
+
+@override_settings(SEATING_API_TOKENS=['sales-token'])
+class SeatHoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', seats_per_row=6)
+        cls.seat_ids = list(Seat.objects.order_by('id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = self.client_class(headers={'Authorization': 'Bearer sales-token'})
+
+    def hold(self, seat_ids, **data):
+        response = self.client.post(
+            reverse('seating:hold_seats', args=[self.event.id]),
+            json.dumps({'seat_ids': seat_ids, **data}), content_type='application/json'
+        )
+        return response.status_code, json.loads(response.content)
+
+    def test_overlapping_hold_is_refused(self):
+        status, data = self.hold(self.seat_ids[:2], holder='first')
+        self.assertEqual((status, data['status']), (201, reservations.HELD))
+        status, data = self.hold(self.seat_ids[1:3], holder='second')
+        self.assertEqual((status, data['seat_ids']), (409, [self.seat_ids[1]]))
+        # All or nothing: the free seat of the refused group is not held
+        self.assertFalse(SeatHold.objects.filter(seat_id=self.seat_ids[2]).exists())
+
+    def test_requires_api_token(self):
+        token = self.hold(self.seat_ids[:1])[1]['token']
+        anonymous = self.client_class()
+        response = anonymous.post(
+            reverse('seating:hold_seats', args=[self.event.id]),
+            json.dumps({'seat_ids': self.seat_ids[1:2]}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        for name in ('seating:confirm_hold', 'seating:release_hold'):
+            self.assertEqual(anonymous.post(reverse(name, args=[token])).status_code, 401)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_expired_hold_can_be_taken(self):
+        self.hold(self.seat_ids[:1])
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        status, data = self.hold(self.seat_ids[:1], holder='late')
+        self.assertEqual(status, 201)
+        self.assertEqual(SeatHold.objects.get().holder, 'late')
+
+    def test_confirm_books_the_seats_once(self):
+        token = self.hold(self.seat_ids[:2])[1]['token']
+        attendees = [{'seat_id': seat_id, 'name': f'Buyer {seat_id}', 'email': 'buyer@example.com'} for seat_id in self.seat_ids[:2]]
+        url = reverse('seating:confirm_hold', args=[token])
+        response = self.client.post(url, json.dumps({'attendees': attendees}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Attendee.objects.count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.occupied_seats, 2)
+
+        response = self.client.post(url, json.dumps({'attendees': attendees}), content_type='application/json')
+        self.assertEqual(response.status_code, 410)
+        # Booked seats cannot be held again
+        self.assertEqual(self.hold(self.seat_ids[:1])[0], 409)
+
+    def confirm(self, token, seat_ids):
+        attendees = [{'seat_id': seat_id, 'name': f'Buyer {seat_id}'} for seat_id in seat_ids]
+        response = self.client.post(
+            reverse('seating:confirm_hold', args=[token]), json.dumps({'attendees': attendees}),
+            content_type='application/json'
+        )
+        return response.status_code, json.loads(response.content)
+
+    def test_confirm_tells_booked_seats_from_taken_tickets(self):
+        token = self.hold(self.seat_ids[:2])[1]['token']
+        Attendee.objects.create(
+            name='Walk-in', email='walkin@example.com', seat_id=self.seat_ids[1],
+            ticket_number=f'TCK-{self.event.id}-AAAAAAAAAA'
+        )
+        with mock.patch.object(reservations.secrets, 'token_hex', return_value='aaaaaaaaaa'):
+            status, data = self.confirm(token, self.seat_ids[:2])
+        self.assertEqual((status, data['status'], data['seat_ids']), (409, reservations.CONFLICT, [self.seat_ids[1]]))
+
+        Attendee.objects.filter(seat_id=self.seat_ids[1]).update(seat_id=self.seat_ids[5])
+        with mock.patch.object(reservations.secrets, 'token_hex', return_value='aaaaaaaaaa'):
+            status, data = self.confirm(token, self.seat_ids[:2])
+        self.assertEqual((status, data['status']), (503, reservations.TICKET_CLASH))
+        self.assertEqual(SeatHold.objects.filter(token=token).count(), 2)
+
+        # A clash is retried with fresh numbers
+        with mock.patch.object(reservations.secrets, 'token_hex', side_effect=['aaaaaaaaaa', 'bbbbbbbbbb', 'cccccccccc']):
+            status, data = self.confirm(token, self.seat_ids[:2])
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [attendee['ticket_number'] for attendee in data['attendees']],
+            [f'TCK-{self.event.id}-BBBBBBBBBB', f'TCK-{self.event.id}-CCCCCCCCCC']
+        )
+
+    def test_release_and_sweep(self):
+        token = self.hold(self.seat_ids[:2])[1]['token']
+        self.hold(self.seat_ids[2:4])
+        self.hold(self.seat_ids[4:5])
+        response = self.client.post(reverse('seating:release_hold', args=[token]))
+        self.assertEqual(json.loads(response.content)['released'], 2)
+
+        SeatHold.objects.filter(seat_id=self.seat_ids[4]).update(expires_at=timezone.now())
+        self.assertEqual(reservations.release_expired(batch_size=1), 1)
+        self.assertEqual(sorted(SeatHold.objects.values_list('seat_id', flat=True)), self.seat_ids[2:4])
+
+
+class BestAvailableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(name='Recital', venue='Hall', date=date.today())
+        section = Section.objects.create(event=cls.event, name='Stalls')
+        # Row A: seats 1-10 one unit apart, with an aisle between 5 and 6
+        cls.seats = {}
+        for number in range(1, 11):
+            x = 40 + number + (5 if number > 5 else 0)
+            cls.seats[number] = Seat.objects.create(
+                section=section, row='A', seat_number=str(number), x_coordinate=x, y_coordinate=20
+            )
+        for number in (4, 9):
+            Attendee.objects.create(
+                name=f'Guest {number}', email='guest@example.com', seat=cls.seats[number], ticket_number=f'BA-{number}'
+            )
+
+    def find(self, **params):
+        response = self.client.get(reverse('seating:best_available_seats', args=[self.event.id]), params)
+        return json.loads(response.content)['options']
+
+    def numbers(self, options):
+        return [option['seats'] for option in options]
+
+    def test_blocks_stay_within_free_runs(self):
+        # Free runs: 1-3, 5 (aisle follows), 6-8, 10
+        self.assertEqual(self.numbers(self.find(party=3, focus_x=50, focus_y=0)), [['6', '7', '8'], ['1', '2', '3']])
+        self.assertEqual(self.find(party=4), [])
+
+    def test_nearest_window_of_a_run(self):
+        options = self.find(party=2, focus_x=40, focus_y=20, limit=1)
+        self.assertEqual(self.numbers(options), [['1', '2']])
+
+    def test_held_seats_are_skipped(self):
+        reservations.hold_seats(self.event.id, [self.seats[7].id])
+        self.assertEqual(self.numbers(self.find(party=3)), [['1', '2', '3']])
+
+
+class DatabaseProfileTests(TestCase):
+    def test_production_pragmas_apply_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {
+                **connections['default'].settings_dict, 'NAME': os.path.join(directory, 'profile.sqlite3'),
+                'OPTIONS': settings.SQLITE_PRODUCTION_OPTIONS,
+            }
+            wrapper = type(connections['default'])(settings_dict, alias='profile')
+            try:
+                with wrapper.cursor() as cursor:
+                    for pragma, expected in (('journal_mode', 'wal'), ('synchronous', 1), ('temp_store', 2)):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        self.assertEqual(cursor.fetchone()[0], expected)
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
+
+
+@override_settings(SEATING_REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_alias(self, write_first=False, cookies=None):
+        """Database a replica-read view would read from, behind the stickiness middleware"""
+        aliases = []
+
+        @routers.replica_reads
+        def view(request):
+            if write_first:
+                self.router.db_for_write(Event)
+            aliases.append(self.router.db_for_read(Event))
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        response = routers.PrimaryStickinessMiddleware(view)(request)
+        return aliases[0], response
+
+    def test_only_replica_read_views_use_replicas(self):
+        self.assertEqual(self.router.db_for_read(Event), 'default')
+        self.assertEqual(self.read_alias()[0], 'replica')
+        with override_settings(SEATING_REPLICA_DATABASES=[]):
+            self.assertEqual(self.read_alias()[0], 'default')
+
+    def test_reads_follow_a_write_to_the_primary(self):
+        alias, response = self.read_alias(write_first=True)
+        self.assertEqual(alias, 'default')
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+
+    def test_sticky_cookie_pins_reads_to_the_primary(self):
+        cookie = {routers.STICKY_COOKIE: str(timezone.now().timestamp() + 60)}
+        self.assertEqual(self.read_alias(cookies=cookie)[0], 'default')
+        expired = {routers.STICKY_COOKIE: str(timezone.now().timestamp() - 1)}
+        self.assertEqual(self.read_alias(cookies=expired)[0], 'replica')
+
+    @override_settings(SEATING_REPLICA_DATABASES=['replica', 'replica_2', 'replica_3'])
+    def test_one_replica_per_request(self):
+        picked = set()
+        for _ in range(20):
+            with routers.replica_block():
+                aliases = {self.router.db_for_read(model) for model in (Event, Attendee, Seat) for _ in range(5)}
+            self.assertEqual(len(aliases), 1)
+            picked |= aliases
+        self.assertGreater(len(picked), 1)
+
+    def test_attendee_index_reads_follow_the_router(self):
+        with mock.patch.object(routers.ReplicaRouter, 'db_for_read', return_value='default') as db_for_read:
+            self.assertTrue(search.can_search('zelda'))
+            search.search_attendee_ids('zelda')
+        self.assertEqual(db_for_read.call_args_list, [mock.call(Attendee), mock.call(Attendee)])
+
+    @override_settings(SEATING_API_TOKENS=['gate-token'])
+    def test_write_request_sets_sticky_cookie(self):
+        event = Event.objects.create(name='Gig', venue='Club', date=date.today())
+        section = Section.objects.create(event=event, name='Floor')
+        seat = Seat.objects.create(section=section, row='A', seat_number='1', x_coordinate=10, y_coordinate=10)
+        Attendee.objects.create(name='Ann', email='ann@example.com', seat=seat, ticket_number='RR-1')
+        response = self.client.post(
+            reverse('seating:check_in', args=[event.id]), {'ticket_number': 'RR-1'}, content_type='application/json',
+            headers={'Authorization': 'Bearer gate-token'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(routers.STICKY_COOKIE, response.cookies)
+        response = self.client.get(reverse('seating:search_events'))
+        self.assertNotIn(routers.STICKY_COOKIE, response.cookies)
+
+
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Replica reads against a real second SQLite database"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'replica.sqlite3')
+        connections.settings['replica'] = connections.configure_settings({
+            **connections.settings,
+            'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.path},
+        })['replica']
+        self.addCleanup(self.remove_replica)
+        self.open_replica()
+        search.reset_index_state()
+        self.addCleanup(search.reset_index_state)
+        cache.clear()
+        event = create_event('Health Summit', booked=2)
+        self.attendee = Attendee.objects.filter(seat__section__event=event).order_by('id').first()
+        self.attendee.name = 'Zelda Quist'
+        self.attendee.save()
+        self.sync_replica()
+        # The primary moves on after the sync
+        self.attendee.name = 'Wanda Quist'
+        self.attendee.save()
+
+    def open_replica(self):
+        # The alias is added after class setup, so it is not in ``databases``;
+        # connect explicitly rather than through ensure_connection()
+        connections['replica'].close()
+        connections['replica'].connect()
+
+    def remove_replica(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def sync_replica(self):
+        connections['default'].ensure_connection()
+        replica = sqlite3.connect(self.path)
+        try:
+            connections['default'].connection.backup(replica)
+        finally:
+            replica.close()
+
+    def found(self, query):
+        response = self.client.get(reverse('seating:search_attendee'), {'q': query})
+        return [result['name'] for result in response.json()['results']]
+
+    @override_settings(SEATING_REPLICA_DATABASES=['replica'])
+    def test_search_reads_the_replica(self):
+        self.assertTrue(search.index_available('replica'))
+        self.assertEqual(self.found('Zelda'), ['Zelda Quist'])
+        self.assertEqual(self.found('Wanda'), [])
+
+    def test_search_reads_the_primary_without_replicas(self):
+        self.assertEqual(self.found('Zelda'), [])
+        self.assertEqual(self.found('Wanda'), ['Wanda Quist'])
+
+    @override_settings(SEATING_REPLICA_DATABASES=['replica'])
+    def test_missing_index_is_checked_again(self):
+        with connections['replica'].cursor() as cursor:
+            search.drop_index_table(cursor)
+        self.assertFalse(search.index_available('replica'))
+        # Substring fallback still answers from the replica
+        self.assertEqual(self.found('Zelda'), ['Zelda Quist'])
+
+        self.sync_replica()
+        self.open_replica()
+        self.assertFalse(search.index_available('replica'))
+        with mock.patch.object(search, 'MISSING_INDEX_RECHECK_SECONDS', 0):
+            self.assertTrue(search.index_available('replica'))
+        self.assertEqual(self.found('Wanda'), ['Wanda Quist'])
+
+    def test_migrations_build_indexes_on_the_migrated_database(self):
+        with mock.patch.object(search, 'rebuild_index', wraps=search.rebuild_index) as rebuild_index, \
+                mock.patch.object(search, 'rebuild_event_index', wraps=search.rebuild_event_index) as rebuild_event_index:
+            connections['replica'].close()
+            os.remove(self.path)
+            self.open_replica()
+            call_command('migrate', 'seating', database='replica', verbosity=0)
+        rebuild_index.assert_called_once_with(using='replica')
+        rebuild_event_index.assert_called_once_with(using='replica')
+        self.assertTrue(search.index_available('replica'))
+        self.assertTrue(search.event_index_available('replica'))
+
+
+class EventArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.past = create_event('Health Summit', days=-30, sections=2, rows=2, seats_per_row=4, booked=5)
+        cls.upcoming = create_event('Robotics Expo', days=30, sections=2, rows=2, seats_per_row=4, booked=5)
+        cls.seat = Seat.objects.filter(section__event=cls.past, attendee__isnull=False).select_related('attendee').first()
+        reservations.hold_seats(cls.past.id, [Seat.objects.filter(section__event=cls.past, attendee__isnull=True).first().id])
+
+    def setUp(self):
+        cache.clear()
+        caching.version_cache().clear()
+
+    def get(self, name, *args):
+        response = self.client.get(reverse(f'seating:{name}', args=args))
+        return response.status_code, json.loads(response.content)
+
+    def read_past_event(self):
+        """What every read endpoint answers about the past event, its seats and attendees"""
+        event_id = self.past.id
+        attendee = self.seat.attendee
+        requests = {
+            'past events': ('search_events', (), {'date_filter': 'past'}),
+            'event search': ('search_events', (), {'q': 'Health', 'date_filter': 'all'}),
+            'attendee search': ('search_attendee', (), {'q': attendee.name}),
+            'short attendee search': ('search_attendee', (), {'q': attendee.name[:2], 'event_id': event_id}),
+            'ticket search': ('search_attendee', (), {'q': f'TCK-{event_id}-', 'event_id': event_id}),
+            'autocomplete': ('autocomplete_attendee', (), {'q': attendee.name[:4], 'event_id': event_id}),
+            'detail': ('event_detail_api', (event_id,), {}),
+            'statistics': ('event_statistics', (event_id,), {}),
+            'map data': ('event_map_data', (event_id,), {}),
+            'layout': ('event_layout', (event_id,), {}),
+            'binary layout': ('event_layout', (event_id,), {'format': 'binary'}),
+            'viewport': ('seats_in_viewport', (event_id,), {'x0': 0, 'y0': 0, 'x1': 40, 'y1': 40}),
+            'nearest': ('nearest_seat', (event_id,), {'x': 10, 'y': 12, 'count': 3}),
+            'best available': ('best_available_seats', (event_id,), {'party': 2, 'limit': 3}),
+            'export': ('export_attendees', (event_id,), {'format': 'ndjson'}),
+            'seat': ('seat_info', (self.seat.id,), {}),
+        }
+        self.client.force_login(get_user_model().objects.create_user(f'staff{len(self.answers)}', is_staff=True))
+        answers = {}
+        for key, (name, args, params) in requests.items():
+            response = self.client.get(reverse(f'seating:{name}', args=args), params)
+            self.assertEqual(response.status_code, 200, key)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            if response['Content-Type'] == 'application/json':
+                body = json.loads(body)
+                # The live and archive indexes rank ties their own way
+                body.get('results', []).sort(key=lambda result: result['id'])
+            answers[key] = body
+
+        for date_filter in ('past', 'all'):
+            response = self.client.get(reverse('seating:index'), {'date_filter': date_filter})
+            answers[f'index {date_filter}'] = [event.id for event in response.context['events']]
+        response = self.client.get(reverse('seating:seat_map', args=[event_id]))
+        self.assertContains(response, 'Health Summit')
+        answers['seat map'] = [
+            (section.name, [(seat.id, hasattr(seat, 'attendee')) for seat in section.seats.all()])
+            for section in response.context['sections']
+        ]
+        self.answers.append(answers)
+        return answers
+
+    def test_every_read_endpoint_serves_archived_events(self):
+        SeatHold.objects.all().delete()
+        self.answers = []
+        before = self.read_past_event()
+        self.assertEqual([result['id'] for result in before['past events']['results']], [self.past.id])
+        self.assertEqual(len(before['ticket search']['results']), 10)
+        self.assertEqual(before['export'].count(b'\n'), 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_events([self.past.id])
+        self.assertFalse(Event.objects.filter(pk=self.past.pk).exists())
+        after = self.read_past_event()
+        for key in before:
+            self.assertEqual(after[key], before[key], key)
+        self.assertEqual(self.get('event_layout', 999999)[0], 404)
+
+        # The async views read the archive too
+        for name, params in (
+            ('search_events', {'q': 'Health', 'date_filter': 'all'}),
+            ('search_attendee', {'q': self.seat.attendee.name}),
+        ):
+            response = async_to_sync(getattr(async_views, name))(RequestFactory().get('/', params))
+            body = json.loads(response.content)
+            body['results'].sort(key=lambda result: result['id'])
+            self.assertEqual(body, after['event search' if name == 'search_events' else 'attendee search'])
+
+    def test_listings_merge_live_and_archived_events(self):
+        recent = create_event('Ops Review', days=-3)
+        archive.archive_events([self.past.id])
+
+        def walk(date_filter, **params):
+            ids, cursor = [], ''
+            while True:
+                response = self.client.get(
+                    reverse('seating:search_events'),
+                    {'date_filter': date_filter, 'limit': 1, 'with_total': 1, 'cursor': cursor, **params}
+                )
+                data = json.loads(response.content)
+                ids += [result['id'] for result in data['results']]
+                cursor = data['next_cursor']
+                if not cursor:
+                    return ids, data['total']
+
+        self.assertEqual(walk('all'), ([self.upcoming.id, recent.id, self.past.id], 3))
+        self.assertEqual(walk('past'), ([recent.id, self.past.id], 2))
+        self.assertEqual(walk('upcoming'), ([self.upcoming.id], 1))
+        self.assertEqual(walk('all', q='Summit Review'), ([], 0))
+        self.assertEqual(walk('all', q='Health Summit'), ([self.past.id], 1))
+
+        response = self.client.get(reverse('seating:index'), {'date_filter': 'past'})
+        self.assertEqual([event.id for event in response.context['events']], [recent.id, self.past.id])
+        self.assertEqual(response.context['total_events'], 2)
+
+    def test_default_retention_archives_events_a_day_past(self):
+        self.assertEqual(archive.archivable_event_ids(), [self.past.id])
+
+    def test_moves_past_events_out_of_live_tables(self):
+        before = {name: self.get(name, self.past.id) for name in ('event_detail_api', 'event_statistics')}
+        seat_before = self.get('seat_info', self.seat.id)
+        attendees = Attendee.objects.filter(seat__section__event=self.past).count()
+
+        self.assertEqual(archive.archivable_event_ids(), [self.past.id])
+        moved = archive.archive_events(archive.archivable_event_ids())
+        self.assertEqual((moved['archivedevent'], moved['archivedseat'], moved['archivedattendee']), (1, 16, attendees))
+        self.assertFalse(Event.objects.filter(pk=self.past.pk).exists())
+        self.assertFalse(Seat.objects.filter(section__event_id=self.past.pk).exists())
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(Event.objects.get().pk, self.upcoming.pk)
+        self.assertEqual(ArchivedAttendee.objects.get(seat_id=self.seat.id).ticket_number, self.seat.attendee.ticket_number)
+
+        # The read-only APIs answer from the archive just as before
+        cache.clear()
+        for name, response in before.items():
+            self.assertEqual(self.get(name, self.past.id), response)
+        self.assertEqual(self.get('seat_info', self.seat.id), seat_before)
+        request = RequestFactory().get('/')
+        async_response = async_to_sync(async_views.get_seat_info)(request, seat_id=self.seat.id)
+        self.assertEqual(json.loads(async_response.content), seat_before[1])
+        async_response = async_to_sync(async_views.EventDetailAPI.as_view())(request, event_id=self.past.id)
+        self.assertEqual(json.loads(async_response.content), before['event_detail_api'][1])
+        response = self.client.get(reverse('seating:seats_info'), {'ids': f'{self.seat.id}'})
+        self.assertEqual(json.loads(response.content)['results'], [seat_before[1]])
+        self.assertEqual(self.get('event_detail_api', 999999)[0], 404)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('archive_events', dry_run=True, stdout=out)
+        self.assertIn(str(self.past.id), out.getvalue())
+        self.assertTrue(Event.objects.filter(pk=self.past.pk).exists())
+        call_command('archive_events', days=60, stdout=io.StringIO())
+        self.assertFalse(ArchivedEvent.objects.exists())
+        call_command('archive_events', stdout=io.StringIO())
+        self.assertEqual(list(ArchivedEvent.objects.values_list('id', flat=True)), [self.past.id])
+
+
+class EventFullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        day = date.today() + timedelta(days=3)
+        cls.jazz = Event.objects.create(name='Jazz Night', description='Quartet <live> on stage', venue='Blue Room', date=day)
+        cls.mention = Event.objects.create(
+            name='Open Mic', description='Poetry, then some jazz standards', venue='Cellar', date=day
+        )
+        cls.cafe = Event.objects.create(name='Café Chats', description='Coffee and talks', venue='Jazzhaus', date=day)
+        cls.past = Event.objects.create(
+            name='Jazz Brunch', description='', venue='Terrace', date=date.today() - timedelta(days=3)
+        )
+
+    def fetch(self, q, **params):
+        response = self.client.get(reverse('seating:search_events'), {'q': q, 'date_filter': 'all', **params})
+        return json.loads(response.content)
+
+    def test_ranked_prefix_matches_with_date_filter(self):
+        data = self.fetch('jaz', date_filter='upcoming')
+        # Name matches outrank venue matches, which outrank description matches
+        self.assertEqual([result['id'] for result in data['results']], [self.jazz.id, self.cafe.id, self.mention.id])
+        self.assertEqual(
+            [result['id'] for result in self.fetch('jazz night')['results']], [self.jazz.id]
+        )
+        self.assertEqual([result['id'] for result in self.fetch('cafe')['results']], [self.cafe.id])
+
+    def test_highlights_are_escaped(self):
+        result = self.fetch('quartet')['results'][0]
+        self.assertEqual(result['highlights']['description'], '<mark>Quartet</mark> &lt;live&gt; on stage')
+        self.assertEqual(result['highlights']['name'], 'Jazz Night')
+        self.assertIsNone(self.fetch('')['results'][0]['highlights'])
+
+    def test_operators_are_literal(self):
+        data = self.fetch('jazz OR "x* NEAR(')
+        self.assertTrue(data['success'])
+        self.assertEqual(data['results'], [])
+
+    def test_cursor_follows_rank(self):
+        first = self.fetch('jazz', limit=2)
+        second = self.fetch('jazz', limit=2, cursor=first['next_cursor'])
+        ids = [result['id'] for result in first['results'] + second['results']]
+        self.assertEqual(ids, [result['id'] for result in self.fetch('jazz')['results']])
+        self.assertEqual(len(ids), 4)
+        self.assertIsNone(second['next_cursor'])
+        # A listing cursor does not continue a ranked search
+        listing = self.fetch('', limit=1)['next_cursor']
+        response = self.client.get(reverse('seating:search_events'), {'q': 'jazz', 'cursor': listing})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.mention.name = 'Poetry Slam'
+        self.mention.save()
+        self.assertEqual([result['id'] for result in self.fetch('slam')['results']], [self.mention.id])
+        self.jazz.delete()
+        self.assertNotIn(self.jazz.id, [result['id'] for result in self.fetch('jazz')['results']])
+        search.rebuild_event_index()
+        self.assertEqual(len(self.fetch('jazz')['results']), 3)
+
+    def test_index_page(self):
+        response = self.client.get(reverse('seating:index'), {'search': 'jazz', 'date_filter': 'upcoming'})
+        self.assertEqual([event.id for event in response.context['events']], [self.jazz.id, self.cafe.id, self.mention.id])
+
+
+class OccupancySnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', sections=2, rows=2, seats_per_row=5, booked=6)
+        create_event('Robotics Expo', sections=2, rows=2, seats_per_row=5, booked=6)
+        cls.ticket = Attendee.objects.filter(seat__section__event=cls.event).order_by('id').first().ticket_number
+
+    def setUp(self):
+        cache.clear()
+
+    def test_records_changes_only_and_carries_values_forward(self):
+        recorder = snapshots.SnapshotRecorder()
+        start = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        # Event totals plus two sections, for each of the two events
+        self.assertEqual(recorder.record(now=start), 6)
+        self.assertEqual(recorder.record(now=start + timedelta(minutes=5)), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            checkin.check_in(self.event.id, self.ticket)
+        # Only the event totals and the attendee's section changed
+        self.assertEqual(recorder.record(now=start + timedelta(minutes=10)), 2)
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            history = snapshots.occupancy_history(
+                self.event.id, start + timedelta(minutes=1), start + timedelta(minutes=30), 60
+            )
+        self.assertFalse(any('seating_attendee' in query['sql'] or 'seating_seat' in query['sql'] for query in queries))
+        totals = history[0]
+        self.assertEqual(totals['initial'][2], 0)
+        self.assertEqual([values[2] for _, values in totals['points']], [1])
+        self.assertEqual(totals['points'][0][1][:2], totals['initial'][:2])
+        self.assertEqual(list(history), [0])
+
+    def test_retention_and_resolution_tiers(self):
+        now = timezone.now()
+        recorder = snapshots.SnapshotRecorder()
+        recorder.record(now=now - timedelta(days=4))
+        section = Section.objects.filter(event=self.event).order_by('id').first()
+        Section.objects.filter(pk=section.pk).update(occupied_seats=section.occupied_seats - 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.bump_event_version(self.event.id)
+        self.assertEqual(recorder.record(now=now - timedelta(days=3)), 2)
+
+        # The minute tier keeps two days: only the rows superseded before then
+        # go, the newest of each series still holds when the window starts
+        self.assertEqual(snapshots.prune(now=now), 2)
+        self.assertEqual(OccupancySnapshot.objects.filter(resolution=60).count(), 6)
+        self.assertEqual(OccupancySnapshot.objects.exclude(resolution=60).count(), 16)
+
+        self.assertEqual(snapshots.pick_resolution(now - timedelta(hours=6), now, now=now), 60)
+        self.assertEqual(snapshots.pick_resolution(now - timedelta(days=7), now, now=now), 900)
+        self.assertEqual(snapshots.pick_resolution(now - timedelta(days=300), now, now=now), 86400)
+
+    def test_quiet_event_history_survives_pruning(self):
+        now = timezone.now()
+        snapshots.SnapshotRecorder().record(now=now - timedelta(days=5))
+        snapshots.prune(now=now)
+        history = snapshots.occupancy_history(
+            self.event.id, now - timedelta(hours=6), now, snapshots.pick_resolution(now - timedelta(hours=6), now)
+        )
+        self.assertEqual(history[0]['initial'], snapshots.read_occupancy([self.event.id])[(self.event.id, 0)])
+        self.assertEqual(history[0]['points'], [])
+
+    def test_history_api(self):
+        snapshots.SnapshotRecorder().record()
+        url = reverse('seating:occupancy_history', args=[self.event.id])
+        data = self.client.get(url, {'section': 'all'}).json()
+        self.assertEqual(data['resolution'], 60)
+        self.assertEqual(data['fields'], ['taken_at', 'bookable_seats', 'occupied_seats', 'checked_in'])
+        self.assertEqual(len(data['series']), 3)
+        totals, *sections = data['series']
+        self.assertIsNone(totals['section_id'])
+        self.assertEqual(totals['points'][0][2], sum(section['points'][0][2] for section in sections))
+
+        self.assertEqual(len(self.client.get(url).json()['series']), 1)
+        self.assertEqual(self.client.get(url, {'resolution': 7}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+
+
+class AsyncViewParityTests(TestCase):
+    """The async JSON APIs must answer exactly like their sync versions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = create_event('Health Summit', sections=2, rows=2, seats_per_row=5, booked=6)
+        create_event('Robotics Expo', sections=2, rows=2, seats_per_row=5, booked=6)
+        cls.attendee = Attendee.objects.filter(seat__section__event=cls.event).select_related('seat').first()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    async def assertSameResponse(self, sync_view, async_view, path, params=None, **kwargs):
+        await cache.aclear()
+        sync_response = await sync_to_async(sync_view)(self.factory.get(path, params or {}), **kwargs)
+        await cache.aclear()
+        async_response = await async_view(self.factory.get(path, params or {}), **kwargs)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+
+    async def test_search_events(self):
+        await self.assertSameResponse(views.search_events, async_views.search_events, '/', {'q': 'Summ', 'date_filter': 'all'})
+        first = await sync_to_async(Event.objects.order_by(*pagination.ORDERING).first)()
+        await self.assertSameResponse(
+            views.search_events, async_views.search_events, '/',
+            {'date_filter': 'all', 'limit': 1, 'with_total': 1, 'cursor': pagination.encode_cursor(first)}
+        )
+
+    async def test_search_attendee(self):
+        for query in (self.attendee.name[:5], self.attendee.name[:2]):
+            await self.assertSameResponse(
+                views.search_attendee, async_views.search_attendee, '/', {'q': query, 'event_id': self.event.id}
+            )
+
+    async def test_seat_info(self):
+        for seat_id in (self.attendee.seat_id, 0):
+            await self.assertSameResponse(views.get_seat_info, async_views.get_seat_info, '/', seat_id=seat_id)
+
+    async def test_event_statistics(self):
+        await self.assertSameResponse(
+            views.event_statistics, async_views.event_statistics, '/', event_id=self.event.id
+        )
+
+    async def test_event_detail(self):
+        for event_id in (self.event.id, 0):
+            await self.assertSameResponse(
+                views.EventDetailAPI.as_view(), async_views.EventDetailAPI.as_view(), '/', event_id=event_id
+            )
+
+    def test_asgi_server_gets_every_async_route(self):
+        with open(os.path.join(settings.BASE_DIR, '.github', 'workflows', 'deploy.yml')) as handle:
+            pattern = re.search(r'seating\.async_views serves.*?location ~ (\S+) \{', handle.read(), re.S).group(1)
+        async_routes = {
+            'search_events', 'search_attendee', 'event_detail_api', 'event_statistics', 'seat_info',
+            'search_attendee_legacy', 'seat_info_legacy',
+        }
+        routed = set()
+        for route in urls.urlpatterns:
+            path = reverse(f'seating:{route.name}', kwargs={name: 1 for name in route.pattern.converters})
+            if re.match(pattern, path):
+                routed.add(route.name)
+        self.assertEqual(routed, async_routes)
@@ -1,6 +1,10 @@
 # seating/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the read-only JSON APIs are served by their async versions
+api = async_views if settings.SEATING_ASYNC_VIEWS else views
 
 app_name = 'seating'
 
@@ -10,18 +14,36 @@ urlpatterns = [
     path('event/<int:event_id>/map/', views.seat_map, name='seat_map'),
     
     # Search APIs
-    path('api/search/events/', views.search_events, name='search_events'),
-    path('api/search/attendee/', views.search_attendee, name='search_attendee'),
+    path('api/search/events/', api.search_events, name='search_events'),
+    path('api/search/attendee/', api.search_attendee, name='search_attendee'),
+    path('api/search/attendee/autocomplete/', views.autocomplete_attendee, name='autocomplete_attendee'),
     
     # Event APIs
-    path('api/events/<int:event_id>/', views.EventDetailAPI.as_view(), name='event_detail_api'),
-    path('api/events/<int:event_id>/statistics/', views.event_statistics, name='event_statistics'),
+    path('api/events/<int:event_id>/', api.EventDetailAPI.as_view(), name='event_detail_api'),
+    path('api/events/<int:event_id>/statistics/', api.event_statistics, name='event_statistics'),
+    path('api/events/<int:event_id>/live/', views.live_occupancy, name='live_occupancy'),
+    path('api/events/<int:event_id>/occupancy/history/', views.occupancy_history, name='occupancy_history'),
     path('api/events/<int:event_id>/map-data/', views.get_event_map_data, name='event_map_data'),
+    path('api/events/<int:event_id>/layout/', views.event_layout, name='event_layout'),
+    path('api/events/<int:event_id>/seats/viewport/', views.seats_in_viewport, name='seats_in_viewport'),
+    path('api/events/<int:event_id>/seats/nearest/', views.nearest_seat, name='nearest_seat'),
+    path('api/events/<int:event_id>/seats/best/', views.best_available_seats, name='best_available_seats'),
+    path('api/events/<int:event_id>/attendees/export/', views.export_attendees, name='export_attendees'),
+    
+    # Check-in APIs
+    path('api/events/<int:event_id>/check-in/', views.check_in, name='check_in'),
+    path('api/events/<int:event_id>/check-in/batch/', views.check_in_batch, name='check_in_batch'),
+    
+    # Seat hold APIs
+    path('api/events/<int:event_id>/holds/', views.hold_seats, name='hold_seats'),
+    path('api/holds/<str:token>/confirm/', views.confirm_hold, name='confirm_hold'),
+    path('api/holds/<str:token>/release/', views.release_hold, name='release_hold'),
     
     # Seat APIs
-    path('api/seats/<int:seat_id>/info/', views.get_seat_info, name='seat_info'),
+    path('api/seats/<int:seat_id>/info/', api.get_seat_info, name='seat_info'),
+    path('api/seats/info/', views.get_seats_info, name='seats_info'),
     
     # Legacy endpoints (for backward compatibility)
-    path('search_attendee/', views.search_attendee, name='search_attendee_legacy'),
-    path('seat/<int:seat_id>/info/', views.get_seat_info, name='seat_info_legacy'),
+    path('search_attendee/', api.search_attendee, name='search_attendee_legacy'),
+    path('seat/<int:seat_id>/info/', api.get_seat_info, name='seat_info_legacy'),
 ]
\ No newline at end of file
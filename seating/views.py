@@ -1,137 +1,325 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db.models import Q, Count, Prefetch, Exists, OuterRef
-from django.core.paginator import Paginator
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from datetime import datetime, timedelta, date
 import json
 import logging
 
-from .models import Event, Attendee, Seat, Section
+from .models import Event, Attendee, Seat, Section, ArchivedAttendee, ArchivedEvent, ArchivedSeat
+from . import (
+    archive, autocomplete, best_available, checkin, export, layout, live, pagination, reservations, search, snapshots,
+    spatial,
+)
+from .caching import cache_per_event
+from .permissions import api_token_required
+from .routers import replica_reads
 
 logger = logging.getLogger(__name__)
 
+# Archived events are all past, so listings of upcoming events leave the archive out
+UPCOMING_DATE_FILTERS = ('upcoming', 'this_week', 'this_month')
+
+
+def _events_queries(date_filter):
+    """Active events to list: live ones, then archived ones unless the filter only wants upcoming events"""
+    if date_filter in UPCOMING_DATE_FILTERS:
+        return [Event.objects.filter(is_active=True)]
+    return [Event.objects.filter(is_active=True), ArchivedEvent.objects.filter(is_active=True)]
+
+
+def _filter_by_date(events_query, date_filter, today):
+    if date_filter == 'upcoming':
+        return events_query.filter(date__gte=today)
+    if date_filter == 'past':
+        return events_query.filter(date__lt=today)
+    if date_filter == 'this_week':
+        week_end = today + timedelta(days=7)
+        return events_query.filter(date__range=[today, week_end])
+    if date_filter == 'this_month':
+        from calendar import monthrange
+        month_end = date(today.year, today.month, monthrange(today.year, today.month)[1])
+        return events_query.filter(date__range=[today, month_end])
+    return events_query
+
+
+def _filter_by_text(events_queries, query):
+    """Ranked, highlighted full-text matches when the indexes can answer the query"""
+    # Live and archived pages only merge if both are ranked
+    if all(search.can_search_events(query, events_query.model is ArchivedEvent) for events_query in events_queries):
+        return [search.search_events(events_query, query) for events_query in events_queries]
+    return [
+        events_query.filter(
+            Q(name__icontains=query) | 
+            Q(description__icontains=query) |
+            Q(venue__icontains=query)
+        )
+        for events_query in events_queries
+    ]
+
+
+def _search_events_queries(query, date_filter, today):
+    # Active events only, archived ones included; occupancy comes from stored counters
+    events_queries = _events_queries(date_filter)
+
+    # Apply search filter only if query is present and >= 2 chars
+    if query and len(query) >= 2:
+        events_queries = _filter_by_text(events_queries, query)
+
+    # Apply date filter
+    return [_filter_by_date(events_query, date_filter, today) for events_query in events_queries]
+
+
+def _event_search_response(results, next_cursor, query, date_filter):
+    return {
+        'results': results,
+        'count': len(results),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'query': query,
+        'date_filter': date_filter,
+        'success': True
+    }
+
+
+def _event_search_result(event, today):
+    return {
+        'id': event.id,
+        'name': event.name,
+        'description': (event.description[:150] + '...') if event.description and len(event.description) > 150 else (event.description or ''),
+        'venue': event.venue,
+        'date': event.date.strftime('%Y-%m-%d'),
+        'time': event.time.strftime('%H:%M') if event.time else None,
+        'total_seats': event.total_seats,
+        'occupied_seats': event.occupied_seats,
+        'available_seats': event.available_seats,
+        'occupancy_rate': event.occupancy_rate,
+        'status': 'past' if event.date < today else 'upcoming',
+        'url': f'/event/{event.id}/map/',
+        'highlights': _event_highlights(event),
+    }
+
+
+def _event_highlights(event):
+    """HTML of the event's fields with the search terms in <mark>, for full-text results"""
+    if getattr(event, 'search_rank', None) is None:
+        return None
+    return {
+        'name': search.mark_highlights(event.name_highlight),
+        'description': search.mark_highlights(event.description_snippet),
+        'venue': search.mark_highlights(event.venue_highlight),
+    }
+
+
+def _attendee_substring_query(query, event_id, archived=False):
+    """Fallback attendee search for queries too short for the trigram index"""
+    # Optimized query with select_related
+    attendees_query = (ArchivedAttendee if archived else Attendee).objects.select_related(
+        'seat__section__event'
+    ).filter(
+        Q(name__icontains=query) | Q(ticket_number__icontains=query),
+        seat__section__event__is_active=True
+    )
+    if event_id is not None:
+        attendees_query = attendees_query.filter(seat__section__event_id=event_id)
+    return attendees_query.order_by('name')
+
+
+def _search_attendees(query, event_id, limit):
+    """Matching attendees of live events, then of archived ones until ``limit`` are found"""
+    attendees = []
+    for archived in (False, True):
+        # An event is either live or archived, so its live matches are all of them
+        if len(attendees) >= limit or (archived and event_id is not None and attendees):
+            break
+        remaining = limit - len(attendees)
+        if search.can_search(query, archived):
+            # Ranked lookup through the trigram index, then one query for details
+            attendee_ids = search.search_attendee_ids(query, event_id=event_id, limit=remaining, archived=archived)
+            attendees_by_id = (ArchivedAttendee if archived else Attendee).objects.select_related(
+                'seat__section__event'
+            ).in_bulk(attendee_ids)
+            attendees += [attendees_by_id[pk] for pk in attendee_ids if pk in attendees_by_id]
+        else:
+            attendees += _attendee_substring_query(query, event_id, archived)[:remaining]
+    return attendees
+
+
+def _attendee_search_result(attendee):
+    return {
+        'id': attendee.id,
+        'name': attendee.name,
+        'ticket_number': attendee.ticket_number,
+        'seat_info': f"Row {attendee.seat.row}, Seat {attendee.seat.seat_number}",
+        'row': attendee.seat.row,
+        'seat': attendee.seat.seat_number,
+        'section': attendee.seat.section.name,
+        'event': attendee.seat.section.event.name,
+        'event_id': attendee.seat.section.event.id,
+        'event_date': attendee.seat.section.event.date.strftime('%Y-%m-%d'),
+        'seat_coordinates': {
+            'x': attendee.seat.x_coordinate,
+            'y': attendee.seat.y_coordinate
+        }
+    }
+
+
+def _seat_info(seat):
+    """Seat details; the seat must come with section__event and attendee selected"""
+    seat_info = {
+        'id': seat.id,
+        'seat_number': seat.seat_number,
+        'row': seat.row,
+        'section': seat.section.name,
+        'event': seat.section.event.name,
+        'is_available': seat.is_available,
+        'coordinates': {
+            'x': seat.x_coordinate,
+            'y': seat.y_coordinate
+        },
+        'success': True
+    }
+
+    # Check if seat is occupied
+    if hasattr(seat, 'attendee'):
+        seat_info.update({
+            'occupied': True,
+            'attendee_name': seat.attendee.name,
+            'ticket_number': seat.attendee.ticket_number,
+            'attendee_id': seat.attendee.id
+        })
+    else:
+        seat_info['occupied'] = False
+    return seat_info
+
+
+def _event_statistics(event, sections):
+    # Section-wise statistics
+    sections_stats = []
+    for section in sections:
+        available_seats = max(0, section.bookable_seats - section.occupied_seats)
+        occupancy_rate = (section.occupied_seats / section.bookable_seats * 100) if section.bookable_seats > 0 else 0
+
+        sections_stats.append({
+            'id': section.id,
+            'name': section.name,
+            'color': section.color,
+            'total_seats': section.bookable_seats,
+            'occupied_seats': section.occupied_seats,
+            'available_seats': available_seats,
+            'occupancy_rate': round(occupancy_rate, 1)
+        })
+
+    # Overall statistics
+    total_seats = sum(s['total_seats'] for s in sections_stats)
+    total_occupied = sum(s['occupied_seats'] for s in sections_stats)
+    total_available = max(0, total_seats - total_occupied)
+    overall_occupancy = (total_occupied / total_seats * 100) if total_seats > 0 else 0
+
+    return {
+        'event': {
+            'id': event.id,
+            'name': event.name,
+            'date': event.date.strftime('%Y-%m-%d'),
+            'time': event.time.strftime('%H:%M') if event.time else None,
+            'venue': event.venue,
+            'description': event.description
+        },
+        'overall_statistics': {
+            'total_seats': total_seats,
+            'occupied_seats': total_occupied,
+            'available_seats': total_available,
+            'occupancy_rate': round(overall_occupancy, 1)
+        },
+        'sections_statistics': sections_stats,
+        'success': True
+    }
+
+
+def _event_detail(event):
+    available_seats = max(0, event.bookable_seats - event.occupied_seats)
+    occupancy_rate = (event.occupied_seats / event.bookable_seats * 100) if event.bookable_seats > 0 else 0
+
+    return {
+        'id': event.id,
+        'name': event.name,
+        'description': event.description,
+        'venue': event.venue,
+        'date': event.date.strftime('%Y-%m-%d'),
+        'time': event.time.strftime('%H:%M') if event.time else None,
+        'total_seats': event.bookable_seats,
+        'occupied_seats': event.occupied_seats,
+        'available_seats': available_seats,
+        'occupancy_rate': round(occupancy_rate, 1),
+        'status': 'past' if event.date < date.today() else 'upcoming',
+        'is_active': event.is_active,
+        'success': True
+    }
+
+
 def index(request):
     """Main page with search functionality"""
     # Get filter parameters
     search_query = request.GET.get('search', '').strip()
     date_filter = request.GET.get('date_filter', 'all')
     
-    # Base query for active events only
-    events_query = Event.objects.filter(is_active=True).select_related().annotate(
-        total_seats=Count('sections__seats', distinct=True),
-        occupied_seats=Count('sections__seats__attendee', distinct=True)
-    )
+    # Active events only, archived ones included
+    # Occupancy is read from the stored counters on Event
+    events_queries = _events_queries(date_filter)
     
-    # Apply search filter
+    # Apply search filter; full-text matches are listed best first
     if search_query:
-        events_query = events_query.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(venue__icontains=search_query)
-        )
+        events_queries = _filter_by_text(events_queries, search_query)
     
     # Apply date filter
-    today = date.today()
-    if date_filter == 'upcoming':
-        events_query = events_query.filter(date__gte=today)
-    elif date_filter == 'past':
-        events_query = events_query.filter(date__lt=today)
-    elif date_filter == 'this_week':
-        week_end = today + timedelta(days=7)
-        events_query = events_query.filter(date__range=[today, week_end])
-    elif date_filter == 'this_month':
-        from calendar import monthrange
-        month_end = date(today.year, today.month, monthrange(today.year, today.month)[1])
-        events_query = events_query.filter(date__range=[today, month_end])
-    
-    events = events_query.order_by('-date', '-time')
+    events_queries = [_filter_by_date(events_query, date_filter, date.today()) for events_query in events_queries]
     
-    # Pagination
-    paginator = Paginator(events, 12)  # Show 12 events per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: 12 events after the cursor, an unknown cursor restarts
+    try:
+        events, next_cursor = pagination.paginate(events_queries, request.GET.get('cursor'), 12)
+    except ValueError:
+        events, next_cursor = pagination.paginate(events_queries, None, 12)
     
     context = {
-        'page_obj': page_obj,
+        'events': events,
+        'next_cursor': next_cursor,
         'search_query': search_query,
         'date_filter': date_filter,
-        'total_events': events.count()
+        'total_events': pagination.approximate_total(*events_queries)['total']
     }
     
     return render(request, 'seating/index.html', context)
 
 
 @require_http_methods(["GET"])
+@replica_reads
 def search_events(request):
     """AJAX endpoint for searching events"""
     try:
         query = request.GET.get('q', '').strip()
         date_filter = request.GET.get('date_filter', 'upcoming')  # Default to upcoming
         limit = min(int(request.GET.get('limit', 12)), 50)  # Max 50 results
+        cursor = request.GET.get('cursor') or None
 
-        # Base query with annotations for active events only
-        events_query = Event.objects.filter(is_active=True).select_related().annotate(
-            total_seats=Count('sections__seats', distinct=True),
-            occupied_seats=Count('sections__seats__attendee', distinct=True)
-        )
-
-        # Apply search filter only if query is present and >= 2 chars
-        if query and len(query) >= 2:
-            events_query = events_query.filter(
-                Q(name__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(venue__icontains=query)
-            )
-
-        # Apply date filter
         today = date.today()
-        if date_filter == 'upcoming':
-            events_query = events_query.filter(date__gte=today)
-        elif date_filter == 'past':
-            events_query = events_query.filter(date__lt=today)
-        elif date_filter == 'this_week':
-            week_end = today + timedelta(days=7)
-            events_query = events_query.filter(date__range=[today, week_end])
-        elif date_filter == 'this_month':
-            from calendar import monthrange
-            month_end = date(today.year, today.month, monthrange(today.year, today.month)[1])
-            events_query = events_query.filter(date__range=[today, month_end])
-
-        events = events_query.order_by('-date', '-time')[:limit]
-
-        results = []
-        for event in events:
-            occupancy_rate = 0
-            if event.total_seats > 0:
-                occupancy_rate = round((event.occupied_seats / event.total_seats) * 100, 1)
-            
-            results.append({
-                'id': event.id,
-                'name': event.name,
-                'description': (event.description[:150] + '...') if event.description and len(event.description) > 150 else (event.description or ''),
-                'venue': event.venue,
-                'date': event.date.strftime('%Y-%m-%d'),
-                'time': event.time.strftime('%H:%M') if event.time else None,
-                'total_seats': event.total_seats,
-                'occupied_seats': event.occupied_seats,
-                'available_seats': max(0, event.total_seats - event.occupied_seats),
-                'occupancy_rate': occupancy_rate,
-                'status': 'past' if event.date < today else 'upcoming',
-                'url': f'/event/{event.id}/map/'
-            })
+        events_queries = _search_events_queries(query, date_filter, today)
+        pages = [list(pagination.page_queryset(events_query, cursor, limit)) for events_query in events_queries]
+        events, next_cursor = pagination.split_page(pagination.merge_pages(pages, limit), limit)
 
-        return JsonResponse({
-            'results': results,
-            'count': len(results),
-            'query': query,
-            'date_filter': date_filter,
-            'success': True
-        })
+        response = _event_search_response(
+            [_event_search_result(event, today) for event in events], next_cursor, query, date_filter
+        )
+        if request.GET.get('with_total'):
+            response.update(pagination.approximate_total(*events_queries))
+
+        return JsonResponse(response)
         
     except ValueError as e:
         logger.warning(f"Invalid parameter in search_events: {str(e)}")
@@ -157,6 +345,7 @@ def search_events(request):
 
 
 @require_http_methods(["GET"])
+@replica_reads
 def search_attendee(request):
     """AJAX endpoint for searching attendees"""
     try:
@@ -177,18 +366,9 @@ def search_attendee(request):
         
         
         
-        # Optimized query with select_related
-        attendees_query = Attendee.objects.select_related(
-            'seat__section__event'
-        ).filter(
-            Q(name__icontains=query) | Q(ticket_number__icontains=query),
-            seat__section__event__is_active=True
-        )
-        
         if event_id:
             try:
                 event_id = int(event_id)
-                attendees_query = attendees_query.filter(seat__section__event_id=event_id)
             except (ValueError, TypeError):
                 return JsonResponse({
                     'results': [], 
@@ -196,27 +376,12 @@ def search_attendee(request):
                     'count': 0,
                     'success': False
                 }, status=400)
+        else:
+            event_id = None
         
-        attendees = attendees_query.order_by('name')[:limit]
+        attendees = _search_attendees(query, event_id, limit)
         
-        results = []
-        for attendee in attendees:
-            results.append({
-                'id': attendee.id,
-                'name': attendee.name,
-                'ticket_number': attendee.ticket_number,
-                'seat_info': f"Row {attendee.seat.row}, Seat {attendee.seat.seat_number}",
-                'row': attendee.seat.row,
-                'seat': attendee.seat.seat_number,
-                'section': attendee.seat.section.name,
-                'event': attendee.seat.section.event.name,
-                'event_id': attendee.seat.section.event.id,
-                'event_date': attendee.seat.section.event.date.strftime('%Y-%m-%d'),
-                'seat_coordinates': {
-                    'x': attendee.seat.x_coordinate,
-                    'y': attendee.seat.y_coordinate
-                }
-            })
+        results = [_attendee_search_result(attendee) for attendee in attendees]
         
         return JsonResponse({
             'results': results,
@@ -236,22 +401,71 @@ def search_attendee(request):
         }, status=500)
 
 
-@cache_page(60 * 5)  # Cache for 5 minutes
+@require_http_methods(["GET"])
+def autocomplete_attendee(request):
+    """AJAX endpoint for attendee prefix autocomplete served from process memory"""
+    try:
+        query = request.GET.get('q', '').strip()
+        limit = min(int(request.GET.get('limit', 10)), 50)
+
+        try:
+            event_id = int(request.GET.get('event_id'))
+        except (ValueError, TypeError):
+            return JsonResponse({
+                'results': [],
+                'message': 'Invalid event ID',
+                'count': 0,
+                'success': False
+            }, status=400)
+
+        if not query or len(query) < 2:
+            return JsonResponse({
+                'results': [],
+                'message': 'Please enter at least 2 characters',
+                'count': 0,
+                'success': True
+            })
+
+        results, truncated = autocomplete.autocomplete(event_id, query, limit=limit)
+
+        return JsonResponse({
+            'results': results,
+            'count': len(results),
+            'query': query,
+            'truncated': truncated,
+            'success': True
+        })
+
+    except Exception as e:
+        logger.error(f"Error in autocomplete_attendee: {str(e)}")
+        return JsonResponse({
+            'results': [],
+            'count': 0,
+            'query': query if 'query' in locals() else '',
+            'success': False,
+            'error': 'An error occurred while searching attendees'
+        }, status=500)
+
+
+@cache_per_event
 def seat_map(request, event_id):
     """Display seat map for an event with optimized queries"""
     try:
-        event = get_object_or_404(Event.objects.filter(is_active=True), id=event_id)
+        event = archive.find_event(event_id)
+        if event is None:
+            raise Http404('Event not found')
         
-        # Optimized prefetch for sections with their seats and attendees
-        sections = Section.objects.filter(event=event).prefetch_related(
+        # Optimized prefetch for sections with their seats and attendees, live or archived
+        seat_model = ArchivedSeat if isinstance(event, ArchivedEvent) else Seat
+        sections = event.sections.prefetch_related(
             Prefetch(
                 'seats',
-                queryset=Seat.objects.select_related('attendee')
+                queryset=seat_model.objects.select_related('attendee')
             )
         )
         # Get statistics
-        total_seats = Seat.objects.filter(section__event=event, is_available=True).count()
-        occupied_seats = Attendee.objects.filter(seat__section__event=event).count()
+        total_seats = event.bookable_seats
+        occupied_seats = event.occupied_seats
         available_seats = max(0, total_seats - occupied_seats)
         
         context = {
@@ -273,39 +487,15 @@ def seat_map(request, event_id):
 
 
 @require_http_methods(["GET"])
+@replica_reads
 def get_seat_info(request, seat_id):
     """Get detailed information about a specific seat"""
     try:
-        seat = get_object_or_404(
-            Seat.objects.select_related('section__event', 'attendee'), 
-            id=seat_id,
-            section__event__is_active=True
-        )
+        seat = archive.find_seat(seat_id)
+        if seat is None:
+            raise Http404('Seat not found')
         
-        seat_info = {
-            'id': seat.id,
-            'seat_number': seat.seat_number,
-            'row': seat.row,
-            'section': seat.section.name,
-            'event': seat.section.event.name,
-            'is_available': seat.is_available,
-            'coordinates': {
-                'x': seat.x_coordinate,
-                'y': seat.y_coordinate
-            },
-            'success': True
-        }
-        
-        # Check if seat is occupied
-        if hasattr(seat, 'attendee'):
-            seat_info.update({
-                'occupied': True,
-                'attendee_name': seat.attendee.name,
-                'ticket_number': seat.attendee.ticket_number,
-                'attendee_id': seat.attendee.id
-            })
-        else:
-            seat_info['occupied'] = False
+        seat_info = _seat_info(seat)
         
         return JsonResponse(seat_info)
         
@@ -317,57 +507,78 @@ def get_seat_info(request, seat_id):
         }, status=404)
 
 
+MAX_SEAT_BATCH_SIZE = 500
+
+
+def _parse_seat_ids(value):
+    """Requested seat ids in order without repeats, with None for invalid ones"""
+    tokens = dict.fromkeys(token.strip() for token in value.split(',') if token.strip())
+    return [(int(token) if token.isdigit() else None, token) for token in tokens]
+
+
+@require_http_methods(["GET"])
+@replica_reads
+def get_seats_info(request):
+    """Details of many seats in one query, by ``ids`` or by ``section`` and ``row``"""
+    try:
+        if request.GET.get('ids'):
+            requested = _parse_seat_ids(request.GET['ids'])
+            if len(requested) > MAX_SEAT_BATCH_SIZE:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'At most {MAX_SEAT_BATCH_SIZE} seats per request'
+                }, status=400)
+
+            seats = archive.find_seats([seat_id for seat_id, _ in requested if seat_id is not None])
+            # Answer in the requested order, reporting bad ids inline
+            results = []
+            for seat_id, token in requested:
+                if seat_id is None:
+                    results.append({'id': token, 'error': 'Invalid seat ID', 'success': False})
+                elif seat_id in seats:
+                    results.append(_seat_info(seats[seat_id]))
+                else:
+                    results.append({'id': seat_id, 'error': 'Seat not found or unavailable', 'success': False})
+
+        elif request.GET.get('section') and request.GET.get('row'):
+            # A whole row, left to right
+            seats = archive.find_row(int(request.GET['section']), request.GET['row'], MAX_SEAT_BATCH_SIZE)
+            results = [_seat_info(seat) for seat in seats]
+
+        else:
+            return JsonResponse({
+                'success': False,
+                'error': 'Provide ids, or section and row'
+            }, status=400)
+
+        return JsonResponse({
+            'results': results,
+            'count': len(results),
+            'found': sum(1 for result in results if result['success']),
+            'success': True
+        })
+
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid section ID'}, status=400)
+    except Exception as e:
+        logger.error(f"Error in get_seats_info: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while looking up seats'}, status=500)
+
+
 @require_http_methods(["GET"])
+@replica_reads
+@cache_per_event
 def event_statistics(request, event_id):
     """Get detailed statistics for an event"""
     try:
-        event = get_object_or_404(Event.objects.filter(is_active=True), id=event_id)
-        
-        # Section-wise statistics
-        sections_stats = []
-        sections = Section.objects.filter(event=event).annotate(
-            total_seats=Count('seats', filter=Q(seats__is_available=True)),
-            occupied_seats=Count('seats__attendee')
-        )
+        event = archive.find_event(event_id)
+        if event is None:
+            raise Http404('Event not found')
         
-        for section in sections:
-            available_seats = max(0, section.total_seats - section.occupied_seats)
-            occupancy_rate = (section.occupied_seats / section.total_seats * 100) if section.total_seats > 0 else 0
-            
-            sections_stats.append({
-                'id': section.id,
-                'name': section.name,
-                'color': section.color,
-                'total_seats': section.total_seats,
-                'occupied_seats': section.occupied_seats,
-                'available_seats': available_seats,
-                'occupancy_rate': round(occupancy_rate, 1)
-            })
+        # Live or archived sections, whichever the event is
+        sections = event.sections.all()
         
-        # Overall statistics
-        total_seats = sum(s['total_seats'] for s in sections_stats)
-        total_occupied = sum(s['occupied_seats'] for s in sections_stats)
-        total_available = max(0, total_seats - total_occupied)
-        overall_occupancy = (total_occupied / total_seats * 100) if total_seats > 0 else 0
-        
-        return JsonResponse({
-            'event': {
-                'id': event.id,
-                'name': event.name,
-                'date': event.date.strftime('%Y-%m-%d'),
-                'time': event.time.strftime('%H:%M') if event.time else None,
-                'venue': event.venue,
-                'description': event.description
-            },
-            'overall_statistics': {
-                'total_seats': total_seats,
-                'occupied_seats': total_occupied,
-                'available_seats': total_available,
-                'occupancy_rate': round(overall_occupancy, 1)
-            },
-            'sections_statistics': sections_stats,
-            'success': True
-        })
+        return JsonResponse(_event_statistics(event, sections))
         
     except Exception as e:
         logger.error(f"Error in event_statistics: {str(e)}")
@@ -380,34 +591,15 @@ def event_statistics(request, event_id):
 class EventDetailAPI(View):
     """Class-based view for event details API"""
     
-    @method_decorator(cache_page(60 * 2))
+    @method_decorator(replica_reads)
+    @method_decorator(cache_per_event)
     def get(self, request, event_id):
         try:
-            event = Event.objects.filter(is_active=True).select_related().annotate(
-                total_seats=Count('sections__seats', distinct=True, filter=Q(sections__seats__is_available=True)),
-                occupied_seats=Count('sections__seats__attendee', distinct=True)
-            ).get(id=event_id)
-            
-            available_seats = max(0, event.total_seats - event.occupied_seats)
-            occupancy_rate = (event.occupied_seats / event.total_seats * 100) if event.total_seats > 0 else 0
-            
-            event_data = {
-                'id': event.id,
-                'name': event.name,
-                'description': event.description,
-                'venue': event.venue,
-                'date': event.date.strftime('%Y-%m-%d'),
-                'time': event.time.strftime('%H:%M') if event.time else None,
-                'total_seats': event.total_seats,
-                'occupied_seats': event.occupied_seats,
-                'available_seats': available_seats,
-                'occupancy_rate': round(occupancy_rate, 1),
-                'status': 'past' if event.date < date.today() else 'upcoming',
-                'is_active': event.is_active,
-                'success': True
-            }
+            event = archive.find_event(event_id)
+            if event is None:
+                raise Event.DoesNotExist
             
-            return JsonResponse(event_data)
+            return JsonResponse(_event_detail(event))
             
         except Event.DoesNotExist:
             return JsonResponse({
@@ -428,10 +620,21 @@ class EventDetailAPI(View):
         
 
 @require_http_methods(["GET"])
+@cache_per_event
 def get_event_map_data(request, event_id):
     """Get event data with seat map image URL"""
     try:
-        event = get_object_or_404(Event.objects.filter(is_active=True), id=event_id)
+        event = Event.objects.filter(is_active=True).select_related('seat_map_asset').filter(id=event_id).first()
+        if event is not None:
+            image_name = event.seat_map_image.name
+            asset = getattr(event, 'seat_map_asset', None)
+            if asset is not None and image_name and asset.source != image_name:
+                asset = None  # Still processing the new upload
+        else:
+            # Archived events keep the uploaded image but not its processed variants
+            event = get_object_or_404(ArchivedEvent.objects.filter(is_active=True), id=event_id)
+            image_name, asset = event.seat_map_image, None
+        archived = isinstance(event, ArchivedEvent)
         
         return JsonResponse({
             'success': True,
@@ -441,9 +644,389 @@ def get_event_map_data(request, event_id):
                 'venue': event.venue,
                 'date': event.date.strftime('%b %d, %Y'),
                 'time': event.time.strftime('%I:%M %p') if event.time else None,
-                'seat_map_url': event.seat_map_image.url if event.seat_map_image else None,
+                'seat_map_url': default_storage.url(image_name) if image_name else None,
+                'seat_map_width': asset.width if asset else None,
+                'seat_map_height': asset.height if asset else None,
+                'seat_map_colors': asset.dominant_colors if asset else [],
+                'seat_map_tiles': asset.tiles if asset else None,
+                'seat_map_variants': asset.variants if asset else [],
+                'seat_map_ready': asset is not None or not image_name or archived,
             }
         })
     except Exception as e:
         logger.error(f"Error in get_event_map_data: {str(e)}")
-        return JsonResponse({'success': False, 'error': str(e)}, status=404)
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': str(e)}, status=404)
+
+
+@require_http_methods(["GET"])
+@cache_per_event
+def event_layout(request, event_id):
+    """Get the full seat layout of an event as compact parallel arrays"""
+    try:
+        if archive.find_event(event_id) is None:
+            return JsonResponse({'success': False, 'error': 'Event not found or unavailable'}, status=404)
+
+        seat_layout = layout.build_layout(event_id)
+
+        if request.GET.get('format') == 'binary':
+            return HttpResponse(layout.to_binary(seat_layout), content_type='application/octet-stream')
+
+        return JsonResponse({'success': True, **layout.to_json(seat_layout)})
+
+    except Exception as e:
+        logger.error(f"Error in event_layout: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while loading the layout'}, status=500)
+
+
+def _float_param(request, name, default=None):
+    value = request.GET.get(name)
+    if value is None or value == '':
+        if default is None:
+            raise ValueError(f"Missing parameter '{name}'")
+        return default
+    return float(value)
+
+
+@require_http_methods(["GET"])
+def seats_in_viewport(request, event_id):
+    """Get the seats of an event inside a rectangle of the floor plan (0-100 coordinates)"""
+    try:
+        x0 = _float_param(request, 'x0', 0.0)
+        y0 = _float_param(request, 'y0', 0.0)
+        x1 = _float_param(request, 'x1', 100.0)
+        y1 = _float_param(request, 'y1', 100.0)
+        limit = min(int(request.GET.get('limit', 2000)), 10000)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid viewport parameters'}, status=400)
+
+    try:
+        if archive.find_event(event_id) is None:
+            return JsonResponse({'success': False, 'error': 'Event not found or unavailable'}, status=404)
+
+        seats = spatial.get_grid(event_id).in_rect(x0, y0, x1, y1, limit=limit + 1)
+
+        return JsonResponse({
+            'success': True,
+            'seats': seats[:limit],
+            'count': min(len(seats), limit),
+            'truncated': len(seats) > limit
+        })
+
+    except Exception as e:
+        logger.error(f"Error in seats_in_viewport: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while loading seats'}, status=500)
+
+
+@require_http_methods(["GET"])
+def nearest_seat(request, event_id):
+    """Hit-test: find the seats closest to a point of the floor plan"""
+    try:
+        x = _float_param(request, 'x')
+        y = _float_param(request, 'y')
+        max_distance = request.GET.get('max_distance')
+        max_distance = float(max_distance) if max_distance else None
+        count = max(1, min(int(request.GET.get('count', 1)), 20))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid coordinates'}, status=400)
+
+    try:
+        if archive.find_event(event_id) is None:
+            return JsonResponse({'success': False, 'error': 'Event not found or unavailable'}, status=404)
+
+        seats = spatial.get_grid(event_id).nearest(x, y, max_distance=max_distance, count=count)
+
+        return JsonResponse({
+            'success': True,
+            'seats': seats,
+            'count': len(seats)
+        })
+
+    except Exception as e:
+        logger.error(f"Error in nearest_seat: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while locating seats'}, status=500)
+
+
+@require_http_methods(["GET"])
+def best_available_seats(request, event_id):
+    """Find blocks of adjacent free seats for a party, closest to the stage first"""
+    try:
+        party = int(request.GET.get('party', 2))
+        if not 1 <= party <= best_available.MAX_PARTY_SIZE:
+            raise ValueError(f'party must be between 1 and {best_available.MAX_PARTY_SIZE}')
+        stage_x, stage_y = best_available.get_stage_point()
+        focus = (_float_param(request, 'focus_x', stage_x), _float_param(request, 'focus_y', stage_y))
+        sections = request.GET.get('sections')
+        section_ids = {int(section_id) for section_id in sections.split(',') if section_id.strip()} if sections else None
+        limit = max(1, min(int(request.GET.get('limit', 5)), 50))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid party, focus or section parameters'}, status=400)
+
+    try:
+        if archive.find_event(event_id) is None:
+            return JsonResponse({'success': False, 'error': 'Event not found or unavailable'}, status=404)
+
+        options = best_available.find_best_available(
+            event_id, party, focus=focus, section_ids=section_ids, limit=limit
+        )
+
+        return JsonResponse({
+            'success': True,
+            'party': party,
+            'focus': {'x': focus[0], 'y': focus[1]},
+            'options': options,
+            'count': len(options)
+        })
+
+    except Exception as e:
+        logger.error(f"Error in best_available_seats: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while finding seats'}, status=500)
+
+
+
+@require_http_methods(["GET"])
+def live_occupancy(request, event_id):
+    """Push occupancy and seat state changes of an event as Server-Sent Events"""
+    try:
+        if not Event.objects.filter(is_active=True, id=event_id).exists():
+            return JsonResponse({'success': False, 'error': 'Event not found or unavailable'}, status=404)
+
+        if request.GET.get('once'):
+            # Current snapshot only, for clients that cannot hold a stream open
+            return HttpResponse(live.current_snapshot(event_id), content_type='text/event-stream')
+
+        # Under ASGI a stream is a coroutine on the event loop; under WSGI it holds a worker thread
+        content = live.astream(event_id) if isinstance(request, ASGIRequest) else live.stream(event_id)
+        response = StreamingHttpResponse(content, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in live_occupancy: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while opening the live feed'}, status=500)
+
+@require_http_methods(["GET"])
+@replica_reads
+def occupancy_history(request, event_id):
+    """
+    Occupancy of an event over time, read from the snapshot table only.
+    ?start=&end= ISO datetimes (default: the last 24 hours), ?resolution= in
+    seconds (default: the finest tier covering the range) and ?section= a
+    comma-separated list of section ids or "all" (default: event totals only).
+    """
+    try:
+        start, end = snapshots.parse_range(request.GET.get('start'), request.GET.get('end'))
+        resolutions = [resolution for resolution, _ in snapshots.get_tiers()]
+        if request.GET.get('resolution'):
+            resolution = int(request.GET['resolution'])
+            if resolution not in resolutions:
+                raise ValueError(f"resolution must be one of {', '.join(map(str, resolutions))}")
+            if (end - start).total_seconds() / resolution > snapshots.MAX_POINTS:
+                raise ValueError('Range too long for this resolution')
+        else:
+            resolution = snapshots.pick_resolution(start, end)
+
+        section = request.GET.get('section', '')
+        if section == 'all':
+            section_ids = None
+        else:
+            section_ids = [int(section_id) for section_id in section.split(',') if section_id.strip()]
+
+        history = snapshots.occupancy_history(event_id, start, end, resolution, section_ids)
+        return JsonResponse({
+            'success': True,
+            'event_id': event_id,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'resolution': resolution,
+            'fields': ['taken_at', *snapshots.VALUE_FIELDS],
+            'series': snapshots.serialize_history(history),
+        })
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in occupancy_history: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while reading occupancy history'}, status=500)
+
+# The manifest holds attendees' contact details
+@staff_member_required
+@require_http_methods(["GET"])
+def export_attendees(request, event_id):
+    """Stream the attendee manifest of an event as CSV or NDJSON"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.CONTENT_TYPES:
+        return JsonResponse({'success': False, 'error': 'Format must be csv or ndjson'}, status=400)
+
+    try:
+        if not any(model.objects.filter(id=event_id).exists() for model in (Event, ArchivedEvent)):
+            return JsonResponse({'success': False, 'error': 'Event not found'}, status=404)
+
+        response = StreamingHttpResponse(
+            export.stream_manifest(event_id, export_format),
+            content_type=export.CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="event-{event_id}-attendees.{export_format}"'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in export_attendees: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while exporting attendees'}, status=500)
+
+
+def _json_body(request):
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    return request.POST
+
+
+CHECK_IN_STATUS_CODES = {
+    checkin.CHECKED_IN: 200,
+    checkin.DUPLICATE: 200,
+    checkin.CONFLICT: 409,
+    checkin.NOT_FOUND: 404,
+}
+
+
+# Scanners are API clients without a CSRF token; they authenticate with an API token
+@csrf_exempt
+@api_token_required
+@require_http_methods(["POST"])
+def check_in(request, event_id):
+    """Check in a single scanned ticket"""
+    try:
+        data = _json_body(request)
+        ticket_number = str(data.get('ticket_number', '')).strip()
+        if not ticket_number:
+            return JsonResponse({'success': False, 'error': 'ticket_number is required'}, status=400)
+
+        result = checkin.check_in(
+            event_id, ticket_number,
+            gate=str(data.get('gate', ''))[:50],
+            scanned_at=data.get('scanned_at')
+        )
+        return JsonResponse(
+            {'success': result['status'] in (checkin.CHECKED_IN, checkin.DUPLICATE), **result},
+            status=CHECK_IN_STATUS_CODES[result['status']]
+        )
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error in check_in: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred during check-in'}, status=500)
+
+
+@csrf_exempt
+@api_token_required
+@require_http_methods(["POST"])
+def check_in_batch(request, event_id):
+    """Apply a batch of scans uploaded by an offline scanner"""
+    try:
+        scans = json.loads(request.body or b'{}').get('scans')
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+
+    if not isinstance(scans, list):
+        return JsonResponse({'success': False, 'error': 'scans must be a list'}, status=400)
+    if len(scans) > checkin.MAX_BATCH_SIZE:
+        return JsonResponse({
+            'success': False,
+            'error': f'At most {checkin.MAX_BATCH_SIZE} scans per batch'
+        }, status=400)
+
+    try:
+        results = checkin.check_in_batch(event_id, scans)
+        return JsonResponse({
+            'success': True,
+            'summary': checkin.summarize(results),
+            'results': results
+        })
+
+    except Exception as e:
+        logger.error(f"Error in check_in_batch: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while applying scans'}, status=500)
+
+
+HOLD_STATUS_CODES = {
+    reservations.HELD: 201,
+    reservations.UNAVAILABLE: 409,
+    reservations.CONFIRMED: 200,
+    reservations.EXPIRED: 410,
+    reservations.CONFLICT: 409,
+    reservations.INVALID: 400,
+    reservations.TICKET_CLASH: 503,
+}
+
+
+def _hold_response(result):
+    return JsonResponse(
+        {'success': result['status'] in (reservations.HELD, reservations.CONFIRMED), **result},
+        status=HOLD_STATUS_CODES[result['status']]
+    )
+
+
+@csrf_exempt
+@api_token_required
+@require_http_methods(["POST"])
+def hold_seats(request, event_id):
+    """Hold seats for a checkout; the returned token confirms or releases them"""
+    try:
+        data = _json_body(request)
+        seat_ids = data.get('seat_ids')
+        if not isinstance(seat_ids, list) or not seat_ids:
+            return JsonResponse({'success': False, 'error': 'seat_ids must be a non-empty list'}, status=400)
+        if len(seat_ids) > reservations.MAX_SEATS_PER_HOLD:
+            return JsonResponse({
+                'success': False,
+                'error': f'At most {reservations.MAX_SEATS_PER_HOLD} seats per hold'
+            }, status=400)
+        seconds = int(data.get('seconds') or reservations.DEFAULT_HOLD_SECONDS)
+        if not 0 < seconds <= reservations.MAX_HOLD_SECONDS:
+            return JsonResponse({
+                'success': False,
+                'error': f'seconds must be between 1 and {reservations.MAX_HOLD_SECONDS}'
+            }, status=400)
+
+        result = reservations.hold_seats(
+            event_id, [int(seat_id) for seat_id in seat_ids],
+            holder=str(data.get('holder', '')), seconds=seconds
+        )
+        return _hold_response(result)
+
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid hold request'}, status=400)
+    except Exception as e:
+        logger.error(f"Error in hold_seats: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while holding seats'}, status=500)
+
+
+@csrf_exempt
+@api_token_required
+@require_http_methods(["POST"])
+def confirm_hold(request, token):
+    """Book the held seats for the given attendees"""
+    try:
+        attendees = _json_body(request).get('attendees')
+        if not isinstance(attendees, list):
+            return JsonResponse({'success': False, 'error': 'attendees must be a list'}, status=400)
+        return _hold_response(reservations.confirm_hold(token, attendees))
+
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    except Exception as e:
+        logger.error(f"Error in confirm_hold: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while booking seats'}, status=500)
+
+
+@csrf_exempt
+@api_token_required
+@require_http_methods(["POST"])
+def release_hold(request, token):
+    """Give held seats back before the hold expires"""
+    try:
+        return JsonResponse({'success': True, 'released': reservations.release_hold(token)})
+
+    except Exception as e:
+        logger.error(f"Error in release_hold: {str(e)}")
+        return JsonResponse({'success': False, 'error': 'An error occurred while releasing seats'}, status=500)
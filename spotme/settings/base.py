@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'seating.instrumentation.RequestMetricsMiddleware',
+    'seating.routers.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,6 +86,49 @@ DATABASES = {
     }
 }
 
+# SQLite tuned for many readers alongside short write bursts, applied by
+# production.py (benchmark_database compares it with the defaults above).
+# WAL lets readers carry on while a write commits, and IMMEDIATE transactions
+# take the write lock when they begin, so a writer waits its turn through
+# busy_timeout instead of failing halfway through with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Durable across crashes in WAL mode, fsyncs only at checkpoints
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 10000)),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 32768)),  # Negative means KiB
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    'transaction_mode': 'IMMEDIATE',
+}
+# Seconds a connection is reused across requests; spotme/asgi.py sets 0,
+# as persistent connections should not be used with async views
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+
+# Read replicas: comma-separated SQLite files, kept up to date from the
+# primary by the sync_replicas command. The read-only JSON APIs read from
+# them (see seating/routers.py); writes and everything else use 'default'.
+SQLITE_REPLICAS = [path.strip() for path in os.getenv('SQLITE_REPLICAS', '').split(',') if path.strip()]
+for _index, _path in enumerate(SQLITE_REPLICAS, start=1):
+    DATABASES['replica' if _index == 1 else f'replica_{_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _path,
+        'OPTIONS': {
+            'init_command': f"PRAGMA query_only=ON;PRAGMA busy_timeout={SQLITE_PRAGMAS['busy_timeout']}",
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+SEATING_REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['seating.routers.ReplicaRouter']
+# After a client writes, their reads stay on the primary this many seconds so
+# they see their own changes despite replica lag
+SEATING_REPLICA_STICKY_SECONDS = int(os.getenv('SEATING_REPLICA_STICKY_SECONDS', 10))
+# Upper bound on replica lag (sync_replicas --interval plus margin); responses
+# read from a replica are cached no longer than this
+SEATING_REPLICA_MAX_LAG_SECONDS = int(os.getenv('SEATING_REPLICA_MAX_LAG_SECONDS', 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,6 +172,82 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'spotme'),
+    },
+    # Per-event version counters: kept apart from cached responses so they
+    # are never culled to make room for them
+    'seating_versions': {
+        'BACKEND': os.getenv('VERSION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('VERSION_CACHE_LOCATION', 'spotme-versions'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+# Cached event pages and APIs are invalidated through per-event version keys,
+# so they can be kept much longer than a plain TTL cache would allow
+SEATING_EVENT_CACHE_TIMEOUT = int(os.getenv('SEATING_EVENT_CACHE_TIMEOUT', 60 * 60 * 6))
+
+# Events whose autocomplete index, spatial grid and best-available chart each
+# worker keeps in memory; the least recently used are dropped beyond this
+SEATING_EVENT_MEMO_SIZE = int(os.getenv('SEATING_EVENT_MEMO_SIZE', 32))
+
+# Serve the read-only JSON APIs from seating.async_views. Only for ASGI
+# servers: the spotme_asgi service sets it and nginx sends those APIs there
+# (see the deploy workflow); under WSGI every async view would run in its own
+# event loop
+SEATING_ASYNC_VIEWS = os.getenv('SEATING_ASYNC_VIEWS', 'False') == 'True'
+
+# Events move from the live tables to the archive (archive_events command)
+# once their date is this many days past; the read-only APIs and the
+# past-event listings still serve them
+SEATING_ARCHIVE_AFTER_DAYS = int(os.getenv('SEATING_ARCHIVE_AFTER_DAYS', 1))
+
+# Bearer tokens accepted by the scanner and hold APIs (seating.permissions),
+# comma-separated; without any, those APIs refuse every request
+SEATING_API_TOKENS = [token.strip() for token in os.getenv('SEATING_API_TOKENS', '').split(',') if token.strip()]
+
+# Occupancy history (record_occupancy command): (resolution, retention) in
+# seconds, finest first; every tier gets each sample, None keeps a tier forever
+SEATING_OCCUPANCY_TIERS = (
+    (60, 2 * 24 * 3600),
+    (15 * 60, 30 * 24 * 3600),
+    (24 * 3600, None),
+)
+
+# Where the stage is on the floor plan (0-100 coordinates); best-available
+# seat blocks are ranked by their distance to it
+SEATING_STAGE_POINT = (50.0, 0.0)
+
+# Request metrics
+# Query count, DB time and cache hits are sent as Server-Timing headers and
+# logged per request on 'seating.requests'; slower requests also log their SQL
+SEATING_SERVER_TIMING = os.getenv('SEATING_SERVER_TIMING', 'True') == 'True'
+SEATING_SLOW_REQUEST_MS = int(os.getenv('SEATING_SLOW_REQUEST_MS', 500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'seating.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
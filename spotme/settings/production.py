@@ -1,5 +1,31 @@
 from .base import *
 
+# Tuned SQLite with persistent connections, checked before reuse
+DATABASES['default'].update({
+    'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+    'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': True,
+})
+for alias in SEATING_REPLICA_DATABASES:
+    DATABASES[alias].update({'CONN_MAX_AGE': DB_CONN_MAX_AGE, 'CONN_HEALTH_CHECKS': True})
+
+# Gunicorn workers must share cache versions, so default to a file-based cache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'seating_versions': {
+        'BACKEND': os.getenv('VERSION_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('VERSION_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'versions')),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+# Log every request's metrics line, not just slow requests
+LOGGING['loggers']['seating.requests']['level'] = os.getenv('REQUEST_LOG_LEVEL', 'INFO')
+
 # Security settings for production
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True